@@ -23,6 +23,12 @@ from core.scoring.indices import balance_index
 from core.features.text_features import analyze_text
 from core.features.audio_features import analyze_audio
 from core.features.scoring import calculate_psi, calculate_iepi
+from core.utils.messages import message
+
+
+def bilingual(msg_id: str) -> str:
+    """عنوان ثنائي اللغة "عربي | English" من كتالوج الرسائل."""
+    return f"{message(msg_id, 'ar')} | {message(msg_id, 'en')}"
 
 # ==========================================================
 # 📌 إعداد صفحة التطبيق (ضروري أن يكون أول استدعاء لـ Streamlit)
@@ -150,14 +156,14 @@ with tabs[0]:
     with tab1:
         col1, col2, col3 = st.columns(3)
         with col1:
-            mind = st.slider("🧠 العقل | Mind", 0, 100, 50)
-            heart = st.slider("❤️ القلب | Heart", 0, 100, 50)
+            mind = st.slider(f"🧠 {bilingual('ui.facet.mind')}", 0, 100, 50)
+            heart = st.slider(f"❤️ {bilingual('ui.facet.heart')}", 0, 100, 50)
         with col2:
-            body = st.slider("🏋️ الجسد | Body", 0, 100, 50)
-            spirit = st.slider("🕊️ الروح | Spirit", 0, 100, 50)
+            body = st.slider(f"🏋️ {bilingual('ui.facet.body')}", 0, 100, 50)
+            spirit = st.slider(f"🕊️ {bilingual('ui.facet.spirit')}", 0, 100, 50)
         with col3:
-            relations = st.slider("🤝 العلاقات | Relations", 0, 100, 50)
-            work = st.slider("💼 العمل | Work", 0, 100, 50)
+            relations = st.slider(f"🤝 {bilingual('ui.facet.relations')}", 0, 100, 50)
+            work = st.slider(f"💼 {bilingual('ui.facet.work')}", 0, 100, 50)
 
         psi_score = calculate_psi(mind, heart, body, spirit, relations, work)
 
@@ -220,17 +226,17 @@ with tabs[0]:
     with tab2:
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            iman = st.slider("🕋 الإيمان | Faith", 0, 100, 70)
-            niyyah = st.slider("🤲 النية | Intention", 0, 100, 70)
+            iman = st.slider(f"🕋 {bilingual('iepi.iman.name')}", 0, 100, 70)
+            niyyah = st.slider(f"🤲 {bilingual('iepi.niyyah.name')}", 0, 100, 70)
         with col2:
-            ibadah = st.slider("🕌 العبادة | Worship", 0, 100, 70)
-            dhikr = st.slider("📿 الذكر | Remembrance", 0, 100, 70)
+            ibadah = st.slider(f"🕌 {bilingual('iepi.ibadah.name')}", 0, 100, 70)
+            dhikr = st.slider(f"📿 {bilingual('iepi.dhikr.name')}", 0, 100, 70)
         with col3:
-            akhlaq = st.slider("🌿 الأخلاق | Morality", 0, 100, 70)
-            ilm = st.slider("📚 العلم | Knowledge", 0, 100, 70)
+            akhlaq = st.slider(f"🌿 {bilingual('iepi.akhlaq.name')}", 0, 100, 70)
+            ilm = st.slider(f"📚 {bilingual('iepi.ilm.name')}", 0, 100, 70)
         with col4:
-            mizan = st.slider("⚖️ التوازن | Balance", 0, 100, 70)
-            ummah = st.slider("🤝 المجتمع | Community", 0, 100, 70)
+            mizan = st.slider(f"⚖️ {bilingual('iepi.mizan.name')}", 0, 100, 70)
+            ummah = st.slider(f"🤝 {bilingual('iepi.ummah.name')}", 0, 100, 70)
 
         iepi_score = calculate_iepi(iman, niyyah, ibadah, dhikr, akhlaq, ilm, mizan, ummah)
 
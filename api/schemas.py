@@ -1 +1,17 @@
-pass
+# نماذج طلبات واجهة FastAPI (اختياري)
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+# أقصى حجم لتسجيل صوتي مرفوع (بعد فك base64)
+MAX_AUDIO_BYTES = 20 * 1024 * 1024
+
+
+class GuidanceRequest(BaseModel):
+    text: Optional[str] = None
+    # التسجيل الصوتي نفسه بترميز base64 (لا تُقبل مسارات ملفات من العميل)
+    audio_base64: Optional[str] = Field(default=None, max_length=(MAX_AUDIO_BYTES * 4) // 3 + 4)
+    signals: Dict[str, Any] = Field(default_factory=dict)
+    lang: str = "en"
+    # مهل اختيارية لكل وسيط بالثواني (text / audio / wearable)
+    timeouts: Optional[Dict[str, float]] = None
@@ -1,9 +1,48 @@
 # FastAPI placeholder (اختياري)
 try:
-    from fastapi import FastAPI
-    app = FastAPI(title="Insight Engineering API")
+    from fastapi import FastAPI, HTTPException
+except ImportError:  # FastAPI غير مثبّت: الواجهة معطّلة، وأي خطأ آخر يظهر كما هو
+    FastAPI = None
+
+if FastAPI is None:
+    app = None
+else:
+    import base64
+    import binascii
+    from contextlib import asynccontextmanager
+
+    from core.guidance.orchestrator import build_guidance_async, resolve_timeouts
+    from core.utils.jit import HAVE_NUMBA, warmup
+    from .schemas import GuidanceRequest
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # تجميع نوى numba مسبقًا (أو تحميلها من ذاكرة القرص) قبل أول طلب
+        app.state.jit_warmup = warmup()
+        yield
+
+    app = FastAPI(title="Insight Engineering API", lifespan=lifespan)
     @app.get("/")
     def root():
-        return {"status": "ok"}
-except Exception:
-    app = None
+        return {"status": "ok", "jit": HAVE_NUMBA}
+
+    @app.post("/guidance")
+    async def guidance(req: GuidanceRequest):
+        # الوسائط تعمل بالتوازي؛ المتأخر عن مهلته يُعلَّم timed_out في "modalities"
+        try:
+            timeouts = resolve_timeouts(req.timeouts)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        audio = None
+        if req.audio_base64:
+            try:
+                audio = base64.b64decode(req.audio_base64, validate=True)
+            except (binascii.Error, ValueError):
+                raise HTTPException(status_code=422, detail="audio_base64 is not valid base64")
+        return await build_guidance_async(
+            text=req.text,
+            audio=audio,
+            signals=req.signals,
+            lang=req.lang,
+            timeouts=timeouts,
+        )
@@ -1,15 +1,23 @@
 import streamlit as st
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 import networkx as nx
 import tempfile
 import os
 from pathlib import Path
-from core.dynamics.dynamic_balance_map import generate_smart_balance_map
+from core.dynamics.dynamic_balance_map import (
+    LARGE_GRAPH_THRESHOLD,
+    generate_large_balance_map,
+    generate_smart_balance_map,
+)
+from core.utils.messages import message
+
+UI_LANG = "ar"
 
-st.subheader("🌿 خريطة التوازن الديناميكية الذكية")
-if st.button("🔍 عرض الخريطة"):
-    st.info("⏳ جارٍ إنشاء الخريطة...")
+st.subheader(message("balance_map.title", UI_LANG))
+if st.button(message("ui.balance_map.show", UI_LANG)):
+    st.info(message("ui.balance_map.loading", UI_LANG))
     fig = generate_smart_balance_map(user_scores)
     st.plotly_chart(fig, use_container_width=True)
 
@@ -19,11 +27,13 @@ from core.questionnaire import load_questionnaire, default_scores
 from core.scoring.indices import balance_index
 from core.dynamics.ode_models import simple_emotion_model
 from core.dynamics.simulators import euler_integrate, vector_field
+from core.dynamics.equilibria import equilibria_table, load_atlas
 from core.graph.builder import graph_from_config
-from core.graph.laplacian import laplacian_smoothing
-from core.graph.metrics import degree_centrality
+from core.graph.laplacian import laplacian_smoothing_adaptive
 from core.explain.attribution import explain_summary
-from core.guidance.rules import merge_rules, recommend_for_scores
+from core.scoring.whatif import delta_grid, simulate_whatif, sensitivity_table
+from core.features.scoring import PSI_WEIGHTS
+from core.guidance.rules import graph_centrality, recommend_for_scores
 from core.guidance.planner import build_daily_plan, build_weekly_plan
 from core.storage.db import init_db
 from core.storage.repository import (
@@ -33,7 +43,9 @@ from core.storage.repository import (
     list_sessions,
     get_recommendations,
     get_plan,
+    get_forecast,
 )
+from core.dynamics.forecasting import refit_user
 from core.features.text_features import analyze_text
 from core.features.audio_features import analyze_audio
 from core.features.signal_features import analyze_wearable_signals
@@ -104,7 +116,13 @@ with tabs[0]:
 with tabs[1]:
     st.subheader("Emotion-State Dynamics (Phase Portrait)")
 
-    f = simple_emotion_model()
+    atlas = load_atlas()
+    pcols = st.columns(5)
+    model_params = {
+        p: pcols[i].select_slider(p, options=[float(v) for v in atlas.axes[p]], value=default)
+        for i, (p, default) in enumerate(zip("abcde", (0.8, 0.9, 0.2, 0.6, 1.0)))
+    }
+    f = simple_emotion_model(**model_params)
     X, Y, dX, dY = vector_field(f, x_range=(-2,2), y_range=(-2,2), density=20)
 
     fig3, ax3 = plt.subplots(figsize=(5,5))
@@ -115,9 +133,30 @@ with tabs[1]:
 
     traj = euler_integrate(f, x0=(1.2, 0.2), t_span=(0, 20), steps=300)
     ax3.plot(traj[:,0], traj[:,1], "r-", lw=2, label="Trajectory")
+
+    # نقاط الاتزان من الأطلس المحسوب مسبقًا (بدون تكامل)
+    eq = atlas.query(**model_params)
+    for p in eq["equilibria"]:
+        stable = p["kind"].startswith("stable")
+        ax3.plot(p["x"], p["y"], "o", ms=8, mfc="black" if stable else "white", mec="black")
     ax3.legend()
     st.pyplot(fig3)
 
+    with st.expander("Equilibria & stability atlas"):
+        if eq["near_boundary"]:
+            st.warning("Parameters lie next to a bifurcation boundary.")
+        st.table(equilibria_table(eq))
+        axis = st.selectbox("Bifurcation parameter", list("abcde"), index=0)
+        diagram = atlas.slice(axis, **model_params)
+        fig4, ax4 = plt.subplots(figsize=(5,3))
+        for kind, part in diagram.groupby("kind"):
+            ax4.plot(part[axis], part["x"], ".", label=kind)
+        ax4.axvline(model_params[axis], color="gray", lw=1, ls="--")
+        ax4.set_xlabel(axis)
+        ax4.set_ylabel("x*")
+        ax4.legend(fontsize=7)
+        st.pyplot(fig4)
+
 # ==========================================================
 # 3. تبويب شبكة العلاقات
 # ==========================================================
@@ -125,18 +164,24 @@ with tabs[2]:
     st.subheader("Insight Graph")
 
     G = graph_from_config()
-    smoothed = laplacian_smoothing(G, s_norm, p=2.0, alpha=0.3, iterations=10)
-
-    fig2, ax2 = plt.subplots(figsize=(5,5))
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw_networkx_nodes(
-        G, pos,
-        node_size=[smoothed[n]*5 for n in G.nodes()],
-        node_color="skyblue", ax=ax2
-    )
-    nx.draw_networkx_edges(G, pos, width=[G[u][v].get("weight",1.0) for u,v in G.edges()], ax=ax2)
-    nx.draw_networkx_labels(G, pos, ax=ax2)
-    st.pyplot(fig2)
+    # نفس التنعيم السابق (10 تكرارات بقوة 0.3) مع توقف مبكر إن ثبتت القيم قبلها
+    smoothing = laplacian_smoothing_adaptive(G, s_norm, p=2.0, alpha=0.3, max_iter=10, tol=1e-4)
+    smoothed = smoothing["scores"]
+
+    if G.number_of_nodes() > LARGE_GRAPH_THRESHOLD:
+        # شبكات المؤشرات الكبيرة: WebGL + مستويات تفاصيل
+        st.plotly_chart(generate_large_balance_map(G, smoothed), use_container_width=True)
+    else:
+        fig2, ax2 = plt.subplots(figsize=(5,5))
+        pos = nx.spring_layout(G, seed=42)
+        nx.draw_networkx_nodes(
+            G, pos,
+            node_size=[smoothed[n]*5 for n in G.nodes()],
+            node_color="skyblue", ax=ax2
+        )
+        nx.draw_networkx_edges(G, pos, width=[G[u][v].get("weight",1.0) for u,v in G.edges()], ax=ax2)
+        nx.draw_networkx_labels(G, pos, ax=ax2)
+        st.pyplot(fig2)
 
 # ==========================================================
 # 4. تبويب التفسير والتوصيات
@@ -149,9 +194,24 @@ with tabs[3]:
     with st.expander("Show contributions (%)"):
         st.json({k: round(v,2) for k,v in ex["contributions_pct"].items()})
 
-    G2 = graph_from_config()
-    cent = degree_centrality(G2)
-    recs = recommend_for_scores(s_norm, k=3, rules=merge_rules(), centrality=cent)
+    with st.expander("What-if sensitivity"):
+        vary = st.multiselect("Facets to vary", facets, default=facets[:2])
+        step = st.slider("Delta step", 1, 20, 5)
+        span = st.slider("Max delta (±)", step, 50, 20)
+        grid = None
+        if vary:
+            try:
+                grid = delta_grid(facets, np.arange(-span, span + 1, step), vary=vary)
+            except ValueError as e:
+                st.warning(str(e))
+        if grid is not None:
+            res = simulate_whatif(s_norm, grid, facets=facets, indices={"PSI": PSI_WEIGHTS})
+            table = sensitivity_table(res).sort_values("Δ index", ascending=False)
+            st.caption(f"{len(table)} scenarios")
+            st.dataframe(table, use_container_width=True)
+
+    cent = graph_centrality()
+    recs = recommend_for_scores(s_norm, k=3, centrality=cent)
 
     st.markdown("### Recommendations")
     for r in recs:
@@ -188,8 +248,17 @@ with tabs[4]:
         )
         save_plan(sid, "daily", [it.__dict__ for it in day_plan])
         save_plan(sid, "weekly", {day: [it.__dict__ for it in items] for day, items in week_plan.items()})
+        refit_user("demo_user")
         st.success(f"Session {sid} saved!")
 
+    forecast = get_forecast("demo_user")
+    if forecast and forecast["forecast"]:
+        st.markdown("**Projected balance index (next weeks)**")
+        st.line_chart(
+            pd.DataFrame(forecast["forecast"]).set_index("week"),
+            use_container_width=True,
+        )
+
     with st.expander("📂 Show Saved Sessions"):
         sessions = list_sessions(limit=5)
         for s in sessions:
@@ -206,24 +275,24 @@ with tabs[4]:
 # ==========================================================
 with tabs[5]:
     st.subheader("Analyze Your Notes")
-    user_text = st.text_area("اكتب ملاحظاتك أو شعورك الحالي هنا:")
+    user_text = st.text_area(message("ui.text.prompt", UI_LANG))
 
     if st.button("🔍 Analyze Text"):
         analysis = analyze_text(user_text)
         st.json(analysis)
         if analysis["sentiment_score"] > 0:
-            st.success("مزاجك يميل إلى الإيجابية 🌿")
+            st.success(message("ui.text.positive", UI_LANG))
         elif analysis["sentiment_score"] < 0:
-            st.warning("هناك بعض المشاعر السلبية 😔")
+            st.warning(message("ui.text.negative", UI_LANG))
         else:
-            st.info("مزاجك متوازن حاليًا ⚖️")
+            st.info(message("ui.text.neutral", UI_LANG))
 
 # ==========================================================
 # 7. تبويب تحليل الصوت
 # ==========================================================
 with tabs[6]:
     st.subheader("🎙️ Analyze Your Voice")
-    uploaded_audio = st.file_uploader("ارفع تسجيلًا صوتيًا", type=["wav", "mp3"])
+    uploaded_audio = st.file_uploader(message("ui.audio.upload", UI_LANG), type=["wav", "mp3"])
 
     if uploaded_audio is not None:
         with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
@@ -236,11 +305,11 @@ with tabs[6]:
         if "error" not in analysis:
             stress = analysis["stress_index"]
             if stress < 30:
-                st.success("مؤشر التوتر منخفض 🌿")
+                st.success(message("ui.audio.stress_low", UI_LANG))
             elif stress < 70:
-                st.warning("مؤشر التوتر متوسط 😌")
+                st.warning(message("ui.audio.stress_moderate", UI_LANG))
             else:
-                st.error("مؤشر التوتر مرتفع 🧘‍♂️")
+                st.error(message("ui.audio.stress_high", UI_LANG))
 
         os.unlink(tmp_path)
 
@@ -1,69 +1,99 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
 import plotly.graph_objects as go
 import networkx as nx
 import numpy as np
 
-def generate_smart_balance_map(scores: dict):
+from core.utils.io import read_json, write_json
+from core.utils.messages import message
+
+ROOT = Path(__file__).resolve().parents[2]
+LAYOUT_CACHE_DIR = ROOT / "data" / "cache" / "layouts"
+
+# لغة نصوص الخريطة (العناوين والتوصيات) من كتالوج الرسائل
+MAP_LANG = "ar"
+
+# علاقات المؤشرات في الخريطة
+RELATIONS: List[Tuple[str, str]] = [
+    ("الإيمان", "النية"),
+    ("النية", "الأخلاق"),
+    ("الذكر", "العبادة"),
+    ("العلم", "المجتمع"),
+    ("التوازن", "الإيمان"),
+    ("التوازن", "الذكر"),
+    ("التوازن", "الأخلاق"),
+    ("المجتمع", "الأخلاق")
+]
+
+_LAYOUTS: Dict[str, Dict[str, Tuple[float, float]]] = {}
+# هياكل الخرائط كقواميس مُتحقق منها مرة واحدة عند البناء
+_SKELETONS: Dict[str, dict] = {}
+_LOCK = threading.Lock()
+
+# ================================
+# 🔹 مفتاح البنية وتخزين المواقع
+# ================================
+def topology_key(nodes: Sequence[str], edges: Sequence[Tuple[str, str]]) -> str:
+    """بصمة بنية الشبكة (العقد بترتيبها + الحواف) — القيم لا تدخل فيها."""
+    payload = json.dumps(
+        [list(nodes), sorted(sorted(e) for e in edges)], ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+def cached_layout(
+    nodes: Sequence[str],
+    edges: Sequence[Tuple[str, str]],
+    cache_dir: Optional[Path] = None,
+    method: str = "spring"
+) -> Dict[str, Tuple[float, float]]:
     """
-    إنشاء خريطة توازن ديناميكية ذكية متكاملة مع الاستبيان PSI & IEPI.
-    :param scores: قاموس يحتوي على القيم النهائية لكل مؤشر.
-    :return: كائن رسم Plotly تفاعلي جاهز للعرض.
+    مواقع العقد لكل بنية: من الذاكرة، ثم من القرص، وإلا تُحسب مرة واحدة
+    بـ spring_layout (seed ثابت) وتُحفظ — فيبقى الشكل مستقرًا بين العروض.
+    method="spectral" أسرع بكثير للشبكات الكبيرة (آلاف العقد).
     """
+    key = topology_key(nodes, edges) + ("" if method == "spring" else f"-{method}")
+    with _LOCK:
+        pos = _LAYOUTS.get(key)
+    if pos is not None:
+        return pos
+
+    path = Path(cache_dir or LAYOUT_CACHE_DIR) / f"{key}.json"
+    try:
+        stored = read_json(path)
+    except ValueError:  # ملف مكتوب جزئيًا أو تالف: يُعاد حسابه ويُستبدل
+        stored = {}
+    if stored and all(n in stored for n in nodes):
+        pos = {n: (float(stored[n][0]), float(stored[n][1])) for n in nodes}
+    else:
+        G = nx.Graph()
+        G.add_nodes_from(nodes)
+        G.add_edges_from(edges)
+        raw = nx.spectral_layout(G) if method == "spectral" else nx.spring_layout(G, seed=42)
+        pos = {n: (float(raw[n][0]), float(raw[n][1])) for n in nodes}
+        write_json(path, {n: list(xy) for n, xy in pos.items()})
+
+    with _LOCK:
+        _LAYOUTS[key] = pos
+    return pos
+
+# ================================
+# 🔹 هيكل الشكل (يُبنى مرة لكل بنية)
+# ================================
+def build_map_skeleton(nodes: Sequence[str], edges: Sequence[Tuple[str, str]]) -> go.Figure:
+    """
+    الشكل الثابت للخريطة: الحواف ومواقع العقد والتخطيط.
+    القيم والألوان والتوصيات تُضاف لاحقًا عبر update_balance_map.
+    """
+    pos = cached_layout(nodes, edges)
 
-    # ================================
-    # 1. بناء شبكة المؤشرات
-    # ================================
-    G = nx.Graph()
-
-    for indicator, value in scores.items():
-        G.add_node(indicator, value=value)
-
-    relations = [
-        ("الإيمان", "النية"),
-        ("النية", "الأخلاق"),
-        ("الذكر", "العبادة"),
-        ("العلم", "المجتمع"),
-        ("التوازن", "الإيمان"),
-        ("التوازن", "الذكر"),
-        ("التوازن", "الأخلاق"),
-        ("المجتمع", "الأخلاق")
-    ]
-    G.add_edges_from(relations)
-
-    pos = nx.spring_layout(G, seed=42)
-
-    # ================================
-    # 2. إعداد البيانات للرسم
-    # ================================
-    node_x, node_y, node_size, node_color, node_text, recommendations = [], [], [], [], [], []
-
-    for node, attr in G.nodes(data=True):
-        x, y = pos[node]
-        value = attr["value"]
-
-        node_x.append(x)
-        node_y.append(y)
-        node_size.append(max(10, value * 15))  # حجم العقدة حسب القيمة
-        node_color.append(value)
-
-        # النص المعروض عند تمرير الماوس
-        node_text.append(f"{node}: {value:.2f}")
-
-        # توصيات علاجية لكل مؤشر
-        if value >= 7:
-            rec = "⚡ مؤشر قوي: استمر في الممارسات الحالية."
-        elif 4 <= value < 7:
-            rec = "🔄 متوسط: يمكن تحسينه بالتركيز والمثابرة."
-        else:
-            rec = "🚨 ضعيف: يوصى بالتأمل والتدريب العميق."
-        recommendations.append(rec)
-
-    # ================================
-    # 3. رسم الحواف (العلاقات)
-    # ================================
     edge_x, edge_y = [], []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
+    for u, v in edges:
+        x0, y0 = pos[u]
+        x1, y1 = pos[v]
         edge_x += [x0, x1, None]
         edge_y += [y0, y1, None]
 
@@ -74,57 +104,232 @@ def generate_smart_balance_map(scores: dict):
         mode="lines"
     )
 
-    # ================================
-    # 4. رسم العقد
-    # ================================
     node_trace = go.Scatter(
-        x=node_x, y=node_y,
+        x=[pos[n][0] for n in nodes], y=[pos[n][1] for n in nodes],
+        customdata=list(nodes),
         mode="markers+text",
-        text=node_text,
         textposition="top center",
         hoverinfo="text",
         marker=dict(
             showscale=True,
             colorscale="RdYlGn",  # 🔵 ألوان من الأحمر (ضعيف) إلى الأخضر (قوي)
-            color=node_color,
-            size=node_size,
             colorbar=dict(
                 thickness=15,
-                title="مستوى المؤشر",
-                xanchor="left",
-                titleside="right"
+                title=dict(text=message("balance_map.colorbar", MAP_LANG), side="right"),
+                xanchor="left"
             )
         )
     )
 
-    # ================================
-    # 5. إضافة التوصيات الجانبية
-    # ================================
-    annotations = []
-    for i, node in enumerate(G.nodes()):
-        annotations.append(dict(
-            x=1.15,
-            y=1 - (i * 0.08),
-            xref="paper",
-            yref="paper",
-            text=f"{node}: {recommendations[i]}",
-            showarrow=False,
-            font=dict(size=12, color="black")
-        ))
-
-    # ================================
-    # 6. الشكل النهائي
-    # ================================
-    fig = go.Figure(data=[edge_trace, node_trace],
-                    layout=go.Layout(
-                        title="🌿 خريطة التوازن الديناميكية الذكية",
-                        title_x=0.5,
-                        showlegend=False,
-                        hovermode="closest",
-                        margin=dict(b=0, l=0, r=250, t=50),
-                        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                        annotations=annotations
-                    ))
+    return go.Figure(data=[edge_trace, node_trace],
+                     layout=go.Layout(
+                         title=message("balance_map.title", MAP_LANG),
+                         title_x=0.5,
+                         showlegend=False,
+                         hovermode="closest",
+                         margin=dict(b=0, l=0, r=250, t=50),
+                         xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+                         yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+                         uirevision=topology_key(nodes, edges)
+                     ))
+
+def _recommendation(value: float, lang: str = MAP_LANG) -> str:
+    """توصيات علاجية لكل مؤشر"""
+    if value >= 7:
+        return message("balance_map.strong", lang)
+    elif 4 <= value < 7:
+        return message("balance_map.moderate", lang)
+    else:
+        return message("balance_map.weak", lang)
+
+def update_balance_map(fig: go.Figure, scores: dict) -> go.Figure:
+    """
+    يحدّث القيم فقط في شكل قائم (لون/حجم/نص العقد والتوصيات الجانبية)
+    دون إعادة حساب المواقع أو بناء الحواف.
+    """
+    node_trace = fig.data[1]
+    nodes = node_trace.customdata if node_trace.customdata is not None else []
+    values = np.array([float(scores[n]) for n in nodes])
+
+    with fig.batch_update():
+        node_trace.marker.color = values
+        node_trace.marker.size = np.maximum(10, values * 15)  # حجم العقدة حسب القيمة
+        node_trace.text = [f"{n}: {v:.2f}" for n, v in zip(nodes, values)]
+        fig.layout.annotations = [
+            dict(
+                x=1.15,
+                y=1 - (i * 0.08),
+                xref="paper",
+                yref="paper",
+                text=f"{n}: {_recommendation(v)}",
+                showarrow=False,
+                font=dict(size=12, color="black")
+            )
+            for i, (n, v) in enumerate(zip(nodes, values))
+        ]
+    return fig
+
+def generate_smart_balance_map(scores: dict):
+    """
+    إنشاء خريطة توازن ديناميكية ذكية متكاملة مع الاستبيان PSI & IEPI.
+    :param scores: قاموس يحتوي على القيم النهائية لكل مؤشر.
+    :return: كائن رسم Plotly تفاعلي جاهز للعرض.
+    الهيكل (المواقع والحواف) يُبنى مرة لكل بنية، وكل استدعاء يرقّع القيم فقط.
+    """
+    nodes = list(scores.keys())
+    present = set(nodes)
+    edges = [(u, v) for u, v in RELATIONS if u in present and v in present]
+    key = topology_key(nodes, edges)
+
+    with _LOCK:
+        skeleton = _SKELETONS.get(key)
+    if skeleton is None:
+        skeleton = build_map_skeleton(nodes, edges).to_dict()
+        with _LOCK:
+            _SKELETONS[key] = skeleton
+
+    # الهيكل تُحقق منه عند بنائه: نسخة بلا إعادة تحقق، ثم update_balance_map
+    # يتحقق من الخصائص المتغيرة فقط
+    return update_balance_map(go.Figure(skeleton, _validate=False), scores)
+
+# ================================
+# 🔹 وضع الشبكات الكبيرة (WebGL)
+# ================================
+LARGE_GRAPH_THRESHOLD = 500
+
+def edge_segments(xy: np.ndarray, u: np.ndarray, v: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    إحداثيات الحواف كمصفوفات float32 مدمجة: (x_u, x_v, NaN) لكل حافة،
+    حيث NaN يفصل المقاطع بدل None (يُرسل كمصفوفة ثنائية للمتصفح).
+    """
+    seg = np.full((u.size, 3, 2), np.nan, dtype=np.float32)
+    seg[:, 0] = xy[u]
+    seg[:, 1] = xy[v]
+    return seg[:, :, 0].ravel(), seg[:, :, 1].ravel()
+
+def bundle_edges(
+    xy: np.ndarray,
+    u: np.ndarray,
+    v: np.ndarray,
+    w: np.ndarray,
+    n_bins: int = 12
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    يجمع الحواف بين خلايا شبكة مكانية (n_bins × n_bins) في حزم:
+    كل حزمة خط واحد بين مركزي خليتين وزنه مجموع أوزان حوافها.
+    يرجع (مراكز الخلايا، بداية الحزم، نهايتها، أوزانها).
+    """
+    lo, hi = xy.min(axis=0), xy.max(axis=0)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    cell_xy = np.minimum(((xy - lo) / span * n_bins).astype(np.int64), n_bins - 1)
+    cell = cell_xy[:, 0] * n_bins + cell_xy[:, 1]
+    counts = np.bincount(cell, minlength=n_bins * n_bins)
+    centers = np.zeros((n_bins * n_bins, 2), dtype=np.float32)
+    for d in range(2):
+        centers[:, d] = np.bincount(cell, weights=xy[:, d], minlength=n_bins * n_bins) / np.maximum(counts, 1)
+
+    a, b = cell[u], cell[v]
+    keep = a != b
+    a, b = np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])
+    pair = a * (n_bins * n_bins) + b
+    uniq, inv = np.unique(pair, return_inverse=True)
+    weights = np.bincount(inv, weights=w[keep]).astype(np.float32)
+    return centers, uniq // (n_bins * n_bins), uniq % (n_bins * n_bins), weights
+
+def generate_large_balance_map(
+    G: nx.Graph,
+    values: Dict[str, float],
+    *,
+    max_labels: int = 40,
+    edge_quantile: float = 0.75,
+    n_bins: int = 12,
+    bundle_classes: int = 3
+) -> go.Figure:
+    """
+    خريطة توازن للشبكات الكبيرة (آلاف المؤشرات) بـ Scattergl ومستويات تفاصيل:
+    - العرض العام: حزم الحواف بين المناطق + الحواف القوية فقط (≥ الكمّية edge_quantile)
+      + أسماء أقوى/أضعف max_labels مؤشرًا.
+    - زر "تفاصيل" يُظهر كل الحواف وكل الأسماء عند التكبير.
+    كل المصفوفات float32 فتُرسل بصيغة ثنائية مدمجة.
+    """
+    from core.graph.laplacian import operator_for
+
+    op = operator_for(G)
+    nodes = list(op.nodes)
+    mask = op.rows < op.cols
+    u, v, w = op.rows[mask], op.cols[mask], op.weights[mask]
+
+    method = "spectral" if len(nodes) > LARGE_GRAPH_THRESHOLD else "spring"
+    pos = cached_layout(nodes, list(zip((nodes[i] for i in u), (nodes[j] for j in v))), method=method)
+    xy = np.array([pos[n] for n in nodes], dtype=np.float32).reshape(len(nodes), 2)
+    vals = np.array([float(values.get(n, np.nan)) for n in nodes], dtype=np.float32)
+
+    strong = w >= (np.quantile(w, edge_quantile) if w.size else 0.0)
+    traces: List[go.Scattergl] = []
+
+    # حزم الحواف (خطوط أعرض للحزم الأثقل)
+    centers, ba, bb, bw = bundle_edges(xy, u[~strong], v[~strong], w[~strong], n_bins=n_bins)
+    if bw.size:
+        edges_cls = np.quantile(bw, np.linspace(0, 1, bundle_classes + 1)[1:-1])
+        cls = np.searchsorted(edges_cls, bw, side="right")
+        for c in range(bundle_classes):
+            sel = cls == c
+            if not sel.any():
+                continue
+            bx, by = edge_segments(centers, ba[sel], bb[sel])
+            traces.append(go.Scattergl(
+                x=bx, y=by, mode="lines", hoverinfo="none", name="bundles",
+                line=dict(width=1 + 2 * c, color="rgba(120,120,120,0.35)")
+            ))
+    n_bundle = len(traces)
+
+    sx, sy = edge_segments(xy, u[strong], v[strong])
+    traces.append(go.Scattergl(x=sx, y=sy, mode="lines", hoverinfo="none", name="strong edges",
+                               line=dict(width=1, color="#888")))
+    ax, ay = edge_segments(xy, u[~strong], v[~strong])
+    traces.append(go.Scattergl(x=ax, y=ay, mode="lines", hoverinfo="none", name="weak edges",
+                               visible=False, line=dict(width=0.5, color="#bbb")))
+
+    traces.append(go.Scattergl(
+        x=xy[:, 0], y=xy[:, 1], mode="markers",
+        hovertext=[f"{n}: {val:.2f}" for n, val in zip(nodes, vals)], hoverinfo="text",
+        marker=dict(
+            color=vals, colorscale="RdYlGn", size=6, showscale=True,
+            colorbar=dict(thickness=15, title=dict(text=message("balance_map.colorbar", MAP_LANG), side="right"))
+        )
+    ))
+
+    # أسماء الأطراف فقط في العرض العام: الأقوى والأضعف
+    finite = np.flatnonzero(np.isfinite(vals))
+    order = finite[np.argsort(vals[finite], kind="stable")]
+    half = max(1, max_labels // 2)
+    label_idx = np.unique(np.concatenate([order[:half], order[-half:]])) if order.size else order
+    traces.append(go.Scattergl(
+        x=xy[label_idx, 0], y=xy[label_idx, 1], mode="text", hoverinfo="none",
+        text=[nodes[i] for i in label_idx], textposition="top center", name="labels"
+    ))
+    traces.append(go.Scattergl(
+        x=xy[:, 0], y=xy[:, 1], mode="text", hoverinfo="none", visible=False,
+        text=nodes, textposition="top center", name="all labels"
+    ))
 
+    overview = [True] * n_bundle + [True, False, True, True, False]
+    detail = [False] * n_bundle + [True, True, True, False, True]
+    fig = go.Figure(data=traces, layout=go.Layout(
+        title=message("balance_map.title", MAP_LANG),
+        title_x=0.5,
+        showlegend=False,
+        hovermode="closest",
+        margin=dict(b=0, l=0, r=0, t=50),
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        uirevision=topology_key(nodes, []),
+        updatemenus=[dict(
+            type="buttons", direction="right", x=0.0, y=1.08, xanchor="left",
+            buttons=[
+                dict(label=message("balance_map.overview", MAP_LANG), method="restyle", args=[{"visible": overview}]),
+                dict(label=message("balance_map.detail", MAP_LANG), method="restyle", args=[{"visible": detail}]),
+            ],
+        )],
+    ))
     return fig
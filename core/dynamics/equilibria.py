@@ -0,0 +1,319 @@
+# core/dynamics/equilibria.py
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+import hashlib
+import json
+import threading
+import numpy as np
+import pandas as pd
+
+from core.utils.io import ensure_dir
+from .simulators import ROOT
+
+# ============================================================
+# 🔹 نقاط الاتزان واستقرارها لـ simple_emotion_model
+#    dx/dt = a·x − b·y − c·x³ ,  dy/dt = d·x − e·y
+# من dy/dt = 0: y = d·x/e ، فتصبح dx/dt = x·(μ − c·x²) حيث μ = a − b·d/e:
+#   - الأصل (0, 0) دائمًا.
+#   - ±√(μ/c) عندما μ/c > 0 (تفرّع مذراة عند μ = 0).
+# ============================================================
+
+PARAMS = ("a", "b", "c", "d", "e")
+SLOTS = ("origin", "positive", "negative")
+KINDS = (
+    "saddle",
+    "stable node",
+    "unstable node",
+    "stable spiral",
+    "unstable spiral",
+    "center",
+    "degenerate",
+)
+ATLAS_CACHE_DIR = ROOT / "data" / "cache" / "atlas"
+# نسخة منطق التصنيف وحل الجذور والتفرعات: تُرفع عند أي تغيير يغيّر الأطلس فتُهمل ملفات npz القديمة
+ATLAS_CACHE_VERSION = 1
+
+# الفئة الطوبولوجية لكل نوع: سرج، مستقر، غير مستقر، غير زائدي (تغيّرها = تفرّع)
+_TOPOLOGY = np.array([0, 1, 2, 1, 2, 3, 3], dtype=np.int16)
+
+# المحاور تمر بالقيم الافتراضية للنموذج (0.8, 0.9, 0.2, 0.6, 1.0)
+DEFAULT_AXES: Dict[str, np.ndarray] = {
+    "a": np.round(np.linspace(-1.0, 2.0, 31), 6),
+    "b": np.round(np.linspace(0.1, 2.1, 11), 6),
+    "c": np.round(np.linspace(0.1, 1.0, 10), 6),
+    "d": np.round(np.linspace(0.0, 2.0, 11), 6),
+    "e": np.round(np.linspace(0.2, 2.0, 10), 6),
+}
+
+_TOL = 1e-9
+
+def _params(a, b, c, d, e):
+    return np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c, d, e)))
+
+def pitchfork_margin(a, b, c, d, e) -> np.ndarray:
+    """μ = a − b·d/e: يتغيّر عدد نقاط الاتزان (1 ↔ 3) عند عبور الصفر."""
+    a, b, c, d, e = _params(a, b, c, d, e)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return a - b * d / e
+
+def equilibria(a, b, c, d, e) -> Dict[str, np.ndarray]:
+    """
+    كل نقاط الاتزان لأي شبكة معاملات (مصفوفات قابلة للبث) دفعة واحدة.
+    يرجع x, y, exists بشكل (...شكل الشبكة, 3) بترتيب SLOTS.
+    e = 0 (نموذج منحلّ) يُبقي الأصل فقط.
+    """
+    a, b, c, d, e = _params(a, b, c, d, e)
+    mu = pitchfork_margin(a, b, c, d, e)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where((e != 0) & (c != 0), mu / c, np.nan)
+        outer = r2 > _TOL
+        r = np.sqrt(np.where(outer, r2, 0.0))
+        slope = np.where(e != 0, d / e, 0.0)
+    x = np.stack([np.zeros_like(r), r, -r], axis=-1)
+    exists = np.stack([np.ones_like(outer), outer, outer], axis=-1)
+    x = np.where(exists, x, np.nan)
+    return {"x": x, "y": slope[..., None] * x, "exists": exists}
+
+def jacobian(x, a, b, c, d, e) -> np.ndarray:
+    """اليعقوبي التحليلي [[a − 3c·x², −b], [d, −e]] بشكل (..., 2, 2)."""
+    x, a, b, c, d, e = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x, a, b, c, d, e)))
+    return np.stack([
+        np.stack([a - 3 * c * x ** 2, -b], axis=-1),
+        np.stack([d, -e], axis=-1),
+    ], axis=-2)
+
+def classify(trace: np.ndarray, det: np.ndarray, tol: float = _TOL) -> np.ndarray:
+    """رمز نوع نقطة الاتزان (فهرس في KINDS) من الأثر والمحدد (int8)."""
+    trace = np.asarray(trace, dtype=float)
+    det = np.asarray(det, dtype=float)
+    disc = trace ** 2 - 4 * det
+    stable = trace < -tol
+    unstable = trace > tol
+    return np.select(
+        [
+            np.abs(det) <= tol,
+            det < 0,
+            (disc >= 0) & stable,
+            (disc >= 0) & unstable,
+            (disc < 0) & stable,
+            (disc < 0) & unstable,
+        ],
+        [6, 0, 1, 2, 3, 4],
+        default=5,
+    ).astype(np.int8)
+
+def stability(a, b, c, d, e) -> Dict[str, np.ndarray]:
+    """
+    نقاط الاتزان مع قيمها الذاتية ونوعها لكل نقطة في الشبكة.
+    المفاتيح: x, y, exists, kind (int8، −1 للغائب), eig_re, eig_im بشكل (..., 3, 2).
+    """
+    a, b, c, d, e = _params(a, b, c, d, e)
+    eq = equilibria(a, b, c, d, e)
+    x = eq["x"]
+    exp = [v[..., None] for v in (a, b, c, d, e)]
+    trace = exp[0] - 3 * exp[2] * x ** 2 - exp[4]
+    det = -(exp[0] - 3 * exp[2] * x ** 2) * exp[4] + exp[1] * exp[3]
+    disc = trace ** 2 - 4 * det
+    root = np.sqrt(np.abs(disc)) / 2
+    real = disc >= 0
+    eig_re = np.stack([trace / 2 + np.where(real, root, 0.0), trace / 2 - np.where(real, root, 0.0)], axis=-1)
+    eig_im = np.stack([np.where(real, 0.0, root), np.where(real, 0.0, -root)], axis=-1)
+    kind = np.where(eq["exists"], classify(trace, det), -1).astype(np.int8)
+    return {**eq, "kind": kind, "eig_re": eig_re, "eig_im": eig_im, "trace": trace, "det": det}
+
+def hopf_margins(a, b, c, d, e) -> Dict[str, np.ndarray]:
+    """
+    هامش هوبف لكل فرع (أثر اليعقوبي حيث المحدد موجب):
+    - الأصل: a − e (ذو صلة عندما μ < 0).
+    - الفرعان الخارجيان: a − 3μ − e (ذو صلة عندما μ > 0).
+    NaN حيث لا يمكن حدوث هوبف على الفرع.
+    """
+    a, b, c, d, e = _params(a, b, c, d, e)
+    mu = pitchfork_margin(a, b, c, d, e)
+    return {
+        "origin": np.where(-e * mu > _TOL, a - e, np.nan),
+        "outer": np.where(e * mu > _TOL, a - 3 * mu - e, np.nan),
+    }
+
+def boundary_mask(kind: np.ndarray) -> np.ndarray:
+    """
+    خلايا الشبكة المجاورة لحدّ تفرّع: يتغيّر فيها عدد نقاط الاتزان أو استقرار إحداها
+    (سرج/مستقر/غير مستقر/غير زائدي) بين الخلية وجارتها على أي محور معامل.
+    تحوّل عقدة ↔ حلزون بنفس الاستقرار ليس تفرّعًا.
+    """
+    topo = np.where(kind >= 0, _TOPOLOGY[np.clip(kind, 0, None)] + 1, 0)
+    signature = (topo * np.array([1, 5, 25], dtype=np.int16)).sum(axis=-1)
+    mask = np.zeros(signature.shape, dtype=bool)
+    for axis in range(signature.ndim):
+        if signature.shape[axis] < 2:
+            continue
+        change = np.diff(signature, axis=axis) != 0
+        lo = [slice(None)] * signature.ndim
+        hi = [slice(None)] * signature.ndim
+        lo[axis] = slice(None, -1)
+        hi[axis] = slice(1, None)
+        mask[tuple(lo)] |= change
+        mask[tuple(hi)] |= change
+    return mask
+
+# ============================================================
+# 🔹 أطلس الاستقرار (جدول بحث مسبق الحساب)
+# ============================================================
+
+@dataclass(frozen=True)
+class EquilibriumAtlas:
+    """
+    جدول نقاط الاتزان على شبكة المعاملات a…e (المحاور بترتيب PARAMS):
+    x, y, eig_re, eig_im بدقة float32، kind (int8) و boundary (حدود التفرّع).
+    الاستعلام عن أقرب نقطة شبكة فوري دون أي تكامل.
+    """
+    axes: Mapping[str, np.ndarray]
+    x: np.ndarray
+    y: np.ndarray
+    kind: np.ndarray
+    eig_re: np.ndarray
+    eig_im: np.ndarray
+    boundary: np.ndarray
+
+    @property
+    def n_equilibria(self) -> np.ndarray:
+        return (self.kind >= 0).sum(axis=-1)
+
+    def nearest_index(self, **params: float) -> tuple:
+        missing = set(PARAMS) - set(params)
+        if missing:
+            raise ValueError(f"Missing model parameters: {sorted(missing)}")
+        return tuple(int(np.abs(self.axes[p] - float(params[p])).argmin()) for p in PARAMS)
+
+    def query(self, **params: float) -> Dict[str, Any]:
+        """
+        نقاط الاتزان عند أقرب نقطة شبكة للمعاملات المعطاة:
+        {"params": المعاملات المستخدمة فعلًا، "near_boundary", "equilibria": [...]}.
+        """
+        idx = self.nearest_index(**params)
+        points = []
+        for s, slot in enumerate(SLOTS):
+            k = int(self.kind[idx + (s,)])
+            if k < 0:
+                continue
+            points.append({
+                "slot": slot,
+                "x": float(self.x[idx + (s,)]),
+                "y": float(self.y[idx + (s,)]),
+                "kind": KINDS[k],
+                "eigenvalues": [
+                    complex(float(self.eig_re[idx + (s, i)]), float(self.eig_im[idx + (s, i)]))
+                    for i in range(2)
+                ],
+            })
+        return {
+            "params": {p: float(self.axes[p][i]) for p, i in zip(PARAMS, idx)},
+            "near_boundary": bool(self.boundary[idx]),
+            "equilibria": points,
+        }
+
+    def slice(self, axis: str, **fixed: float) -> pd.DataFrame:
+        """
+        مخطط تفرّع: نقاط الاتزان على طول معامل واحد مع تثبيت البقية عند أقرب قيم.
+        صف لكل (قيمة المعامل، نقطة اتزان موجودة).
+        """
+        base = {p: fixed.get(p, float(self.axes[p][len(self.axes[p]) // 2])) for p in PARAMS}
+        idx = list(self.nearest_index(**base))
+        k = PARAMS.index(axis)
+        idx[k] = slice(None)
+        idx = tuple(idx)
+        kind = self.kind[idx]
+        rows, slots = np.nonzero(kind >= 0)
+        return pd.DataFrame({
+            axis: self.axes[axis][rows],
+            "slot": np.asarray(SLOTS)[slots],
+            "x": self.x[idx][rows, slots],
+            "y": self.y[idx][rows, slots],
+            "kind": np.asarray(KINDS)[kind[rows, slots]],
+            "boundary": self.boundary[idx][rows],
+        })
+
+    def save(self, path: Path) -> Path:
+        ensure_dir(path.parent)
+        np.savez_compressed(
+            path,
+            **{f"axis_{p}": self.axes[p] for p in PARAMS},
+            x=self.x, y=self.y, kind=self.kind,
+            eig_re=self.eig_re, eig_im=self.eig_im, boundary=self.boundary,
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "EquilibriumAtlas":
+        with np.load(path) as z:
+            return cls(
+                axes={p: z[f"axis_{p}"] for p in PARAMS},
+                x=z["x"], y=z["y"], kind=z["kind"],
+                eig_re=z["eig_re"], eig_im=z["eig_im"], boundary=z["boundary"],
+            )
+
+def build_atlas(axes: Optional[Mapping[str, Sequence[float]]] = None) -> EquilibriumAtlas:
+    """يحسب الأطلس على حاصل ضرب المحاور (حساب تحليلي متجه بالكامل)."""
+    axes = {p: np.asarray((axes or {}).get(p, DEFAULT_AXES[p]), dtype=float) for p in PARAMS}
+    grids = np.meshgrid(*(axes[p] for p in PARAMS), indexing="ij")
+    res = stability(*grids)
+    return EquilibriumAtlas(
+        axes=axes,
+        x=res["x"].astype(np.float32),
+        y=res["y"].astype(np.float32),
+        kind=res["kind"],
+        eig_re=res["eig_re"].astype(np.float32),
+        eig_im=res["eig_im"].astype(np.float32),
+        boundary=boundary_mask(res["kind"]),
+    )
+
+def atlas_key(axes: Mapping[str, Sequence[float]]) -> str:
+    """بصمة المحاور + ATLAS_CACHE_VERSION (اسم ملف الأطلس على القرص)."""
+    payload = json.dumps(
+        {"version": ATLAS_CACHE_VERSION, "axes": {p: [float(v) for v in axes[p]] for p in PARAMS}},
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+_ATLASES: Dict[str, EquilibriumAtlas] = {}
+_LOCK = threading.Lock()
+
+def load_atlas(
+    axes: Optional[Mapping[str, Sequence[float]]] = None,
+    cache_dir: Optional[Path] = None
+) -> EquilibriumAtlas:
+    """
+    الأطلس من الذاكرة، ثم من ملف npz مفتاحه بصمة المحاور ونسخة المنطق، وإلا يُبنى ويُحفظ.
+    """
+    axes = {p: np.asarray((axes or {}).get(p, DEFAULT_AXES[p]), dtype=float) for p in PARAMS}
+    key = atlas_key(axes)
+    with _LOCK:
+        atlas = _ATLASES.get(key)
+        if atlas is None:
+            path = Path(cache_dir or ATLAS_CACHE_DIR) / f"emotion_atlas.{key}.npz"
+            if path.exists():
+                atlas = EquilibriumAtlas.load(path)
+            else:
+                atlas = build_atlas(axes)
+                atlas.save(path)
+            _ATLASES[key] = atlas
+        return atlas
+
+def equilibria_table(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """صفوف عرض بسيطة من نتيجة query (القيم الذاتية كنص)."""
+    return [
+        {
+            "slot": p["slot"],
+            "x": round(p["x"], 4),
+            "y": round(p["y"], 4),
+            "kind": p["kind"],
+            "eigenvalues": ", ".join(f"{z.real:.3f}{z.imag:+.3f}i" for z in p["eigenvalues"]),
+        }
+        for p in result["equilibria"]
+    ]
+
+if __name__ == "__main__":
+    atlas = load_atlas()
+    print(f"✅ Atlas ready: {atlas.kind.shape[:-1]} grid, {int(atlas.boundary.sum())} boundary cells")
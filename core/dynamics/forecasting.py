@@ -0,0 +1,280 @@
+# core/dynamics/forecasting.py
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+import os
+import numpy as np
+
+from core.storage.repository import (
+    get_forecast,
+    iter_sessions,
+    list_user_sessions,
+    save_forecasts,
+)
+
+# ============================================================
+# 🔹 توقع مؤشر التوازن أسبوعيًا (تنعيم هولت الأسي بترند مخمَّد)
+#    المستوى: l_t = α·y_t + (1−α)·(l_{t−1} + b_{t−1})
+#    الترند:  b_t = β·(l_t − l_{t−1}) + (1−β)·b_{t−1}
+#    التوقع بعد h أسبوع: l + b·(φ + φ² + … + φʰ)
+# السلسلة = متوسط الجلسات في كل أسبوع (يبدأ الاثنين)، والأسابيع الفارغة تحمل آخر قيمة.
+# ============================================================
+
+DEFAULTS = {"alpha": 0.5, "beta": 0.2, "damping": 0.9}
+
+def week_index(created_at: Any) -> np.ndarray:
+    """رقم الأسبوع (يبدأ الاثنين) من طوابع SQLite 'YYYY-MM-DD HH:MM:SS' أو تواريخ."""
+    days = np.array([str(c)[:10] for c in np.atleast_1d(created_at)], dtype="datetime64[D]")
+    return (days.astype(np.int64) + 3) // 7
+
+def utc_today() -> date:
+    """تاريخ اليوم بتوقيت UTC، كطوابع created_at (CURRENT_TIMESTAMP في SQLite)."""
+    return datetime.now(timezone.utc).date()
+
+def week_start(week: int) -> str:
+    return str(np.datetime64(int(week) * 7 - 3, "D"))
+
+def _holt_step(level, trend, y, alpha: float, beta: float) -> Tuple[np.ndarray, np.ndarray]:
+    """خطوة واحدة لكل المستخدمين؛ المستوى NaN = لم تبدأ السلسلة بعد، و y NaN = لا تغيير."""
+    level = np.asarray(level, dtype=float)
+    trend = np.asarray(trend, dtype=float)
+    y = np.asarray(y, dtype=float)
+    fresh = np.isnan(level)
+    new_level = np.where(fresh, y, alpha * y + (1 - alpha) * (level + trend))
+    new_trend = np.where(fresh, 0.0, beta * (new_level - level) + (1 - beta) * trend)
+    started = ~np.isnan(y)
+    return np.where(started, new_level, level), np.where(started, new_trend, trend)
+
+def project(level, trend, horizon: int, damping: float) -> np.ndarray:
+    """مسار التوقع (مستخدمين × horizon) مقيّدًا بين 0 و 100."""
+    factors = np.cumsum(damping ** np.arange(1, horizon + 1))
+    out = np.atleast_1d(level)[:, None] + np.atleast_1d(trend)[:, None] * factors
+    return np.round(np.clip(out, 0.0, 100.0), 2)
+
+def _none(x: float) -> Optional[float]:
+    return None if np.isnan(x) else float(x)
+
+def _row(user_id, last_id, state: Dict[str, Any], horizon: int) -> Dict[str, Any]:
+    path = project(state["level"], state["trend"], horizon, state["damping"])[0]
+    as_of = state["pending_week"]
+    return {
+        "user_id": user_id,
+        "last_session_id": int(last_id),
+        "state": state,
+        "forecast": [
+            {"week": week_start(as_of + h), "balance_index": float(v)}
+            for h, v in enumerate(path, start=1)
+        ],
+    }
+
+# ============================================================
+# 🔹 الملاءمة الدفعية (مصفوفة مستخدمين × أسابيع)
+# ============================================================
+
+def fit_users(
+    users: List[Tuple[str, np.ndarray, np.ndarray, int]],
+    as_of_week: int,
+    *,
+    horizon: int = 4,
+    active_weeks: int = 12,
+    history_weeks: int = 104,
+    alpha: float = DEFAULTS["alpha"],
+    beta: float = DEFAULTS["beta"],
+    damping: float = DEFAULTS["damping"]
+) -> List[Dict[str, Any]]:
+    """
+    يلائم دفعة مستخدمين معًا: users = [(user_id, أسابيع الجلسات، قيمها، آخر معرّف)].
+    المستخدم غير النشط (لا جلسات في آخر active_weeks) يُتجاهل.
+    الأسابيع الأقدم من history_weeks لا تدخل في الملاءمة، ومن ليس له جلسة داخلها
+    يُتجاهل أيضًا (وإلا كانت حالته كلها NaN).
+    """
+    w0 = as_of_week - history_weeks + 1
+    since = max(as_of_week - active_weeks + 1, w0)
+    users = [u for u in users if len(u[1]) and u[1].max() >= since]
+    if not users:
+        return []
+    n_weeks = history_weeks
+    sums = np.zeros((len(users), n_weeks))
+    counts = np.zeros((len(users), n_weeks))
+    for i, (_, weeks, values, _) in enumerate(users):
+        keep = weeks >= w0
+        cols = np.minimum(weeks[keep], as_of_week) - w0
+        np.add.at(sums[i], cols, values[keep])
+        np.add.at(counts[i], cols, 1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        Y = np.where(counts > 0, sums / counts, np.nan)
+    # حمل آخر قيمة معروفة إلى الأسابيع الفارغة (تبقى NaN قبل أول جلسة)
+    idx = np.where(counts > 0, np.arange(n_weeks), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    Y = Y[np.arange(len(users))[:, None], idx]
+
+    level = np.full(len(users), np.nan)
+    trend = np.zeros(len(users))
+    for t in range(n_weeks - 1):
+        level, trend = _holt_step(level, trend, Y[:, t], alpha, beta)
+    final_level, final_trend = _holt_step(level, trend, Y[:, -1], alpha, beta)
+
+    rows = []
+    for i, (user_id, _, _, last_id) in enumerate(users):
+        state = {
+            "alpha": alpha, "beta": beta, "damping": damping,
+            "base_level": _none(level[i]),
+            "base_trend": float(trend[i]),
+            "pending_week": int(as_of_week),
+            "pending_mean": float(Y[i, -1]),
+            "pending_count": int(counts[i, -1]),
+            "level": float(final_level[i]),
+            "trend": float(final_trend[i]),
+        }
+        rows.append(_row(user_id, last_id, state, horizon))
+    return rows
+
+def _group_users(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[Tuple[str, np.ndarray, np.ndarray, int]]:
+    """يجمع الجلسات المرتبة حسب المستخدم إلى (user_id, أسابيع، قيم، آخر معرّف)."""
+    current, rows = None, []
+    for chunk in chunks:
+        for s in chunk:
+            if s["user_id"] != current and rows:
+                yield _user_series(current, rows)
+                rows = []
+            current = s["user_id"]
+            rows.append(s)
+    if rows:
+        yield _user_series(current, rows)
+
+def _user_series(user_id: str, sessions: List[Dict[str, Any]]) -> Tuple[str, np.ndarray, np.ndarray, int]:
+    weeks = week_index([s["created_at"] for s in sessions])
+    values = np.array([float(s["balance_index"] or 0.0) for s in sessions])
+    return user_id, weeks, values, max(int(s["id"]) for s in sessions)
+
+def _fit_chunk(args) -> List[Dict[str, Any]]:
+    users, as_of_week, params = args
+    return fit_users(users, as_of_week, **params)
+
+def run_forecast_job(
+    *,
+    as_of: Optional[date] = None,
+    horizon: int = 4,
+    active_weeks: int = 12,
+    users_per_chunk: int = 2000,
+    n_jobs: Optional[int] = None,
+    chunk_size: int = 5000,
+    **params: float
+) -> int:
+    """
+    المهمة الليلية: تمرّ على كل الجلسات مرتبة حسب المستخدم، تجمع المستخدمين في دفعات
+    وتلائمها على مجمّع عمليات (n_jobs=1 في نفس العملية)، ثم تحفظ التوقعات بـ executemany.
+    يرجع عدد المستخدمين الذين حُدّثت توقعاتهم.
+    """
+    as_of_week = int(week_index(as_of or utc_today())[0])
+    fit_params = {"horizon": horizon, "active_weeks": active_weeks, **params}
+
+    def batches():
+        batch = []
+        for user in _group_users(iter_sessions(chunk_size, by_user=True)):
+            batch.append(user)
+            if len(batch) >= users_per_chunk:
+                yield batch, as_of_week, fit_params
+                batch = []
+        if batch:
+            yield batch, as_of_week, fit_params
+
+    written = 0
+    if n_jobs == 1:
+        for args in batches():
+            rows = _fit_chunk(args)
+            save_forecasts(rows)
+            written += len(rows)
+        return written
+
+    # نافذة محدودة من الدفعات قيد التنفيذ: القراءة من القاعدة تتقدم بقدر ما يُحفظ فقط
+    max_inflight = 2 * (n_jobs or os.cpu_count() or 1)
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        for args in batches():
+            pending.append(pool.submit(_fit_chunk, args))
+            while len(pending) >= max_inflight or (pending and pending[0].done()):
+                rows = pending.popleft().result()
+                save_forecasts(rows)
+                written += len(rows)
+        while pending:
+            rows = pending.popleft().result()
+            save_forecasts(rows)
+            written += len(rows)
+    return written
+
+# ============================================================
+# 🔹 إعادة الملاءمة التراكمية لمستخدم واحد
+# ============================================================
+
+def _observe(state: Dict[str, Any], week: int, value: float) -> Dict[str, Any]:
+    """يضيف جلسة: أسبوع لاحق يطوي الأسبوع المعلّق (والأسابيع الفارغة بينهما) في المستوى."""
+    state = dict(state)
+    week = max(int(week), state["pending_week"])
+    if week > state["pending_week"]:
+        state = _advance(state, week)
+    n = state["pending_count"]
+    state["pending_mean"] = value if n == 0 else (state["pending_mean"] * n + value) / (n + 1)
+    state["pending_count"] = n + 1
+    return _finalize(state)
+
+def _advance(state: Dict[str, Any], week: int) -> Dict[str, Any]:
+    """ينقل الأسبوع المعلّق إلى week مع حمل آخر قيمة عبر الأسابيع الفارغة."""
+    state = dict(state)
+    level = np.nan if state["base_level"] is None else state["base_level"]
+    trend = state["base_trend"]
+    for _ in range(state["pending_week"], int(week)):
+        level, trend = _holt_step(level, trend, state["pending_mean"], state["alpha"], state["beta"])
+    if int(week) > state["pending_week"]:
+        state.update(base_level=_none(float(level)), base_trend=float(trend),
+                     pending_week=int(week), pending_count=0)
+    return _finalize(state)
+
+def _finalize(state: Dict[str, Any]) -> Dict[str, Any]:
+    base = np.nan if state["base_level"] is None else state["base_level"]
+    level, trend = _holt_step(base, state["base_trend"], state["pending_mean"], state["alpha"], state["beta"])
+    state["level"], state["trend"] = float(level), float(trend)
+    return state
+
+def refit_user(
+    user_id: str,
+    *,
+    as_of: Optional[date] = None,
+    horizon: int = 4,
+    **params: float
+) -> Optional[Dict[str, Any]]:
+    """
+    يحدّث توقع مستخدم واحد بعد حفظ جلسة: يقرأ الجلسات الأحدث من آخر معرّف ملاءم فقط
+    ويطويها في حالة التنعيم المحفوظة (ملاءمة كاملة لسجله إن لم تكن له حالة بعد،
+    أو إن اختلفت params عن معاملات الحالة المحفوظة، كـ alpha مختلفة أو history_weeks).
+    """
+    as_of_week = int(week_index(as_of or utc_today())[0])
+    stored = get_forecast(user_id)
+    if (
+        stored is None
+        or not stored["state"]
+        or any(stored["state"].get(k) != v for k, v in params.items())
+    ):
+        sessions = list_user_sessions(user_id)
+        if not sessions:
+            return None
+        rows = fit_users([_user_series(user_id, sessions)], as_of_week,
+                         horizon=horizon, active_weeks=10**6, **params)
+        if not rows:  # كل الجلسات أقدم من history_weeks: لا حالة تُحفظ
+            return None
+    else:
+        state, last_id = stored["state"], stored["last_session_id"]
+        new = list_user_sessions(user_id, after_id=last_id)
+        for s, week in zip(new, week_index([s["created_at"] for s in new]) if new else []):
+            state = _observe(state, week, float(s["balance_index"] or 0.0))
+            last_id = max(last_id, int(s["id"]))
+        state = _advance(state, as_of_week)
+        rows = [_row(user_id, last_id, state, horizon)]
+    save_forecasts(rows)
+    return rows[0]
+
+if __name__ == "__main__":
+    print(f"✅ Forecasts updated for {run_forecast_job()} users")
@@ -0,0 +1,247 @@
+# core/dynamics/markov.py
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+import threading
+import numpy as np
+import scipy.sparse as sp
+
+from core.features.scoring import IEPI_WEIGHTS, PSI_WEIGHTS
+from core.storage.repository import iter_sessions
+from core.utils.io import read_json, write_json
+from .simulators import ROOT, STATES, state_codes
+
+MARKOV_MODEL_PATH = ROOT / "data" / "cache" / "markov_transitions.json"
+
+# ============================================================
+# 🔹 تحويل الجلسات إلى حالات
+# ============================================================
+
+def _weighted(sessions: List[Dict[str, Any]], weights: Dict[str, float]) -> np.ndarray:
+    """
+    المؤشر المرجح من الأبعاد المتوفرة في كل جلسة (مفاتيح بأي حالة أحرف)،
+    و NaN إذا لم يتوفر أي بُعد من أبعاد المؤشر.
+    """
+    keys = list(weights)
+    w = np.array([weights[k] for k in keys], dtype=float)
+    lowered = [{k.lower(): v for k, v in s["scores"].items()} for s in sessions]
+    S = np.array(
+        [[float(scores.get(k, np.nan)) for k in keys] for scores in lowered],
+        dtype=float,
+    ).reshape(len(sessions), len(keys))
+    present = ~np.isnan(S)
+    den = present @ w
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, np.nan_to_num(np.clip(S, 0, 100)) @ w / den, np.nan)
+
+def session_states(sessions: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    رمز الحالة (فهرس في STATES) لكل جلسة بنفس منطق _get_state:
+    PSI و IEPI من أبعاد الجلسة إن وُجدت، وإلا مؤشر التوازن المخزّن بدلًا عنهما.
+    """
+    if not sessions:
+        return np.zeros(0, dtype=np.int8)
+    balance = np.array([float(s.get("balance_index") or 0.0) for s in sessions])
+    psi = _weighted(sessions, PSI_WEIGHTS)
+    iepi = _weighted(sessions, IEPI_WEIGHTS)
+    return state_codes(np.where(np.isnan(psi), balance, psi), np.where(np.isnan(iepi), balance, iepi))
+
+# ============================================================
+# 🔹 السلسلة المُلاءمة (مجمّدة، مع تفكيك ذاتي مخزّن)
+# ============================================================
+
+@dataclass(frozen=True)
+class MarkovChain:
+    """
+    مصفوفة انتقال صفّية P مع تفكيكها الذاتي P = V·diag(λ)·V⁻¹ لاستعلامات سريعة:
+    التوزيع بعد n خطوة = p₀·V·diag(λⁿ)·V⁻¹ دون ضرب متكرر.
+    """
+    states: tuple
+    P: np.ndarray
+    eigvals: np.ndarray
+    eigvecs: np.ndarray
+    eigvecs_inv: Optional[np.ndarray]
+
+    @classmethod
+    def from_matrix(cls, P: np.ndarray, states: Sequence[str] = STATES) -> "MarkovChain":
+        P = np.asarray(P, dtype=float)
+        vals, vecs = np.linalg.eig(P)
+        inv = np.linalg.inv(vecs) if np.linalg.cond(vecs) < 1e8 else None  # مصفوفة معيبة: قوى مباشرة
+        return cls(states=tuple(states), P=P, eigvals=vals, eigvecs=vecs, eigvecs_inv=inv)
+
+    @property
+    def n_states(self) -> int:
+        return len(self.states)
+
+    def _start(self, start: Union[str, int, Sequence[float]]) -> np.ndarray:
+        if isinstance(start, str):
+            start = self.states.index(start)
+        if np.ndim(start) == 0:
+            p0 = np.zeros(self.n_states)
+            p0[int(start)] = 1.0
+            return p0
+        p0 = np.asarray(start, dtype=float)
+        return p0 / p0.sum()
+
+    def power(self, n: int) -> np.ndarray:
+        """Pⁿ من التفكيك الذاتي (أو matrix_power إذا كانت المصفوفة غير قابلة للتقطير)."""
+        if self.eigvecs_inv is None:
+            return np.linalg.matrix_power(self.P, int(n))
+        return np.real((self.eigvecs * self.eigvals ** int(n)) @ self.eigvecs_inv)
+
+    def forecast(
+        self,
+        start: Union[str, int, Sequence[float]],
+        steps: Union[int, Sequence[int]] = 1
+    ) -> np.ndarray:
+        """
+        توزيع الحالة بعد n خطوة من حالة (اسم/رمز) أو توزيع ابتدائي.
+        steps عدد واحد → (حالات,)، أو قائمة → (len(steps), حالات).
+        """
+        p0 = self._start(start)
+        ns = np.atleast_1d(steps)
+        out = np.clip(np.stack([p0 @ self.power(n) for n in ns]), 0.0, None)
+        out /= out.sum(axis=1, keepdims=True)
+        return out[0] if np.ndim(steps) == 0 else out
+
+    def stationary_distribution(self) -> np.ndarray:
+        """
+        التوزيع المستقر: المتجه الذاتي الأيسر للقيمة الذاتية 1 (مطبّعًا).
+        في السلاسل غير القابلة للاختزال يكون وحيدًا.
+        """
+        vals, vecs = np.linalg.eig(self.P.T)
+        v = np.abs(np.real(vecs[:, np.argmin(np.abs(vals - 1.0))]))
+        return v / v.sum()
+
+    def sample_paths(
+        self,
+        start: Union[int, np.ndarray],
+        steps: int,
+        n_paths: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        يسحب مسارات كثيرة معًا: في كل خطوة رقم عشوائي واحد لكل مسار يُقارن
+        بالتوزيع التراكمي لصف حالته. يرجع رموز int8 بشكل (steps × مسارات).
+        """
+        rng = np.random.default_rng(seed)
+        current = np.asarray(start, dtype=np.int64)
+        if current.ndim == 0:
+            current = np.full(n_paths or 1, int(current), dtype=np.int64)
+        cum = np.cumsum(self.P, axis=1)
+        cum[:, -1] = 1.0
+        out = np.empty((steps, current.size), dtype=np.int8)
+        for t in range(steps):
+            u = rng.random(current.size)
+            current = (u[:, None] > cum[current]).sum(axis=1)
+            out[t] = current
+        return out
+
+# ============================================================
+# 🔹 عدّاد الانتقالات التراكمي
+# ============================================================
+
+class TransitionModel:
+    """
+    يراكم مصفوفة عدّ انتقالات متفرقة من الجلسات المرتبة (مستخدم ثم زمن):
+    - يحفظ آخر حالة لكل مستخدم وآخر معرّف جلسة، فالتحديث اللاحق يقرأ الجديد فقط
+      ويصل أول جلسة جديدة بآخر حالة معروفة للمستخدم.
+    - chain() يبني سلسلة ماركوف مجمّدة للاستعلامات والمحاكاة.
+    """
+
+    def __init__(self, states: Sequence[str] = STATES):
+        self.states = tuple(states)
+        n = len(self.states)
+        self.counts = sp.csr_matrix((n, n), dtype=np.int64)
+        self.last_state: Dict[str, int] = {}
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def n_transitions(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, chunks: Iterable[List[Dict[str, Any]]]) -> int:
+        """يضيف انتقالات دفعات الجلسات ويرجع عدد الانتقالات الجديدة."""
+        added = 0
+        n = len(self.states)
+        with self._lock:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                codes = session_states(chunk).astype(np.int64)
+                users = np.array([str(s["user_id"]) for s in chunk], dtype=object)
+                prev = np.empty(len(chunk), dtype=np.int64)
+                prev[1:] = codes[:-1]
+                starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+                # أول جلسة في كل تسلسل مستخدم تتصل بآخر حالة محفوظة له (إن وُجدت)
+                prev[starts] = [self.last_state.get(users[i], -1) for i in starts]
+                ends = np.r_[starts[1:], len(chunk)] - 1
+                self.last_state.update({users[i]: int(codes[i]) for i in ends})
+                self.last_id = max(self.last_id, max(int(s["id"]) for s in chunk))
+
+                valid = prev >= 0
+                src, dst = prev[valid], codes[valid]
+                self.counts = self.counts + sp.csr_matrix(
+                    (np.ones(src.size, dtype=np.int64), (src, dst)), shape=(n, n)
+                )
+                added += int(src.size)
+        return added
+
+    def update_from_store(self, chunk_size: int = 5000) -> int:
+        """يقرأ الجلسات الأحدث من آخر معرّف معالج فقط (مرتبة حسب المستخدم ثم الزمن)."""
+        return self.update(iter_sessions(chunk_size, after_id=self.last_id, by_user=True))
+
+    def transition_matrix(self, smoothing: float = 0.0) -> np.ndarray:
+        """
+        مصفوفة الانتقال الصفّية (مع تنعيم لابلاس اختياري).
+        الحالة التي لم يُرصد منها أي انتقال تبقى في مكانها (احتمال 1).
+        """
+        C = self.counts.toarray().astype(float) + smoothing
+        rows = C.sum(axis=1)
+        P = np.divide(C, rows[:, None], out=np.zeros_like(C), where=rows[:, None] > 0)
+        empty = rows == 0
+        P[empty, np.flatnonzero(empty)] = 1.0
+        return P
+
+    def chain(self, smoothing: float = 0.0) -> MarkovChain:
+        return MarkovChain.from_matrix(self.transition_matrix(smoothing), self.states)
+
+    def to_dict(self) -> Dict[str, Any]:
+        coo = self.counts.tocoo()
+        return {
+            "states": list(self.states),
+            "last_id": self.last_id,
+            "last_state": self.last_state,
+            "counts": [[int(i), int(j), int(c)] for i, j, c in zip(coo.row, coo.col, coo.data)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TransitionModel":
+        model = cls(data.get("states") or STATES)
+        n = len(model.states)
+        triples = np.array(data.get("counts") or [], dtype=np.int64).reshape(-1, 3)
+        model.counts = sp.csr_matrix((triples[:, 2], (triples[:, 0], triples[:, 1])), shape=(n, n))
+        model.last_state = {str(k): int(v) for k, v in (data.get("last_state") or {}).items()}
+        model.last_id = int(data.get("last_id", 0))
+        return model
+
+def fit_transition_model(
+    path: Optional[Path] = None,
+    chunk_size: int = 5000
+) -> TransitionModel:
+    """
+    مهمة الملاءمة: تحمّل العدّاد المحفوظ (إن وُجد)، تضيف الجلسات الجديدة فقط، ثم تحفظه.
+    """
+    path = Path(path or MARKOV_MODEL_PATH)
+    stored = read_json(path)
+    model = TransitionModel.from_dict(stored) if stored else TransitionModel()
+    model.update_from_store(chunk_size)
+    write_json(path, model.to_dict())
+    return model
+
+if __name__ == "__main__":
+    model = fit_transition_model()
+    print(f"✅ {model.n_transitions} transitions from {len(model.last_state)} users")
+    print(dict(zip(model.states, np.round(model.chain(smoothing=1.0).stationary_distribution(), 3))))
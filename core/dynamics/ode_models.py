@@ -1,17 +1,80 @@
 # core/dynamics/ode_models.py
 from __future__ import annotations
+from functools import partial
 import numpy as np
 from typing import Tuple, Callable
 
+from core.utils.jit import HAVE_NUMBA, kernel
+
 def simple_emotion_model(a=0.8, b=0.9, c=0.2, d=0.6, e=1.0) -> Callable:
     """
     نموذج مبسط لحركية حالتين (x=هدوء/توتر, y=وضوح/ارتباك).
     dx/dt = a*x - b*y - c*x^3
     dy/dt = d*x - e*y
+    مع numba تُرفق بالدالة نوى خطوة ثابتة (f.kernels) تستخدمها solvers بدل الحلقة العامة.
     """
     def f(t: float, state: Tuple[float, float]):
         x, y = state
         dx = a * x - b * y - c * (x**3)
         dy = d * x - e * y
         return np.array([dx, dy])
+    if HAVE_NUMBA:
+        params = np.array([a, b, c, d, e], dtype=float)
+        f.kernels = {
+            "euler": partial(_emotion_euler, params),
+            "rk4": partial(_emotion_rk4, params),
+        }
     return f
+
+# ============================================================
+# 🔹 نوى مُجمّعة للنموذج العاطفي (Y بشكل (2 × دفعة))
+# ============================================================
+
+def _warmup_stepper(fn) -> None:
+    fn(np.array([0.8, 0.9, 0.2, 0.6, 1.0]), np.ones((2, 2)), 0.1, 2)
+
+@kernel(warmup=_warmup_stepper)
+def _emotion_euler(params, Y, h, steps):
+    a, b, c, d, e = params[0], params[1], params[2], params[3], params[4]
+    traj = np.empty((steps + 1, 2, Y.shape[1]))
+    traj[0] = Y
+    for j in range(Y.shape[1]):
+        x = Y[0, j]
+        y = Y[1, j]
+        for i in range(steps):
+            dx = a * x - b * y - c * x * x * x
+            dy = d * x - e * y
+            x += h * dx
+            y += h * dy
+            traj[i + 1, 0, j] = x
+            traj[i + 1, 1, j] = y
+    return traj
+
+@kernel(warmup=_warmup_stepper)
+def _emotion_rk4(params, Y, h, steps):
+    a, b, c, d, e = params[0], params[1], params[2], params[3], params[4]
+    traj = np.empty((steps + 1, 2, Y.shape[1]))
+    traj[0] = Y
+    for j in range(Y.shape[1]):
+        x = Y[0, j]
+        y = Y[1, j]
+        for i in range(steps):
+            k1x = a * x - b * y - c * x * x * x
+            k1y = d * x - e * y
+            xs = x + h / 2 * k1x
+            ys = y + h / 2 * k1y
+            k2x = a * xs - b * ys - c * xs * xs * xs
+            k2y = d * xs - e * ys
+            xs = x + h / 2 * k2x
+            ys = y + h / 2 * k2y
+            k3x = a * xs - b * ys - c * xs * xs * xs
+            k3y = d * xs - e * ys
+            xs = x + h * k3x
+            ys = y + h * k3y
+            k4x = a * xs - b * ys - c * xs * xs * xs
+            k4y = d * xs - e * ys
+            x += h / 6 * (k1x + 2 * k2x + 2 * k3x + k4x)
+            y += h / 6 * (k1y + 2 * k2y + 2 * k3y + k4y)
+            traj[i + 1, 0, j] = x
+            traj[i + 1, 1, j] = y
+    return traj
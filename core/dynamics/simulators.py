@@ -1,22 +1,107 @@
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 import numpy as np
 import pandas as pd
+import yaml
+
+from core.utils.io import FileCache, FileSnapshot
+from core.utils.jit import kernel
+
+# المحللات العددية (تُستورد من هنا في واجهة Streamlit)
+from .solvers import euler_integrate, ivp_integrate, rk4_integrate, vector_field
+
+ROOT = Path(__file__).resolve().parents[2]
+INTERVENTIONS_PATH = ROOT / "configs" / "interventions.yaml"
+
+# جدول التدخلات الأساسي: الاسم → (إزاحة psi، إزاحة iepi) لكل خطوة
+DEFAULT_INTERVENTIONS: Dict[str, Tuple[float, float]] = {
+    "التأمل": (2.0, 3.0),
+    "الامتنان": (1.0, 2.0),
+}
+
+def _parse_interventions(snap: FileSnapshot) -> Dict[str, Tuple[float, float]]:
+    """الجدول الأساسي مدموجًا مع الملف (الملف يضيف أو يعدّل؛ الملف الغائب = الأساسي فقط)."""
+    table = dict(DEFAULT_INTERVENTIONS)
+    cfg = (yaml.safe_load(snap.data) if snap.data else None) or {}
+    for item in cfg.get("interventions", []) or []:
+        name = str(item.get("name", "")).strip()
+        if name:
+            table[name] = (float(item.get("psi", 0.0)), float(item.get("iepi", 0.0)))
+    return table
+
+_INTERVENTIONS: FileCache[Dict[str, Tuple[float, float]]] = FileCache(_parse_interventions)
+
+def load_interventions(path: Optional[Path] = None) -> Dict[str, Tuple[float, float]]:
+    """
+    DEFAULT_INTERVENTIONS مدموجًا مع configs/interventions.yaml
+    (يُعاد تحميله تلقائيًا عند تعديل الملف).
+    """
+    return dict(_INTERVENTIONS.get(Path(path or INTERVENTIONS_PATH)))
+
+def interventions_digest(path: Optional[Path] = None) -> str:
+    """بصمة محتوى ملف التدخلات (تدخل في مفاتيح ذاكرة المسوحات)."""
+    return _INTERVENTIONS.version(Path(path or INTERVENTIONS_PATH))
+
+# حالات الاستقرار بترتيب رموزها (int8) في وضع المجموعة
+STATES = ["جمود", "انتقال", "تدفق", "جاذبية"]
+
+def _state_codes_numpy(psi: np.ndarray, iepi: np.ndarray) -> np.ndarray:
+    return np.select(
+        [
+            (psi < 40) & (iepi < 40),
+            ((psi >= 40) & (psi < 60)) | ((iepi >= 40) & (iepi < 60)),
+            (psi >= 60) & (iepi >= 60),
+        ],
+        [0, 1, 2],
+        default=3,
+    ).astype(np.int8)
+
+@kernel(
+    fallback=_state_codes_numpy,
+    warmup=lambda fn: fn(np.array([10.0, 50.0, 70.0]), np.array([10.0, 50.0, 20.0])),
+)
+def _state_codes_kernel(psi, iepi):
+    out = np.empty(psi.size, dtype=np.int8)
+    for i in range(psi.size):
+        p = psi.flat[i]
+        q = iepi.flat[i]
+        if p < 40 and q < 40:
+            out[i] = 0
+        elif 40 <= p < 60 or 40 <= q < 60:
+            out[i] = 1
+        elif p >= 60 and q >= 60:
+            out[i] = 2
+        else:
+            out[i] = 3
+    return out.reshape(psi.shape)
+
+def state_codes(psi: np.ndarray, iepi: np.ndarray) -> np.ndarray:
+    """
+    نفس منطق _get_state لمصفوفات كاملة، كرموز int8 (فهرس في STATES).
+    يمرّ مرة واحدة على البيانات بنواة numba إن توفرت، وإلا np.select.
+    """
+    psi, iepi = np.broadcast_arrays(np.asarray(psi, dtype=float), np.asarray(iepi, dtype=float))
+    return _state_codes_kernel(np.asarray(psi, order="C"), np.asarray(iepi, order="C"))
 
 # ================================
 # 🧠 محرك محاكاة مسارات الاستنارة
 # ================================
 class EnlightenmentSimulator:
-    def __init__(self, psi_score: float, iepi_score: float, intervention: str = None):
+    def __init__(self, psi_score: float, iepi_score: float, intervention: str = None,
+                 interventions: Optional[Dict[str, Tuple[float, float]]] = None):
         """
         :param psi_score: مؤشر السلام النفسي (0 - 100)
         :param iepi_score: مؤشر البصيرة الداخلية (0 - 100)
         :param intervention: نوع التدخل العلاجي (اختياري)
+        :param interventions: جدول التدخلات (الافتراضي load_interventions())
         """
         self.psi = psi_score
         self.iepi = iepi_score
         self.intervention = intervention
+        self.interventions = interventions if interventions is not None else load_interventions()
 
         # تحديد مستويات الاستقرار
-        self.states = ["جمود", "انتقال", "تدفق", "جاذبية"]
+        self.states = list(STATES)
         self.history = []
 
     def simulate(self, steps=10):
@@ -25,6 +110,7 @@ class EnlightenmentSimulator:
         """
         psi = self.psi
         iepi = self.iepi
+        self.history = []  # كل استدعاء يبدأ سجلًا جديدًا
 
         for step in range(steps):
             # حساب ديناميكية التحول
@@ -32,13 +118,9 @@ class EnlightenmentSimulator:
             iepi += np.random.uniform(-2, 2)
 
             # تأثير التدخل العلاجي إن وجد
-            if self.intervention:
-                if self.intervention == "التأمل":
-                    psi += 2
-                    iepi += 3
-                elif self.intervention == "الامتنان":
-                    psi += 1
-                    iepi += 2
+            d_psi, d_iepi = self._intervention_shift()
+            psi += d_psi
+            iepi += d_iepi
 
             # ضبط القيم ضمن النطاق 0 - 100
             psi = np.clip(psi, 0, 100)
@@ -50,6 +132,60 @@ class EnlightenmentSimulator:
 
         return pd.DataFrame(self.history, columns=["الخطوة", "مؤشر السلام النفسي", "مؤشر البصيرة الداخلية", "الحالة"])
 
+    def _intervention_shift(self):
+        """إزاحة (psi, iepi) لكل خطوة حسب جدول التدخلات (بدون تدخل: صفر)."""
+        if not self.intervention:
+            return 0.0, 0.0
+        return self.interventions.get(self.intervention, (0.0, 0.0))
+
+    def simulate_ensemble(self, n_paths=1000, steps=10, seed=None,
+                          quantiles=(0.05, 0.5, 0.95), return_states=False):
+        """
+        محاكاة N مسار معًا بعمليات مصفوفية ومولد np.random.Generator ذي بذرة.
+        تُلخَّص كل خطوة فورًا (نطاقات كمّية + احتمال كل حالة) فلا تُحفظ مصفوفة N×T؛
+        return_states=True يرجع أيضًا رموز الحالات (T × N) بصيغة int8 المدمجة.
+        """
+        rng = np.random.default_rng(seed)
+        psi = np.full(n_paths, float(self.psi))
+        iepi = np.full(n_paths, float(self.iepi))
+        d_psi, d_iepi = self._intervention_shift()
+        codes_all = np.empty((steps, n_paths), dtype=np.int8) if return_states else None
+
+        rows = []
+        for step in range(steps):
+            psi += rng.uniform(-3, 3, n_paths) + d_psi
+            iepi += rng.uniform(-2, 2, n_paths) + d_iepi
+            np.clip(psi, 0, 100, out=psi)
+            np.clip(iepi, 0, 100, out=iepi)
+
+            codes = state_codes(psi, iepi)
+            if return_states:
+                codes_all[step] = codes
+            occupancy = np.bincount(codes, minlength=len(self.states)) / n_paths
+            row = {"الخطوة": step}
+            for q, pv, iv in zip(quantiles, np.quantile(psi, quantiles), np.quantile(iepi, quantiles)):
+                row[f"مؤشر السلام النفسي q{q:g}"] = pv
+                row[f"مؤشر البصيرة الداخلية q{q:g}"] = iv
+            for name, p in zip(self.states, occupancy):
+                row[f"P({name})"] = p
+            rows.append(row)
+
+        summary = pd.DataFrame(rows)
+        return (summary, codes_all) if return_states else summary
+
+    def simulate_markov(self, chain, n_paths=1000, steps=10, seed=None, return_states=False):
+        """
+        محاكاة مسارات من سلسلة ماركوف مُلاءمة على الجلسات المخزنة (core.dynamics.markov)
+        بدل الضجيج العشوائي، انطلاقًا من الحالة الحالية للمؤشرين.
+        يرجع احتمال كل حالة في كل خطوة (ومصفوفة الرموز (خطوات × مسارات) عند الطلب).
+        """
+        start = int(state_codes(self.psi, self.iepi))
+        codes = chain.sample_paths(start, steps, n_paths=n_paths, seed=seed)
+        occupancy = np.stack([np.bincount(c, minlength=len(self.states)) for c in codes]) / n_paths
+        summary = pd.DataFrame(occupancy, columns=[f"P({name})" for name in self.states])
+        summary.insert(0, "الخطوة", np.arange(steps))
+        return (summary, codes) if return_states else summary
+
     def _get_state(self, psi, iepi):
         """
         تحديد حالة الفرد النفسية-الروحية بناءً على المؤشرات
@@ -69,3 +205,7 @@ class EnlightenmentSimulator:
 def run_enlightenment_simulation(psi, iepi, intervention=None, steps=12):
     simulator = EnlightenmentSimulator(psi, iepi, intervention)
     return simulator.simulate(steps)
+
+def run_enlightenment_ensemble(psi, iepi, intervention=None, steps=12, n_paths=1000, seed=None):
+    simulator = EnlightenmentSimulator(psi, iepi, intervention)
+    return simulator.simulate_ensemble(n_paths=n_paths, steps=steps, seed=seed)
@@ -0,0 +1,122 @@
+# core/dynamics/solvers.py
+from __future__ import annotations
+from typing import Callable, Sequence, Tuple, Union
+import numpy as np
+from scipy.integrate import solve_ivp
+
+# النماذج بصيغة f(t, state) حيث state مصفوفة محورها الأول هو أبعاد الحالة،
+# فتعمل على نقطة واحدة (dim,) أو على دفعة كاملة (dim, ...) دون حلقات.
+Model = Callable[[float, np.ndarray], np.ndarray]
+State = Union[Sequence[float], np.ndarray]
+
+def vector_field(
+    f: Model,
+    x_range: Tuple[float, float] = (-2.0, 2.0),
+    y_range: Tuple[float, float] = (-2.0, 2.0),
+    density: int = 20,
+    t: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    حقل الاتجاهات على شبكة density × density باستدعاء واحد للنموذج على كامل الشبكة.
+    يرجع (X, Y, dX, dY) بصيغة meshgrid المناسبة لـ streamplot/quiver.
+    """
+    X, Y = np.meshgrid(np.linspace(*x_range, density), np.linspace(*y_range, density))
+    d = np.asarray(f(t, np.stack([X, Y])))
+    return X, Y, d[0], d[1]
+
+def _batch(x0: State) -> Tuple[np.ndarray, bool]:
+    """(dim,) → (dim, 1) أو (B, dim) → (dim, B) مع علامة الحالة الفردية."""
+    x0 = np.asarray(x0, dtype=float)
+    if x0.ndim == 1:
+        return x0[:, None], True
+    return x0.T.copy(), False
+
+def _output(traj: np.ndarray, single: bool) -> np.ndarray:
+    """(steps+1, dim, B) → (steps+1, dim) أو (steps+1, B, dim)."""
+    return traj[:, :, 0] if single else traj.transpose(0, 2, 1)
+
+def _compiled(f: Model, scheme: str):
+    """نواة الخطوة الثابتة المُجمّعة التي يرفقها النموذج (f.kernels) إن وُجدت."""
+    return getattr(f, "kernels", {}).get(scheme)
+
+def euler_integrate(
+    f: Model,
+    x0: State,
+    t_span: Tuple[float, float] = (0.0, 10.0),
+    steps: int = 100
+) -> np.ndarray:
+    """
+    تكامل أويلر الصريح بخطوة ثابتة لنقطة بداية (dim,) أو دفعة (B, dim) معًا.
+    يرجع المسار (steps+1, dim) أو (steps+1, B, dim).
+    النماذج الذاتية التي ترفق نوى numba (f.kernels) تُكامل بالنواة بدل الحلقة العامة.
+    """
+    y, single = _batch(x0)
+    h = (t_span[1] - t_span[0]) / steps
+    compiled = _compiled(f, "euler")
+    if compiled is not None:
+        return _output(compiled(np.ascontiguousarray(y), h, steps), single)
+    traj = np.empty((steps + 1,) + y.shape)
+    traj[0] = y
+    t = t_span[0]
+    for i in range(steps):
+        y = y + h * f(t, y)
+        t += h
+        traj[i + 1] = y
+    return _output(traj, single)
+
+def rk4_integrate(
+    f: Model,
+    x0: State,
+    t_span: Tuple[float, float] = (0.0, 10.0),
+    steps: int = 100
+) -> np.ndarray:
+    """رونج-كوتا الرابعة بخطوة ثابتة (نفس واجهة euler_integrate ونفس مسار النوى)."""
+    y, single = _batch(x0)
+    h = (t_span[1] - t_span[0]) / steps
+    compiled = _compiled(f, "rk4")
+    if compiled is not None:
+        return _output(compiled(np.ascontiguousarray(y), h, steps), single)
+    traj = np.empty((steps + 1,) + y.shape)
+    traj[0] = y
+    t = t_span[0]
+    for i in range(steps):
+        k1 = f(t, y)
+        k2 = f(t + h / 2, y + h / 2 * k1)
+        k3 = f(t + h / 2, y + h / 2 * k2)
+        k4 = f(t + h, y + h * k3)
+        y = y + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        t += h
+        traj[i + 1] = y
+    return _output(traj, single)
+
+def ivp_integrate(
+    f: Model,
+    x0: State,
+    t_span: Tuple[float, float] = (0.0, 10.0),
+    steps: int = 100,
+    *,
+    method: str = "RK45",
+    rtol: float = 1e-6,
+    atol: float = 1e-9
+) -> np.ndarray:
+    """
+    محلل تكيّفي من scipy (RK45/DOP853/LSODA/BDF...) لكل الدفعة في استدعاء واحد؛
+    النتيجة تُقيَّم على نفس steps+1 نقطة زمنية لتُقارن بالمحللات الثابتة.
+    """
+    y, single = _batch(x0)
+    shape = y.shape
+    t_eval = np.linspace(t_span[0], t_span[1], steps + 1)
+    sol = solve_ivp(
+        lambda t, z: np.asarray(f(t, z.reshape(shape))).ravel(),
+        t_span, y.ravel(), method=method, t_eval=t_eval, rtol=rtol, atol=atol,
+    )
+    if not sol.success:
+        raise RuntimeError(f"solve_ivp failed: {sol.message}")
+    traj = sol.y.T.reshape((len(sol.t),) + shape)
+    return _output(traj, single)
+
+INTEGRATORS = {
+    "euler": euler_integrate,
+    "rk4": rk4_integrate,
+    "ivp": ivp_integrate,
+}
@@ -0,0 +1,135 @@
+# core/dynamics/sweeps.py
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+
+from core.utils.io import read_json, write_json
+from .ode_models import simple_emotion_model
+from .simulators import ROOT, STATES, EnlightenmentSimulator, interventions_digest
+from .solvers import rk4_integrate
+
+SWEEP_CACHE_DIR = ROOT / "data" / "cache" / "sweeps"
+# نسخة منطق المهام وصيغة نتائجها: تُرفع عند أي تغيير يغيّر النتائج فتُهمل النقاط المخزنة
+SWEEP_CACHE_VERSION = 2
+
+Task = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# ============================================================
+# 🔹 مهام جاهزة للمسح (دوال على مستوى الوحدة لتُرسل إلى العمليات)
+# ============================================================
+
+def enlightenment_task(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    محاكاة مجموعة مسارات لتدخل واحد وإرجاع ملخص الخطوة الأخيرة.
+    المعاملات: psi, iepi, intervention, steps, n_paths, seed.
+    """
+    sim = EnlightenmentSimulator(params.get("psi", 50.0), params.get("iepi", 50.0),
+                                 params.get("intervention"))
+    summary = sim.simulate_ensemble(
+        n_paths=int(params.get("n_paths", 1000)),
+        steps=int(params.get("steps", 12)),
+        seed=params.get("seed", 0),
+    )
+    last = summary.iloc[-1]
+    out = {
+        "psi_median": float(last["مؤشر السلام النفسي q0.5"]),
+        "iepi_median": float(last["مؤشر البصيرة الداخلية q0.5"]),
+    }
+    out.update({f"P({s})": float(last[f"P({s})"]) for s in STATES})
+    return out
+
+def emotion_model_task(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    تكامل simple_emotion_model لمعاملات a…e ونقطة بداية، وإرجاع الحالة النهائية.
+    """
+    f = simple_emotion_model(**{k: float(params[k]) for k in "abcde" if k in params})
+    traj = rk4_integrate(
+        f, (params.get("x0", 1.2), params.get("y0", 0.2)),
+        (0.0, float(params.get("t_end", 20.0))), steps=int(params.get("steps", 400)),
+    )
+    return {
+        "x_final": float(traj[-1, 0]),
+        "y_final": float(traj[-1, 1]),
+        "x_max_abs": float(np.abs(traj[:, 0]).max()),
+    }
+
+# ============================================================
+# 🔹 مشغّل المسح
+# ============================================================
+
+def param_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """حاصل ديكارتي لقيم المعاملات: {"a": [..], "b": [..]} → قائمة قواميس."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in product(*(grid[k] for k in keys))]
+
+def task_name(task: Task) -> str:
+    return f"{task.__module__}.{task.__qualname__}"
+
+# مدخلات خارجية تقرؤها المهمة (غير معاملاتها)؛ تدخل في مفاتيح تلك المهمة فقط
+TASK_INPUTS: Dict[Task, Callable[[], Dict[str, Any]]] = {
+    enlightenment_task: lambda: {"interventions": interventions_digest()},
+}
+
+def sweep_context(task: Task) -> Dict[str, Any]:
+    """مدخلات تغيّر نتيجة المهمة دون أن تظهر في المعاملات: نسخة الكود ومدخلاتها الخارجية."""
+    inputs = TASK_INPUTS.get(task)
+    return {"version": SWEEP_CACHE_VERSION, **(inputs() if inputs else {})}
+
+def param_key(task: Task, params: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> str:
+    """بصمة ثابتة للمهمة + السياق + المعاملات تُستخدم اسمًا لملف النتيجة."""
+    context = sweep_context(task) if context is None else context
+    payload = json.dumps([task_name(task), context, params], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def _run_chunk(task: Task, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [task(p) for p in chunk]
+
+def run_sweep(
+    task: Task,
+    grid: Dict[str, Sequence[Any]],
+    *,
+    cache_dir: Optional[Path] = None,
+    n_jobs: Optional[int] = None,
+    chunk_size: int = 8
+) -> pd.DataFrame:
+    """
+    يشغّل المهمة على كل نقاط الشبكة ويرجع جدولًا مرتبًا (معاملات + نتائج):
+    - كل نقطة تُخزَّن على القرص بمفتاح بصمة المعاملات، فإعادة المسح مع نقطة
+      إضافية واحدة لا تحسب إلا تلك النقطة.
+    - النقاط الناقصة تُوزّع دفعات على مجمّع عمليات (n_jobs=1 يشغّلها في نفس العملية).
+    """
+    cache = Path(cache_dir or SWEEP_CACHE_DIR) / task_name(task)
+    points = param_grid(grid)
+    context = sweep_context(task)
+    keys = [param_key(task, p, context) for p in points]
+    results: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for key, params in zip(keys, points):
+        stored = read_json(cache / f"{key}.json")
+        if stored:
+            results[key] = stored["result"]
+        else:
+            missing.append((key, params))
+
+    chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+    param_chunks = [[p for _, p in c] for c in chunks]
+    if n_jobs == 1 or len(chunks) <= 1:
+        outputs = [_run_chunk(task, c) for c in param_chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            outputs = list(pool.map(_run_chunk, [task] * len(param_chunks), param_chunks))
+    for chunk, out in zip(chunks, outputs):
+        for (key, params), res in zip(chunk, out):
+            write_json(cache / f"{key}.json", {"params": params, "result": res})
+            results[key] = res
+
+    rows = [{**params, **results[key]} for key, params in zip(keys, points)]
+    df = pd.DataFrame(rows)
+    df.attrs["computed"] = len(missing)
+    return df
@@ -0,0 +1,171 @@
+# core/explain/longitudinal.py
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+import numpy as np
+
+from core.scoring.whatif import weight_vector
+from core.storage.repository import deletion_count, list_user_sessions
+
+# أقصى عدد مستخدمين تُحفظ تفسيراتهم في الذاكرة
+EXPLAINER_CACHE_SIZE = 256
+
+def _score_matrix(
+    sessions: List[Dict[str, Any]],
+    facets: List[str],
+    last_row: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    مصفوفة (زمن × أبعاد) بعد التطبيع. البُعد الغائب في جلسة يأخذ آخر قيمة معروفة
+    (أو أول قيمة لاحقة في بداية السجل) حتى لا يظهر كتغيّر زائف.
+    """
+    M = np.array(
+        [[float(s["scores"].get(f, np.nan)) for f in facets] for s in sessions],
+        dtype=float,
+    ).reshape(len(sessions), len(facets))
+    if last_row is not None:
+        M = np.vstack([last_row[None, :], M])
+    for j in range(M.shape[1]):
+        col = M[:, j]
+        seen = np.flatnonzero(~np.isnan(col))
+        if seen.size == 0:
+            col[:] = 0.0
+            continue
+        idx = np.maximum.accumulate(np.where(np.isnan(col), 0, np.arange(col.size)))
+        idx[: seen[0]] = seen[0]
+        M[:, j] = col[idx]
+    M = np.clip(M, 0.0, 100.0)
+    return M[1:] if last_row is not None else M
+
+def _freeze(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """يجعل مصفوفات النتيجة المخزنة للقراءة فقط (كنتائج centrality_vector)."""
+    for value in entry.values():
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+    return entry
+
+def _view(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """نسخة للمستدعي: القوائم منسوخة والمصفوفات مشتركة للقراءة فقط."""
+    return {k: list(v) if isinstance(v, list) else v for k, v in entry.items()}
+
+class LongitudinalExplainer:
+    """
+    يفسّر تغيّر مؤشر التوازن بين الجلسات المتتالية لكل مستخدم:
+    - يجلب سجل المستخدم باستعلام واحد ويبني مصفوفة (زمن × أبعاد).
+    - يفكك تغيّر كل خطوة إلى مساهمات الأبعاد: w_i · Δs_i / Σw (مجموعها = تغيّر المؤشر).
+    - يخزّن النتيجة لكل مستخدم (LRU بحد cache_size) ويمددها بالجلسات الجديدة فقط،
+      ويعيد البناء إن حُذفت جلسة للمستخدم (delete_session).
+    - الجلب من قاعدة البيانات يتم خارج القفل، والنتيجة المعادة مصفوفاتها للقراءة فقط.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        fetch: Callable[..., List[Dict[str, Any]]] = list_user_sessions,
+        cache_size: int = EXPLAINER_CACHE_SIZE
+    ):
+        self.weights = weights
+        self._fetch = fetch
+        self.cache_size = cache_size
+        # user_id → (عدد الحذف عند البناء، النتيجة)
+        self._cache: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def explain(self, user_id: str) -> Dict[str, Any]:
+        deletions = deletion_count(user_id)
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None:
+                self._cache.move_to_end(user_id)
+        entry = cached[1] if cached is not None and cached[0] == deletions else None
+        after = max(entry["session_ids"]) if entry and entry["session_ids"] else 0
+        new = self._fetch(user_id, after_id=after)
+        if entry is not None and not new:
+            return _view(entry)
+        if entry is not None and any(
+            f not in entry["facets"] for s in new for f in s["scores"]
+        ):
+            # ظهرت أبعاد جديدة: أعد البناء من كامل السجل
+            entry, new = None, self._fetch(user_id, after_id=0)
+        entry = _freeze(self._build(new) if entry is None else self._extend(entry, new))
+        with self._lock:
+            current = self._cache.get(user_id)
+            # لا تستبدل نسخة أحدث خزّنها خيط آخر أثناء الجلب
+            if current is None or (current[0], len(current[1]["session_ids"])) <= (
+                deletions, len(entry["session_ids"])
+            ):
+                self._cache[user_id] = (deletions, entry)
+                self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:  # الأقدم استخدامًا أولًا
+                self._cache.popitem(last=False)
+        return _view(entry)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def _build(self, sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        facets: List[str] = []
+        for s in sessions:
+            facets.extend(f for f in s["scores"] if f not in facets)
+        w = weight_vector(facets, self.weights)
+        entry: Dict[str, Any] = {
+            "facets": facets,
+            "session_ids": [],
+            "created_at": [],
+            "stored_index": np.zeros(0),
+            "scores": np.zeros((0, len(facets))),
+            "index": np.zeros(0),
+            "index_delta": np.zeros(0),
+            "contributions": np.zeros((0, len(facets))),
+            "drivers": [],
+            "weights": w / w.sum() if w.size and w.sum() else w,
+        }
+        return self._extend(entry, sessions)
+
+    def _extend(self, entry: Dict[str, Any], sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if not sessions:
+            return entry
+        facets, w = entry["facets"], entry["weights"]
+        last = entry["scores"][-1] if len(entry["scores"]) else None
+        M = _score_matrix(sessions, facets, last)
+        steps = np.diff(M if last is None else np.vstack([last[None, :], M]), axis=0) * w
+        scores = np.vstack([entry["scores"], M])
+        contributions = np.vstack([entry["contributions"], steps])
+        index = np.concatenate([entry["index"], M @ w])
+        return {
+            **entry,
+            "session_ids": entry["session_ids"] + [s["id"] for s in sessions],
+            "created_at": entry["created_at"] + [s["created_at"] for s in sessions],
+            "stored_index": np.concatenate(
+                [entry["stored_index"], [float(s["balance_index"] or 0.0) for s in sessions]]
+            ),
+            "scores": scores,
+            "index": index,
+            "index_delta": np.diff(index),
+            "contributions": contributions,
+            "drivers": [facets[j] for j in np.argmax(np.abs(contributions), axis=1)]
+            if contributions.size else [],
+        }
+
+_DEFAULT_EXPLAINER = LongitudinalExplainer()
+
+def explain_history(user_id: str) -> Dict[str, Any]:
+    """
+    تفسير تغيّر مؤشر التوازن عبر كامل سجل المستخدم (مع تخزين مؤقت تزايدي).
+    """
+    return _DEFAULT_EXPLAINER.explain(user_id)
+
+def describe_step(history: Dict[str, Any], step: int = -1, top_k: int = 3) -> str:
+    """
+    خلاصة نصية قصيرة لسبب تغيّر المؤشر في خطوة واحدة (الافتراضي: آخر جلسة).
+    """
+    contrib = history["contributions"][step]
+    delta = float(history["index_delta"][step])
+    order = np.argsort(-np.abs(contrib), kind="stable")[:top_k]
+    parts = [f"{history['facets'][j]}: {contrib[j]:+.2f}" for j in order if contrib[j] != 0]
+    return f"Index change {delta:+.2f} ← " + ", ".join(parts)
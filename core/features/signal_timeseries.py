@@ -0,0 +1,159 @@
+from __future__ import annotations
+from typing import Any, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# 🔹 مؤشرات الصحة على سلاسل زمنية من الأجهزة القابلة للارتداء
+#    نفس قواعد compute_health_indices (signal_features.py) لكن لكل نافذة زمنية
+#    دفعة واحدة: العينات تُجمع في خانات (bincount) ثم نوافذ متدحرجة بالمجاميع التراكمية.
+# ============================================================
+
+SIGNAL_COLUMNS: Tuple[str, ...] = ("hr", "hrv", "sleep_score", "activity_score", "stress_score")
+INDEX_COLUMNS: Tuple[str, ...] = (
+    "heart_rate", "heart_health_index", "hrv", "relaxation_index",
+    "sleep_score", "activity_score", "device_stress_score", "overall_health_index",
+)
+# مكونات المؤشر العام بنفس ترتيب compute_health_indices
+OVERALL_COMPONENTS: Tuple[str, ...] = ("heart_health_index", "relaxation_index", "sleep_score", "activity_score")
+
+def _normalize(x: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """نسخة متجهة من signal_features.normalize."""
+    return np.clip((x - vmin) / (vmax - vmin), 0.0, 1.0)
+
+def _column(frame: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in frame:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=float)
+
+def _valid_signals(frame: pd.DataFrame) -> np.ndarray:
+    """
+    مصفوفة (عينات × SIGNAL_COLUMNS) مع NaN لكل قيمة تعاملها الدالة اللحظية كمفقودة:
+    hr و hrv تُهمل إن لم تكن موجبة، والبقية إن كانت فارغة.
+    """
+    X = np.column_stack([_column(frame, c) for c in SIGNAL_COLUMNS])
+    with np.errstate(invalid="ignore"):
+        X[:, :2] = np.where(X[:, :2] > 0, X[:, :2], np.nan)
+    return X
+
+def health_indices_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    compute_health_indices لكل صف دفعة واحدة: نفس الأعمدة والتقريب،
+    و NaN مكان None. يقبل أي مجموعة جزئية من SIGNAL_COLUMNS.
+    """
+    X = _valid_signals(frame)
+    hr, hrv, sleep, activity, stress = X.T
+    out = pd.DataFrame(
+        {
+            "heart_rate": np.round(hr, 1),
+            "heart_health_index": np.round((1 - _normalize(hr, 60, 100)) * 100, 2),
+            "hrv": np.round(hrv, 1),
+            "relaxation_index": np.round(_normalize(hrv, 20, 80) * 100, 2),
+            "sleep_score": np.round(sleep, 1),
+            "activity_score": np.round(activity, 1),
+            "device_stress_score": np.round(stress, 1),
+        },
+        index=frame.index,
+    )
+    comps = out[list(OVERALL_COMPONENTS)].to_numpy()
+    count = (~np.isnan(comps)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall = np.nansum(comps, axis=1) / count
+    out["overall_health_index"] = np.round(np.where(count > 0, overall, np.nan), 2)
+    return out
+
+def _timestamps(frame: pd.DataFrame, time_col: Optional[str]) -> pd.DatetimeIndex:
+    if time_col is not None and time_col in frame:
+        return pd.DatetimeIndex(pd.to_datetime(frame[time_col])).as_unit("ns")
+    if isinstance(frame.index, pd.DatetimeIndex):
+        return frame.index.as_unit("ns")
+    raise ValueError(f"Samples need a {time_col!r} column or a DatetimeIndex")
+
+def _steps(value: Union[str, pd.Timedelta], freq: pd.Timedelta) -> int:
+    steps = pd.Timedelta(value) / freq
+    if steps < 1 or steps != int(steps):
+        raise ValueError(f"Window {value!r} must be a whole multiple of the resample frequency {freq}")
+    return int(steps)
+
+def resample_signals(
+    samples: Any,
+    freq: Union[str, pd.Timedelta] = "1h",
+    *,
+    window: Union[str, pd.Timedelta, None] = None,
+    time_col: Optional[str] = "timestamp"
+) -> pd.DataFrame:
+    """
+    متوسط كل إشارة في كل خانة زمنية بطول freq (العينات المفقودة لا تدخل في المتوسط).
+    مع window (مضاعف صحيح لـ freq): متوسط متدحرج على كل العينات في آخر window
+    حتى نهاية الخانة — محسوب من مجاميع وعدّادات الخانات لا من متوسطاتها.
+    samples: DataFrame أو جدول Arrow (أي كائن يوفر to_pandas()).
+    """
+    frame = samples.to_pandas() if hasattr(samples, "to_pandas") else pd.DataFrame(samples)
+    freq = pd.Timedelta(freq)
+    ts = _timestamps(frame, time_col)
+    columns = list(SIGNAL_COLUMNS)
+    if len(frame) == 0:
+        return pd.DataFrame(columns=columns + ["samples"], index=pd.DatetimeIndex([], name="window_start"))
+
+    X = _valid_signals(frame)
+    # النوافذ اليومية على الوقت المحلي (تبدأ من منتصف الليل المحلي)، والأقصر منها على UTC:
+    # ساعات الانتقال للتوقيت الصيفي تبقى خانات مستقلة بلا تسميات مكررة أو ساعات مدموجة
+    local = ts.tz is not None and freq % pd.Timedelta(days=1) == pd.Timedelta(0)
+    ns = (ts.tz_localize(None) if local else ts).asi8
+    step = freq.value
+    first = (ns.min() // step) * step
+    bins = (ns - first) // step
+    n_bins = int(bins.max()) + 1
+
+    present = ~np.isnan(X)
+    sums = np.empty((n_bins, X.shape[1]))
+    counts = np.empty((n_bins, X.shape[1]))
+    for j in range(X.shape[1]):
+        sums[:, j] = np.bincount(bins, weights=np.where(present[:, j], X[:, j], 0.0), minlength=n_bins)
+        counts[:, j] = np.bincount(bins, weights=present[:, j], minlength=n_bins)
+    total = np.bincount(bins, minlength=n_bins).astype(float)
+
+    if window is not None:
+        w = _steps(window, freq)
+        def rolling(a: np.ndarray) -> np.ndarray:
+            c = np.cumsum(a, axis=0)
+            c[w:] = c[w:] - c[:-w]
+            return c
+        sums, counts, total = rolling(sums), rolling(counts), rolling(total[:, None])[:, 0]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    index = pd.DatetimeIndex((first + np.arange(n_bins) * step).astype("datetime64[ns]"), name="window_start")
+    if local:
+        index = index.tz_localize(ts.tz, ambiguous="NaT", nonexistent="shift_forward")
+    elif ts.tz is not None:
+        index = index.tz_localize("UTC").tz_convert(ts.tz)
+    out = pd.DataFrame(means, columns=columns, index=index)
+    out["samples"] = total.astype(np.int64)
+    return out
+
+def rolling_health_indices(
+    samples: Any,
+    freq: Union[str, pd.Timedelta] = "1D",
+    *,
+    window: Union[str, pd.Timedelta, None] = None,
+    time_col: Optional[str] = "timestamp",
+    drop_empty: bool = False
+) -> pd.DataFrame:
+    """
+    مؤشرات الصحة (نفس أعمدة compute_health_indices) لكل نافذة زمنية:
+    متوسطات resample_signals ثم health_indices_frame. الخانات بلا عينات
+    تعطي NaN (أو تُحذف مع drop_empty=True).
+    """
+    means = resample_signals(samples, freq, window=window, time_col=time_col)
+    out = health_indices_frame(means)
+    out["samples"] = means["samples"]
+    if drop_empty:
+        out = out[out["samples"] > 0]
+    return out
+
+def snapshot_records(frame: pd.DataFrame, columns: Sequence[str] = INDEX_COLUMNS) -> list:
+    """صفوف الإطار كقواميس بنمط compute_health_indices (None مكان NaN)."""
+    values = frame[list(columns)].to_numpy(dtype=object)
+    values[pd.isna(values)] = None
+    return [dict(zip(columns, row)) for row in values]
@@ -1,15 +1,15 @@
 # core/graph/builder.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 import networkx as nx
 from core.utils.io import read_yaml
 
 ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_GRAPH_PATH = ROOT / "configs" / "graph.yaml"
 
-def load_graph_config() -> Dict[str, Any]:
-    cfg_path = ROOT / "configs" / "graph.yaml"
-    return read_yaml(cfg_path)
+def load_graph_config(path: Optional[Path] = None) -> Dict[str, Any]:
+    return read_yaml(Path(path or DEFAULT_GRAPH_PATH))
 
 def build_graph(cfg: Dict[str, Any]) -> nx.Graph:
     nodes = cfg.get("nodes", [])
@@ -28,6 +28,10 @@ def build_graph(cfg: Dict[str, Any]) -> nx.Graph:
         G.add_edge(u, v, weight=float(w))
     return G
 
-def graph_from_config() -> nx.Graph:
-    cfg = load_graph_config()
-    return build_graph(cfg)
+def graph_from_config(path: Optional[Path] = None) -> nx.Graph:
+    """
+    الشبكة المجمّدة المشتركة من سجل الشبكات (تُبنى مرة واحدة لكل نسخة من الملف).
+    استخدم build_graph(load_graph_config()) للحصول على نسخة قابلة للتعديل.
+    """
+    from .registry import get_compiled_graph  # registry يستورد build_graph من هذا الملف
+    return get_compiled_graph(path).graph
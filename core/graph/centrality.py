@@ -0,0 +1,207 @@
+# core/graph/centrality.py
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import threading
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import eigsh
+
+from .registry import CompiledGraph, get_compiled_graph
+
+# فوق هذا الحجم تُقدَّر البينية من عيّنة مصادر بدل الحساب الكامل
+BETWEENNESS_EXACT_MAX_NODES = 1000
+BETWEENNESS_SAMPLES = 64
+# أقصى عدد نتائج محفوظة (PageRank المخصص ينتج مفتاحًا لكل قاموس personalization)
+CENTRALITY_CACHE_SIZE = 128
+
+# ============================================================
+# 🔹 مقاييس المركزية من المصفوفة المتفرقة
+# ============================================================
+
+def weighted_degree_vector(A: sp.csr_matrix) -> np.ndarray:
+    return np.asarray(A.sum(axis=1)).ravel()
+
+def eigenvector_vector(A: sp.csr_matrix) -> np.ndarray:
+    """
+    المتجه الذاتي الأكبر للمصفوفة المتماثلة، موجب ومطبّع بطول 1 (مثل networkx).
+    """
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    if n < 3:
+        _, vecs = np.linalg.eigh(A.toarray())
+        v = vecs[:, -1]
+    else:
+        _, vecs = eigsh(A.astype(float), k=1, which="LA", v0=np.ones(n))
+        v = vecs[:, 0]
+    v = np.abs(v)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else np.full(n, 1.0 / np.sqrt(n))
+
+def pagerank_vector(
+    A: sp.csr_matrix,
+    *,
+    damping: float = 0.85,
+    personalization: Optional[np.ndarray] = None,
+    tol: float = 1e-6,
+    max_iter: int = 100
+) -> np.ndarray:
+    """
+    PageRank (أو PageRank المخصّص عند تمرير personalization) بالتكرار الأسّي على CSR.
+    العقد بلا حواف توزّع وزنها حسب متجه التخصيص كما في networkx.
+    """
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out_w = weighted_degree_vector(A)
+    inv = np.divide(1.0, out_w, out=np.zeros(n), where=out_w != 0)
+    PT = (sp.diags(inv) @ A).T.tocsr()
+    p = np.full(n, 1.0 / n) if personalization is None else np.asarray(personalization, float)
+    p = p / p.sum()
+    dangling = out_w == 0
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        last = x
+        x = damping * (PT @ last + last[dangling].sum() * p) + (1.0 - damping) * p
+        if np.abs(x - last).sum() < n * tol:
+            break
+    return x / x.sum()
+
+def betweenness_vector(
+    A: sp.csr_matrix,
+    *,
+    samples: Optional[int] = None,
+    seed: int = 0,
+    batch: int = 64
+) -> np.ndarray:
+    """
+    البينية (عدد القفزات، بدون أوزان) بخوارزمية Brandes على نمط المصفوفة المتفرقة:
+    BFS متزامن المستويات لدفعة مصادر معًا (عمود لكل مصدر) بضرب مصفوفة متفرقة × كثيفة،
+    ثم تراكم الاعتماديات رجوعًا بنفس الطريقة. تطبيع networkx نفسه (normalized=True).
+    للشبكات الكبيرة تُقدَّر من عيّنة مصادر (samples) مع تكبير n/k كما في networkx.
+    """
+    n = A.shape[0]
+    if samples is None and n > BETWEENNESS_EXACT_MAX_NODES:
+        samples = BETWEENNESS_SAMPLES
+    B = A.tocsr(copy=True)
+    B.setdiag(0)
+    B.eliminate_zeros()
+    B.data = np.ones_like(B.data, dtype=float)
+    k = min(samples, n) if samples else n
+    sources = (np.random.default_rng(seed).choice(n, size=k, replace=False)
+               if k < n else np.arange(n))
+
+    total = np.zeros(n)
+    for start in range(0, len(sources), batch):
+        src = sources[start:start + batch]
+        cols = np.arange(len(src))
+        sigma = np.zeros((n, len(src)))
+        sigma[src, cols] = 1.0
+        depth = np.full((n, len(src)), -1, dtype=np.int32)
+        depth[src, cols] = 0
+        frontier = sigma.copy()
+        level = 0
+        while frontier.any():
+            level += 1
+            reach = B @ frontier
+            new = (reach > 0) & (depth < 0)
+            depth[new] = level
+            frontier = np.where(new, reach, 0.0)
+            sigma += frontier
+        delta = np.zeros_like(sigma)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_sigma = np.where(sigma > 0, 1.0 / sigma, 0.0)
+        for lvl in range(level - 1, 0, -1):
+            child = np.where(depth == lvl + 1, (1.0 + delta) * inv_sigma, 0.0)
+            delta = np.where(depth == lvl, sigma * (B @ child), delta)
+        total += delta.sum(axis=1)
+
+    scale = 1.0 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    return total * scale * (n / k)
+
+# ============================================================
+# 🔹 ذاكرة مؤقتة لكل نسخة من الشبكة
+# ============================================================
+
+_CACHE: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+def _freeze_params(params: Dict[str, object]) -> Tuple:
+    items = []
+    for k, v in sorted(params.items()):
+        if isinstance(v, dict):
+            v = tuple(sorted(v.items()))
+        elif isinstance(v, np.ndarray):
+            v = tuple(v.tolist())
+        items.append((k, v))
+    return tuple(items)
+
+def centrality_vector(
+    measure: str = "degree",
+    compiled: Optional[CompiledGraph] = None,
+    **params
+) -> np.ndarray:
+    """
+    مقياس مركزية بترتيب compiled.nodes، محسوب مرة واحدة لكل نسخة من الشبكة
+    (ذاكرة LRU بحد CENTRALITY_CACHE_SIZE نتيجة).
+    measure: "degree" | "weighted_degree" | "eigenvector" | "pagerank" | "betweenness"
+    personalization (لـ pagerank) يُمرَّر كقاموس {عقدة: وزن}.
+    """
+    compiled = compiled or get_compiled_graph()
+    key = (str(compiled.path), compiled.version, measure, _freeze_params(params))
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None:
+            _CACHE.move_to_end(key)
+    if cached is not None:
+        return cached
+
+    A = compiled.adjacency
+    op = compiled.operator
+    if measure == "degree":
+        n = op.n_nodes
+        loops = np.bincount(op.rows[op.rows == op.cols], minlength=n)
+        values = (op.count + loops) / (n - 1) if n > 1 else np.ones(n)
+    elif measure == "weighted_degree":
+        values = op.degree.copy()
+    elif measure == "eigenvector":
+        values = eigenvector_vector(A)
+    elif measure == "pagerank":
+        pers = params.pop("personalization", None)
+        vec = None
+        if pers:
+            vec = np.zeros(op.n_nodes)
+            for node, w in pers.items():
+                vec[compiled.index[node]] = float(w)
+        values = pagerank_vector(A, personalization=vec, **params)
+    elif measure == "betweenness":
+        values = betweenness_vector(A, **params)
+    else:
+        raise ValueError(f"Unknown centrality measure: {measure}")
+
+    values.setflags(write=False)
+    with _CACHE_LOCK:
+        # احذف نتائج النسخ الأقدم لنفس الملف
+        for old in [k for k in _CACHE if k[0] == key[0] and k[1] != key[1]]:
+            del _CACHE[old]
+        _CACHE[key] = values
+        while len(_CACHE) > CENTRALITY_CACHE_SIZE:  # الأقدم استخدامًا أولًا
+            _CACHE.popitem(last=False)
+    return values
+
+def centrality(
+    measure: str = "degree",
+    compiled: Optional[CompiledGraph] = None,
+    **params
+) -> Dict[str, float]:
+    """نفس centrality_vector لكن كقاموس {عقدة: قيمة} مناسب لـ weakest_facets."""
+    compiled = compiled or get_compiled_graph()
+    return dict(zip(compiled.nodes, centrality_vector(measure, compiled, **params).tolist()))
+
+def centrality_suite(compiled: Optional[CompiledGraph] = None) -> Dict[str, Dict[str, float]]:
+    """كل المقاييس الأساسية دفعة واحدة (من الذاكرة المؤقتة إن توفرت)."""
+    return {
+        m: centrality(m, compiled)
+        for m in ("degree", "weighted_degree", "eigenvector", "pagerank", "betweenness")
+    }
@@ -1,7 +1,17 @@
 # core/graph/laplacian.py
 from __future__ import annotations
-from typing import Dict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import threading
+import weakref
 import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import cg, splu
+
+from core.utils.jit import HAVE_NUMBA, kernel
 
 def laplacian_smoothing(
     G: nx.Graph,
@@ -15,7 +25,20 @@ def laplacian_smoothing(
     - p=2.0 يعطي المتوسط العادي (Laplacian).
     - p!=2 يعطي تأثير غير خطي (p-Laplacian).
     - alpha يتحكم في قوة التحديث.
+    يستخدم المُشغّل المتفرق المشترك للشبكة (انظر operator_for).
     """
+    op = operator_for(G)
+    X = op.smooth(op.to_matrix([scores]), p=p, alpha=alpha, iterations=iterations)
+    return op.to_dicts(X, [scores])[0]
+
+def _laplacian_smoothing_python(
+    G: nx.Graph,
+    scores: Dict[str, float],
+    p: float = 2.0,
+    alpha: float = 0.5,
+    iterations: int = 5
+) -> Dict[str, float]:
+    """التنفيذ المرجعي عقدةً بعقدة (للاختبارات والمقارنة)."""
     x = scores.copy()
     for _ in range(iterations):
         new_x = x.copy()
@@ -27,7 +50,350 @@ def laplacian_smoothing(
             for nb in neigh:
                 w = G[node][nb].get("weight", 1.0)
                 diff = x[nb] - x[node]
+                if p != 2 and diff == 0:
+                    continue  # |0|^(p-2)·0 = 0 (تجنّب القسمة على صفر عندما p<2)
                 diff_sum += w * (abs(diff) ** (p - 2)) * diff if p != 2 else w * diff
             new_x[node] = x[node] + alpha * diff_sum / len(neigh)
         x = new_x
     return x
+
+# حتى هذا العرض (عدد المستخدمين) تتفوق النواة المُجمّعة؛ بعده يفوز أس NumPy المتجهي
+JIT_MAX_COLUMNS = 256
+
+def _p_laplacian_step_numpy(X, rows, cols, weights, incidence, p, alpha):
+    diff = X[cols] - X[rows]
+    mag = np.abs(diff)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        term = np.where(mag > 0, weights[:, None] * mag ** (p - 2) * diff, 0.0)
+    return X + alpha * (incidence @ term)
+
+def _warmup_p_laplacian(fn) -> None:
+    edges = np.array([0, 1], dtype=np.int64)
+    fn(np.ones((2, 2)), edges, edges[::-1].copy(), np.ones(2), np.ones(2), 1.5, 0.5)
+
+@kernel(warmup=_warmup_p_laplacian)
+def _p_laplacian_step_kernel(X, rows, cols, weights, count, p, alpha):
+    # مرور واحد على الحواف الموجهة دون مصفوفات وسيطة
+    out = X.copy()
+    for e in range(rows.size):
+        r = rows[e]
+        c = cols[e]
+        scale = alpha * weights[e] / count[r]
+        for j in range(X.shape[1]):
+            d = X[c, j] - X[r, j]
+            mag = abs(d)
+            if mag > 0.0:  # يتجاوز الصفر و NaN كما في بديل NumPy
+                out[r, j] += scale * mag ** (p - 2.0) * d
+    return out
+
+# ============================================================
+# 🔹 مُشغّل التنعيم المُجمّع (مصفوفات متفرقة)
+# ============================================================
+
+@dataclass(frozen=True)
+class SmoothingOperator:
+    """
+    صيغة مُجمّعة للشبكة تُبنى مرة واحدة وتُطبّق على مصفوفة (عقد × مستخدمين):
+    - adjacency: مصفوفة الأوزان المتماثلة (CSR).
+    - norm_adjacency: الأوزان مقسومة على عدد الجيران (كما في laplacian_smoothing).
+    - incidence: تجمع حدود الحواف الموجهة لكل عقدة مع نفس التطبيع (لـ p-Laplacian).
+    """
+    nodes: Tuple[str, ...]
+    index: Mapping[str, int]
+    adjacency: sp.csr_matrix
+    norm_adjacency: sp.csr_matrix
+    self_weight: np.ndarray
+    incidence: sp.csr_matrix
+    rows: np.ndarray
+    cols: np.ndarray
+    weights: np.ndarray
+    count: np.ndarray
+    degree: np.ndarray
+
+    @property
+    def has_neighbors(self) -> np.ndarray:
+        return self.count > 0
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.nodes)
+
+    def step(self, X: np.ndarray, p: float = 2.0, alpha: float = 0.5) -> np.ndarray:
+        """
+        تحديث واحد لكل الأعمدة معًا (نفس تحديث Jacobi في laplacian_smoothing).
+        p≠2 على دفعات ضيقة يمرّ بنواة numba، وإلا بالحواف المتجهة في NumPy.
+        """
+        if p == 2:
+            return X + alpha * (self.norm_adjacency @ X - self.self_weight[:, None] * X)
+        if HAVE_NUMBA and X.shape[1] <= JIT_MAX_COLUMNS:
+            return _p_laplacian_step_kernel(
+                np.asarray(X, dtype=float, order="C"), self.rows, self.cols, self.weights,
+                self.count, float(p), float(alpha),
+            )
+        return _p_laplacian_step_numpy(X, self.rows, self.cols, self.weights, self.incidence, p, alpha)
+
+    def smooth(
+        self,
+        X: np.ndarray,
+        p: float = 2.0,
+        alpha: float = 0.5,
+        iterations: int = 5
+    ) -> np.ndarray:
+        """
+        تنعيم مصفوفة (عقد × مستخدمين) أو متجه واحد بعدد ثابت من التكرارات.
+        """
+        X = np.asarray(X, dtype=float)
+        squeeze = X.ndim == 1
+        X = X[:, None] if squeeze else X.copy()
+        for _ in range(iterations):
+            X = self.step(X, p=p, alpha=alpha)
+        return X[:, 0] if squeeze else X
+
+    def smooth_until(
+        self,
+        X: np.ndarray,
+        p: float = 2.0,
+        alpha: float = 0.5,
+        *,
+        tol: float = 1e-4,
+        max_iter: int = 1000,
+        momentum: float = 0.0
+    ) -> Tuple[np.ndarray, int, float]:
+        """
+        تكرار التحديث حتى يصبح أكبر تغيّر (لكل الأعمدة) أقل من tol أو نبلغ max_iter.
+        momentum>0 يضيف تسريع الكرة الثقيلة: x += step + β·(x_k − x_{k−1}).
+        يرجع (النتيجة، عدد التكرارات المستخدمة، آخر قيمة للبقايا).
+        """
+        X = np.asarray(X, dtype=float)
+        squeeze = X.ndim == 1
+        X = X[:, None] if squeeze else X.copy()
+        prev = X
+        residual = np.inf
+        it = 0
+        while it < max_iter:
+            new = self.step(X, p=p, alpha=alpha)
+            if momentum:
+                new = new + momentum * (X - prev)
+            it += 1
+            residual = float(np.nanmax(np.abs(new - X))) if X.size else 0.0
+            prev, X = X, new
+            if residual < tol:
+                break
+        return (X[:, 0] if squeeze else X), it, residual
+
+    def laplacian(self) -> sp.csr_matrix:
+        """لابلاسيان الأوزان L = diag(degree) − W."""
+        return (sp.diags(self.degree) - self.adjacency).tocsr()
+
+    def steady_state(self, X: np.ndarray) -> np.ndarray:
+        """
+        الحل المغلق لنهاية التكرار عند p=2: كل مكوّن مترابط يتقارب إلى متوسط
+        درجاته موزونًا بعدد الجيران (مقدار لا يتغيّر عبر التحديثات).
+        """
+        X = np.asarray(X, dtype=float)
+        squeeze = X.ndim == 1
+        X = X[:, None] if squeeze else X
+        _, labels = connected_components(self.adjacency, directed=False)
+        member = sp.csr_matrix(
+            (np.ones(self.n_nodes), (np.arange(self.n_nodes), labels)),
+            shape=(self.n_nodes, labels.max() + 1 if labels.size else 0),
+        )
+        mass = member.T @ self.count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = (member.T @ (self.count[:, None] * np.nan_to_num(X))) / mass[:, None]
+        out = np.where(self.has_neighbors[:, None], member @ means, X)
+        return out[:, 0] if squeeze else out
+
+    def implicit_solve(
+        self,
+        X: np.ndarray,
+        diffusion_time: float,
+        *,
+        method: str = "direct",
+        tol: float = 1e-8,
+        max_iter: int = 1000
+    ) -> Tuple[np.ndarray, int, float]:
+        """
+        خطوة ضمنية مستقرة دائمًا لنفس الانتشار عند p=2:
+            (C + τ·L) x = C x₀،  C = diag(عدد الجيران)
+        تغطي نفس زمن الانتشار الكلي لـ τ/alpha تكرارًا صريحًا (تقريبًا لا مطابقةً:
+        تخمد المركبات عالية التردد أكثر). المصفوفة متماثلة موجبة،
+        فتُحل بتحليل LU مرة واحدة لكل الأعمدة (direct) أو بالتدرج المترافق (cg).
+        يرجع (النتيجة، عدد التكرارات، أكبر بقايا نسبية ‖Ax−b‖/‖b‖).
+        """
+        X = np.asarray(X, dtype=float)
+        squeeze = X.ndim == 1
+        X = X[:, None] if squeeze else X
+        c = np.where(self.has_neighbors, self.count, 1.0)
+        A = (sp.diags(c) + diffusion_time * self.laplacian()).tocsc()
+        B = c[:, None] * np.nan_to_num(X)
+        if method == "direct":
+            out = splu(A).solve(B)
+            iterations = 1
+        elif method == "cg":
+            out = np.empty_like(B)
+            iterations = 0
+            M = sp.diags(1.0 / A.diagonal())
+            for j in range(B.shape[1]):
+                counter = [0]
+
+                def _count(_):
+                    counter[0] += 1
+
+                out[:, j], _ = cg(A, B[:, j], x0=X[:, j], rtol=tol, maxiter=max_iter,
+                                  M=M, callback=_count)
+                iterations = max(iterations, counter[0])
+        else:
+            raise ValueError(f"Unknown implicit method: {method}")
+        norms = np.linalg.norm(B, axis=0)
+        res = np.linalg.norm(A @ out - B, axis=0) / np.where(norms > 0, norms, 1.0)
+        residual = float(res.max()) if res.size else 0.0
+        out = np.where(np.isnan(X), np.nan, out)
+        return (out[:, 0] if squeeze else out), iterations, residual
+
+    def to_matrix(self, scores: Sequence[Dict[str, float]]) -> np.ndarray:
+        """
+        يحوّل قائمة قواميس درجات إلى مصفوفة (عقد × مستخدمين).
+        العقد المعزولة الغائبة تبقى NaN ولا تُكتب في النتيجة.
+        """
+        X = np.full((self.n_nodes, len(scores)), np.nan)
+        for u, s in enumerate(scores):
+            for n, i in self.index.items():
+                if n in s:
+                    X[i, u] = float(s[n])
+                elif self.has_neighbors[i]:
+                    raise KeyError(n)
+        return X
+
+    def to_dicts(self, X: np.ndarray, scores: Sequence[Dict[str, float]]) -> List[Dict[str, float]]:
+        """يعيد كتابة النتائج فوق نسخ من القواميس الأصلية (مع إبقاء المفاتيح الإضافية)."""
+        out: List[Dict[str, float]] = []
+        for u, s in enumerate(scores):
+            x = dict(s)
+            for n, i in self.index.items():
+                if n in s:
+                    x[n] = float(X[i, u])
+            out.append(x)
+        return out
+
+def edge_arrays(G: nx.Graph, index: Dict[Any, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (rows, cols, weights) لكل ضلع في الاتجاهين، والحلقة الذاتية مرة واحدة
+    (weight الغائب = 1).
+    """
+    m = G.number_of_edges()
+    edges = G.edges(data="weight", default=1.0)
+    u = np.fromiter((index[a] for a, _, _ in edges), dtype=np.int64, count=m)
+    v = np.fromiter((index[b] for _, b, _ in edges), dtype=np.int64, count=m)
+    w = np.fromiter((float(x) for _, _, x in edges), dtype=float, count=m)
+    mirror = u != v
+    rows = np.concatenate([u, v[mirror]])
+    cols = np.concatenate([v, u[mirror]])
+    weights = np.concatenate([w, w[mirror]])
+    return rows, cols, weights
+
+def compile_operator(G: nx.Graph) -> SmoothingOperator:
+    """
+    يبني مُشغّل التنعيم من الشبكة مرة واحدة (الحلقات الذاتية تُحسب جارًا كما في networkx).
+    """
+    nodes = tuple(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+    n = len(nodes)
+    rows, cols, weights = edge_arrays(G, index)
+
+    count = np.bincount(rows, minlength=n).astype(float)
+    inv_count = np.divide(1.0, count, out=np.zeros(n), where=count > 0)
+    adjacency = sp.csr_matrix((weights, (rows, cols)), shape=(n, n))
+    degree = np.bincount(rows, weights=weights, minlength=n)
+    incidence = sp.csr_matrix(
+        (inv_count[rows], (rows, np.arange(rows.size))), shape=(n, rows.size)
+    )
+    return SmoothingOperator(
+        nodes=nodes,
+        index=MappingProxyType(index),
+        adjacency=adjacency,
+        norm_adjacency=sp.diags(inv_count) @ adjacency,
+        self_weight=inv_count * degree,
+        incidence=incidence,
+        rows=rows,
+        cols=cols,
+        weights=weights,
+        count=count,
+        degree=degree,
+    )
+
+_OPERATORS: "weakref.WeakKeyDictionary[nx.Graph, SmoothingOperator]" = weakref.WeakKeyDictionary()
+_OPERATORS_LOCK = threading.Lock()
+
+def operator_for(G: nx.Graph) -> SmoothingOperator:
+    """
+    المُشغّل المتفرق للشبكة. الشبكات المجمّدة (مثل شبكات السجل) تُجمّع مرة واحدة
+    ويُعاد استخدامها، أما الشبكات القابلة للتعديل فتُجمّع عند كل استدعاء.
+    """
+    if not nx.is_frozen(G):
+        return compile_operator(G)
+    with _OPERATORS_LOCK:
+        op = _OPERATORS.get(G)
+        if op is None:
+            op = _OPERATORS[G] = compile_operator(G)
+        return op
+
+def laplacian_smoothing_batch(
+    G: nx.Graph,
+    scores: Sequence[Dict[str, float]],
+    p: float = 2.0,
+    alpha: float = 0.5,
+    iterations: int = 5
+) -> List[Dict[str, float]]:
+    """
+    نفس laplacian_smoothing لعدد كبير من المستخدمين في استدعاء واحد.
+    """
+    op = operator_for(G)
+    X = op.smooth(op.to_matrix(scores), p=p, alpha=alpha, iterations=iterations)
+    return op.to_dicts(X, scores)
+
+def laplacian_smoothing_adaptive(
+    G: nx.Graph,
+    scores: Dict[str, float],
+    p: float = 2.0,
+    alpha: float = 0.5,
+    *,
+    method: str = "iterative",
+    tol: float = 1e-4,
+    max_iter: int = 1000,
+    momentum: float = 0.0,
+    diffusion_time: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    تنعيم بتحكّم في التقارب بدل عدد تكرارات ثابت:
+    - "iterative": نفس تحديث laplacian_smoothing حتى يصبح التغيّر < tol (مع momentum اختياري).
+    - "direct"/"cg" (p=2 فقط): بدون diffusion_time يرجع حالة الاستقرار بصيغة مغلقة،
+      ومع diffusion_time يحل الخطوة الضمنية المكافئة بتحليل مباشر أو تدرج مترافق.
+    يرجع {"scores", "iterations", "residual", "converged", "method"}.
+    """
+    op = operator_for(G)
+    X = op.to_matrix([scores])
+    if method == "iterative":
+        out, iterations, residual = op.smooth_until(
+            X, p=p, alpha=alpha, tol=tol, max_iter=max_iter, momentum=momentum
+        )
+        converged = residual < tol
+    elif method in ("direct", "cg"):
+        if p != 2:
+            raise ValueError("Closed-form/CG smoothing is only defined for the linear case p=2.")
+        if diffusion_time is None:
+            out, iterations, residual = op.steady_state(X), 0, 0.0
+        else:
+            out, iterations, residual = op.implicit_solve(
+                X, diffusion_time, method=method, tol=tol, max_iter=max_iter
+            )
+        converged = method == "direct" or residual <= tol
+    else:
+        raise ValueError(f"Unknown smoothing method: {method}")
+    return {
+        "scores": op.to_dicts(out, [scores])[0],
+        "iterations": iterations,
+        "residual": residual,
+        "converged": bool(converged),
+        "method": method,
+    }
@@ -0,0 +1,138 @@
+# core/graph/learning.py
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import hashlib
+import numpy as np
+import yaml
+from sklearn.covariance import graphical_lasso
+
+from core.questionnaire import load_questionnaire
+from core.storage.repository import iter_sessions
+from core.utils.io import ensure_dir
+from .builder import ROOT
+
+LEARNED_GRAPHS_DIR = ROOT / "configs" / "graphs"
+
+class CovarianceAccumulator:
+    """
+    مُراكم تباين مشترك قابل للدمج (خوارزمية Chan) يُغذّى على دفعات،
+    فلا يحتاج إلا متوسطًا ومصفوفة (أبعاد × أبعاد) مهما بلغ عدد الجلسات.
+    """
+
+    def __init__(self, n_features: int):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros((n_features, n_features))
+
+    def update(self, X: np.ndarray) -> None:
+        X = np.asarray(X, dtype=float)
+        m = X.shape[0]
+        if m == 0:
+            return
+        mean_b = X.mean(axis=0)
+        centered = X - mean_b
+        self.merge_stats(m, mean_b, centered.T @ centered)
+
+    def merge_stats(self, m: int, mean_b: np.ndarray, m2_b: np.ndarray) -> None:
+        total = self.n + m
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (m / total)
+        self.m2 = self.m2 + m2_b + np.outer(delta, delta) * (self.n * m / total)
+        self.n = total
+
+    def merge(self, other: "CovarianceAccumulator") -> None:
+        if other.n:
+            self.merge_stats(other.n, other.mean, other.m2)
+
+    def covariance(self) -> np.ndarray:
+        return self.m2 / max(1, self.n - 1)
+
+    def correlation(self) -> np.ndarray:
+        cov = self.covariance()
+        sd = np.sqrt(np.clip(np.diag(cov), 1e-12, None))
+        return cov / np.outer(sd, sd)
+
+def accumulate_scores(
+    chunks: Iterable[List[Dict[str, Any]]],
+    facets: Sequence[str]
+) -> CovarianceAccumulator:
+    """يمرّ على دفعات الجلسات ويراكم الجلسات المكتملة الأبعاد فقط."""
+    acc = CovarianceAccumulator(len(facets))
+    for chunk in chunks:
+        X = np.array(
+            [[float(s["scores"].get(f, np.nan)) for f in facets] for s in chunk],
+            dtype=float,
+        ).reshape(len(chunk), len(facets))
+        acc.update(X[~np.isnan(X).any(axis=1)])
+    return acc
+
+def partial_correlations(precision: np.ndarray) -> np.ndarray:
+    d = np.sqrt(np.diag(precision))
+    pcorr = -precision / np.outer(d, d)
+    np.fill_diagonal(pcorr, 1.0)
+    return pcorr
+
+def learn_graph(
+    facets: Optional[Sequence[str]] = None,
+    *,
+    alpha: float = 0.05,
+    threshold: float = 0.05,
+    positive_only: bool = True,
+    chunk_size: int = 50000,
+    chunks: Optional[Iterable[List[Dict[str, Any]]]] = None
+) -> Dict[str, Any]:
+    """
+    يتعلّم شبكة ارتباط جزئي متفرقة بين الأبعاد من الجلسات المخزنة:
+    - يراكم التباين على دفعات، ثم يطبّق graphical lasso على مصفوفة الارتباط.
+    - الحافة = ارتباط جزئي |ρ| ≥ threshold (الموجب فقط افتراضيًا لأن التنعيم يفترض تجاذبًا).
+    يرجع إعداد شبكة بنفس صيغة configs/graph.yaml مع version و meta.
+    """
+    facets = list(facets or load_questionnaire()["facets"])
+    acc = accumulate_scores(chunks if chunks is not None else iter_sessions(chunk_size), facets)
+    if acc.n < len(facets) + 1:
+        raise ValueError(f"Not enough complete sessions to learn a graph ({acc.n}).")
+
+    _, precision = graphical_lasso(acc.correlation(), alpha=alpha)
+    pcorr = partial_correlations(precision)
+
+    edges: List[List[Any]] = []
+    for i in range(len(facets)):
+        for j in range(i + 1, len(facets)):
+            rho = float(pcorr[i, j])
+            if abs(rho) < threshold or (positive_only and rho <= 0):
+                continue
+            edges.append([facets[i], facets[j], round(abs(rho), 4)])
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    digest = hashlib.sha1(yaml.safe_dump(edges, allow_unicode=True).encode("utf-8")).hexdigest()[:8]
+    return {
+        "version": f"{stamp}-{digest}",
+        "nodes": facets,
+        "edges": edges,
+        "meta": {
+            "method": "graphical_lasso",
+            "alpha": alpha,
+            "threshold": threshold,
+            "positive_only": positive_only,
+            "n_sessions": int(acc.n),
+        },
+    }
+
+def write_graph_config(cfg: Dict[str, Any], out_dir: Path = LEARNED_GRAPHS_DIR) -> Path:
+    """يكتب الإعداد في ملف مُرقّم بالنسخة يمكن تمريره إلى graph_from_config(path)."""
+    ensure_dir(out_dir)
+    path = out_dir / f"graph.learned.{cfg['version']}.yaml"
+    with path.open("w", encoding="utf-8") as f:
+        yaml.safe_dump(cfg, f, allow_unicode=True, sort_keys=False)
+    return path
+
+def latest_learned_graph(out_dir: Path = LEARNED_GRAPHS_DIR) -> Optional[Path]:
+    """أحدث شبكة متعلَّمة (أسماء الملفات مرتبة زمنيًا)."""
+    files = sorted(out_dir.glob("graph.learned.*.yaml"))
+    return files[-1] if files else None
+
+if __name__ == "__main__":
+    path = write_graph_config(learn_graph())
+    print(f"✅ Learned graph written to {path}")
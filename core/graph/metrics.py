@@ -2,9 +2,30 @@
 from __future__ import annotations
 from typing import Dict
 import networkx as nx
+import numpy as np
+
+from .laplacian import edge_arrays, operator_for
+
+# الشبكات المجمّدة تقرأ الدرجات من مُشغّلها المخزّن؛ أما القابلة للتعديل فتُحسب
+# مباشرة من الأضلاع دون تجميع المُشغّل كاملًا (مع مصفوفة الوقوع) في كل استدعاء.
 
 def degree_centrality(G: nx.Graph) -> Dict[str, float]:
-    return nx.degree_centrality(G)
+    """مثل nx.degree_centrality (الحلقة الذاتية تُحسب مرتين)."""
+    n = G.number_of_nodes()
+    if n <= 1:
+        return {node: 1.0 for node in G.nodes()}
+    if not nx.is_frozen(G):
+        return {node: d / (n - 1) for node, d in G.degree()}
+    op = operator_for(G)
+    loops = np.bincount(op.rows[op.rows == op.cols], minlength=n)
+    deg = op.count + loops
+    return dict(zip(op.nodes, (deg / (n - 1)).tolist()))
 
 def weighted_degree(G: nx.Graph) -> Dict[str, float]:
-    return {n: sum(d.get("weight", 1.0) for _, _, d in G.edges(n, data=True)) for n in G.nodes()}
+    """مجموع أوزان أضلاع كل عقدة (الحلقة الذاتية تُحسب مرة واحدة كما في المُشغّل)."""
+    if nx.is_frozen(G):
+        op = operator_for(G)
+        return dict(zip(op.nodes, op.degree.tolist()))
+    nodes = list(G.nodes())
+    rows, _, weights = edge_arrays(G, {node: i for i, node in enumerate(nodes)})
+    return dict(zip(nodes, np.bincount(rows, weights=weights, minlength=len(nodes)).tolist()))
@@ -0,0 +1,74 @@
+# core/graph/registry.py
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+import networkx as nx
+import scipy.sparse as sp
+import yaml
+
+from core.utils.io import FileCache, FileSnapshot
+from .builder import DEFAULT_GRAPH_PATH, build_graph
+from .laplacian import SmoothingOperator, operator_for
+
+@dataclass(frozen=True)
+class CompiledGraph:
+    """
+    شبكة مُجمّعة غير قابلة للتعديل ومشتركة بين الجلسات:
+    - graph: شبكة networkx مجمّدة (nx.freeze).
+    - index: موضع كل عقدة في المصفوفات.
+    - adjacency: مصفوفة الأوزان (CSR).
+    - version: بصمة محتوى ملف الإعداد.
+    """
+    path: Path
+    version: str
+    mtime_ns: int
+    size: int
+    graph: nx.Graph
+    nodes: Tuple[str, ...]
+    index: Mapping[str, int]
+    operator: SmoothingOperator
+
+    @property
+    def adjacency(self) -> sp.csr_matrix:
+        return self.operator.adjacency
+
+def compile_graph_config(snap: FileSnapshot) -> CompiledGraph:
+    """يبني الشبكة من محتوى ملف الإعداد ويجمّدها مع المُشغّل المتفرق."""
+    cfg = yaml.safe_load(snap.data.decode("utf-8")) if snap.data else {}
+    G = nx.freeze(build_graph(cfg or {}))
+    op = operator_for(G)
+    return CompiledGraph(
+        path=snap.path,
+        version=snap.version,
+        mtime_ns=snap.mtime_ns,
+        size=snap.size,
+        graph=G,
+        nodes=op.nodes,
+        index=op.index,
+        operator=op,
+    )
+
+class GraphRegistry:
+    """
+    ذاكرة مؤقتة للشبكات المُجمّعة حسب مسار الملف:
+    - إن لم يتغير (mtime, size) تُعاد النسخة المخزنة دون قراءة الملف.
+    - إن تغيّر الوقت فقط وبقيت البصمة نفسها لا يُعاد البناء.
+    - آمنة للاستخدام من عدة خيوط/جلسات Streamlit.
+    """
+
+    def __init__(self):
+        self._cache: FileCache[CompiledGraph] = FileCache(compile_graph_config)
+
+    def get(self, path: Optional[Path] = None) -> CompiledGraph:
+        return self._cache.get(Path(path or DEFAULT_GRAPH_PATH))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+_REGISTRY = GraphRegistry()
+
+def get_compiled_graph(path: Optional[Path] = None) -> CompiledGraph:
+    """الشبكة المُجمّعة المشتركة لملف الإعداد (الافتراضي configs/graph.yaml)."""
+    return _REGISTRY.get(path)
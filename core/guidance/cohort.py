@@ -0,0 +1,213 @@
+# core/guidance/cohort.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from core.storage.repository import iter_latest_sessions, save_cohort_plans
+from .planner import PlanItem
+from .scheduling import allocate_minutes
+
+# ============================================================
+# 🔹 التوصيات والخطط اليومية لمجموعة كاملة من المستخدمين دفعة واحدة
+#    نفس نتائج recommend_for_scores + build_daily_plan لكل مستخدم،
+#    لكن على مصفوفة درجات (مستخدمين × أبعاد) بعمليات متجهة.
+# ============================================================
+
+DEFAULT_TIP = "Tip: Apply a short focused practice in this facet."
+DEFAULT_ACTION = "Practice 10 minutes mindfully."
+
+Centrality = Union[Mapping[str, float], Sequence[float], np.ndarray, None]
+
+def _centrality_norm(facets: Sequence[str], centrality: Centrality) -> np.ndarray:
+    """تطبيع min-max للمركزية كما في weakest_facets (القاموس يُطبَّع على كل قيمه)."""
+    if centrality is None or len(centrality) == 0:
+        return np.zeros(len(facets))
+    if isinstance(centrality, Mapping):
+        values = np.fromiter(centrality.values(), dtype=float)
+        c = np.array([float(centrality.get(f, 0.0)) for f in facets])
+    else:
+        values = c = np.asarray(centrality, dtype=float)
+    c_min, c_max = values.min(), values.max()
+    if c_max == c_min:
+        return np.zeros(len(facets))
+    return (c - c_min) / (c_max - c_min)
+
+def cohort_priorities(
+    S: np.ndarray,
+    facets: Sequence[str],
+    centrality: Centrality = None,
+    *,
+    centrality_boost: float = 0.2
+) -> np.ndarray:
+    """
+    أولويات (مستخدمين × أبعاد): max(0, 100 − درجة) × (1 + boost × مركزية مطبّعة).
+    الدرجة الغائبة (NaN) → أولوية −inf فلا تُختار.
+    """
+    S = np.asarray(S, dtype=float)
+    boost = 1.0 + centrality_boost * _centrality_norm(facets, centrality)
+    P = np.maximum(0.0, 100.0 - S) * boost
+    return np.where(np.isnan(S), -np.inf, P)
+
+def top_k_facets(P: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    أعلى k أولويات لكل مستخدم بـ argpartition (O(أبعاد) لكل صف بدل الفرز الكامل).
+    التعادل يُحسم بترتيب الأعمدة كما في الفرز المستقر لـ weakest_facets.
+    يرجع (فهارس الأبعاد، الأولويات) بشكل (مستخدمين × k)؛ الخانات الفارغة = −1 / NaN.
+    """
+    P = np.asarray(P, dtype=float)
+    n, F = P.shape
+    k = min(k, F)
+    if k <= 0 or n == 0:
+        return np.empty((n, 0), dtype=np.int64), np.empty((n, 0))
+    kth = np.take_along_axis(P, np.argpartition(-P, k - 1, axis=1)[:, k - 1:k], axis=1)
+    above = P > kth
+    ties = P == kth
+    take = above | (ties & (np.cumsum(ties, axis=1) <= k - above.sum(axis=1, keepdims=True)))
+    idx = np.nonzero(take)[1].reshape(n, k)  # k أعمدة بالضبط لكل صف، بترتيب الأعمدة
+    pri = np.take_along_axis(P, idx, axis=1)
+    order = np.argsort(-pri, axis=1, kind="stable")
+    idx = np.take_along_axis(idx, order, axis=1)
+    pri = np.take_along_axis(pri, order, axis=1)
+    empty = np.isneginf(pri)
+    return np.where(empty, -1, idx), np.where(empty, np.nan, pri)
+
+def daily_minutes(priority: np.ndarray, minutes_per_day: int = 30) -> np.ndarray:
+    """دقائق الخطة اليومية لكل (مستخدم، توصية) بنفس توزيع build_daily_plan (أكبر باقٍ)."""
+    return allocate_minutes(priority, minutes_per_day)
+
+@dataclass(frozen=True)
+class CohortPlan:
+    """
+    خرج عمودي مضغوط: صف لكل مستخدم و k خانات مرتبة حسب الأولوية.
+    facet_idx = −1 يعني خانة فارغة (أبعاد أقل من k).
+    """
+    facets: Tuple[str, ...]
+    user_ids: np.ndarray
+    session_ids: np.ndarray
+    facet_idx: np.ndarray
+    priority: np.ndarray
+    minutes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def _cells(self, i: int) -> Iterator[Tuple[str, float, int]]:
+        for j, p, m in zip(self.facet_idx[i], self.priority[i], self.minutes[i]):
+            if j >= 0:
+                yield self.facets[j], float(p), int(m)
+
+    def user_plan(self, i: int, rules: Optional[Mapping[str, Sequence[str]]] = None) -> List[PlanItem]:
+        rules = rules or {}
+        return [
+            PlanItem(facet=f, action=(rules.get(f) or [DEFAULT_ACTION])[0], minutes=m)
+            for f, _, m in self._cells(i)
+            if m > 0  # مثل build_daily_plan: لا عناصر بصفر دقيقة
+        ]
+
+    def to_rows(
+        self,
+        rules: Optional[Mapping[str, Sequence[str]]] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """صفوف (توصيات، خطط يومية) جاهزة للإدراج الجماعي في المخزن."""
+        rules = rules or {}
+        recs, plans = [], []
+        for i, sid in enumerate(self.session_ids.tolist()):
+            items = []
+            for f, p, m in self._cells(i):
+                tips = list((rules.get(f) or [DEFAULT_TIP])[:3])
+                recs.append({"session_id": sid, "facet": f, "priority": p, "tips": tips})
+                if m > 0:
+                    action = (rules.get(f) or [DEFAULT_ACTION])[0]
+                    items.append({"facet": f, "action": action, "minutes": m})
+            plans.append({"session_id": sid, "type": "daily", "plan": items})
+        return recs, plans
+
+def build_cohort_plans(
+    S: np.ndarray,
+    facets: Sequence[str],
+    *,
+    centrality: Centrality = None,
+    k: int = 3,
+    minutes_per_day: int = 30,
+    user_ids: Optional[Sequence[str]] = None,
+    session_ids: Optional[Sequence[int]] = None,
+    centrality_boost: float = 0.2
+) -> CohortPlan:
+    """أولويات ← أعلى k ← دقائق يومية، لكل المستخدمين دفعة واحدة."""
+    S = np.asarray(S, dtype=float)
+    P = cohort_priorities(S, facets, centrality, centrality_boost=centrality_boost)
+    idx, pri = top_k_facets(P, k)
+    # نفس round(pr, 2) في recommend_for_scores (تقريب عشري صحيح، لا np.round بعد التحجيم)
+    pri = np.array([round(p, 2) for p in pri.ravel().tolist()], dtype=float).reshape(pri.shape)
+    n = S.shape[0]
+    return CohortPlan(
+        facets=tuple(facets),
+        user_ids=np.asarray(user_ids if user_ids is not None else [str(i) for i in range(n)], dtype=object),
+        session_ids=np.asarray(session_ids if session_ids is not None else np.full(n, -1), dtype=np.int64),
+        facet_idx=idx.astype(np.int32),
+        priority=pri,
+        minutes=daily_minutes(pri, minutes_per_day).astype(np.int16),
+    )
+
+# ============================================================
+# 🔹 المهمة الدورية: آخر جلسة لكل مستخدم ← خطط الأسبوع
+# ============================================================
+
+def score_matrix(
+    sessions: Sequence[Dict[str, Any]],
+    facets: Optional[Sequence[str]] = None
+) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """(الأبعاد، مصفوفة الدرجات) من قواميس scores؛ البعد الغائب = NaN."""
+    if facets is None:
+        facets = tuple(dict.fromkeys(f for s in sessions for f in s["scores"]))
+    col = {f: j for j, f in enumerate(facets)}
+    S = np.full((len(sessions), len(facets)), np.nan)
+    for i, s in enumerate(sessions):
+        for f, v in s["scores"].items():
+            j = col.get(f)
+            if j is not None and v is not None:
+                S[i, j] = float(v)
+    return tuple(facets), S
+
+def run_cohort_job(
+    *,
+    k: int = 3,
+    minutes_per_day: int = 30,
+    centrality: Centrality = None,
+    users_per_chunk: int = 10000,
+    chunk_size: int = 5000
+) -> int:
+    """
+    يبني توصيات وخطة يومية لكل مستخدم من آخر جلساته، على دفعات من المستخدمين،
+    ويحفظ كل دفعة في معاملة واحدة. يرجع عدد المستخدمين.
+    """
+    from .registry import get_rules
+    rules = get_rules().rules
+    if centrality is None:
+        from .rules import graph_centrality
+        centrality = graph_centrality()
+
+    written = 0
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        facets, S = score_matrix(batch)
+        plan = build_cohort_plans(
+            S, facets, centrality=centrality, k=k, minutes_per_day=minutes_per_day,
+            user_ids=[s["user_id"] for s in batch], session_ids=[s["id"] for s in batch],
+        )
+        save_cohort_plans(*plan.to_rows(rules))
+        return len(plan)
+
+    for chunk in iter_latest_sessions(chunk_size):
+        batch.extend(chunk)
+        if len(batch) >= users_per_chunk:
+            written += flush()
+            batch = []
+    if batch:
+        written += flush()
+    return written
+
+if __name__ == "__main__":
+    print(f"✅ Plans generated for {run_cohort_job()} users")
@@ -0,0 +1,59 @@
+# ============================================================
+# 📌 هندسة البصيرة Insight Engineering
+# ملف: core/guidance/defaults.py
+# الوظائف:
+#   - القواعد الافتراضية وتحليل guidance.yaml المشتركة بين
+#     rules.py وregistry.py وengine.py (دون استيراد دائري)
+# ============================================================
+
+from __future__ import annotations
+from typing import Any, Dict, List
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# ============================================================
+# 🔹 القواعد الافتراضية الأساسية
+# ============================================================
+
+DEFAULT_RULES: Dict[str, List[str]] = {
+    "Mind": [
+        "تنفّس واعٍ 5 دقائق + كتابة 3 أسطر عن فكرة تقلقك.",
+        "إيقاف مُشتتات 20 دقيقة (هاتف/إشعارات) ثم تركيز عميق."
+    ],
+    "Heart": [
+        "تواصل رحيم: أرسل رسالة تقدير لشخص قريب.",
+        "تمرين امتنان: اكتب شيئين ممتنًا لهما اليوم."
+    ],
+    "Body": [
+        "مشي خفيف 10–15 دقيقة أو تمدّد بسيط.",
+        "شرب ماء كافٍ وتقليل السكر اليوم."
+    ],
+    "Spirit": [
+        "ذكر/تأمل قصير 7 دقائق مع نية واضحة.",
+        "قراءة فقرة مُلهِمة وتطبيق معنى واحد عمليًا."
+    ],
+    "Relations": [
+        "مكالمة قصيرة لشخص لك عنده واجب عاطفي.",
+        "استماع نشط دون مقاطعة لمدة 5 دقائق."
+    ],
+    "Work": [
+        "اختَر مهمة واحدة فقط وأنهِها تمامًا (Pomodoro 25).",
+        "لائحة 3 أولويات واقعية لهذا اليوم."
+    ],
+}
+
+# ============================================================
+# 🔹 تحليل ملف الإعداد
+# ============================================================
+
+def parse_guidance_config(cfg: Dict[str, Any]) -> Dict[str, List[str]]:
+    """يحوّل محتوى guidance.yaml إلى قاموس مرتب: {facet: [tips]}"""
+    rules = cfg.get("rules", []) or []
+    by_facet: Dict[str, List[str]] = {}
+    for item in rules:
+        f = str(item.get("facet", "")).strip()
+        tip = str(item.get("tip", "")).strip()
+        if f and tip:
+            by_facet.setdefault(f, []).append(tip)
+    return by_facet
@@ -0,0 +1,242 @@
+# core/guidance/engine.py
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+import operator
+import re
+import threading
+import time
+import numpy as np
+import yaml
+
+from core.utils.io import FileCache, FileSnapshot
+from core.utils.messages import get_catalog
+from .defaults import ROOT
+
+DEFAULT_ENGINE_PATH = ROOT / "configs" / "guidance_rules.yaml"
+
+# مصدر كل ميزة في سجل المستخدم: (القسم، المفتاح)
+FEATURE_SOURCES: Dict[str, Tuple[str, str]] = {
+    "text_sentiment": ("text_analysis", "sentiment_label"),
+    "text_sentiment_score": ("text_analysis", "sentiment_score"),
+    "audio_stress": ("audio_analysis", "stress_index"),
+    "audio_sentiment": ("audio_analysis", "sentiment"),
+    "overall_health_index": ("wearable_analysis", "overall_health_index"),
+    "sleep_score": ("wearable_analysis", "sleep_score"),
+    "activity_score": ("wearable_analysis", "activity_score"),
+    "relaxation_index": ("wearable_analysis", "relaxation_index"),
+    "heart_health_index": ("wearable_analysis", "heart_health_index"),
+    "device_stress_score": ("wearable_analysis", "device_stress_score"),
+}
+FACET_PREFIX = "facet."
+
+# الميزات التصنيفية تُرمَّز أعدادًا لتُقارن في المصفوفة
+LABEL_CODES: Dict[str, float] = {"negative": -1.0, "neutral": 0.0, "positive": 1.0}
+
+_OPS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_CONDITION = re.compile(r"^\s*([\w.\-]+)\s*(==|!=|<=|>=|<|>)\s*(.+?)\s*$")
+_PRESENCE = re.compile(r"^\s*([\w.\-]+)\s+is\s+(present|missing)\s*$")
+
+Predicate = Callable[[np.ndarray], np.ndarray]
+
+def _source(feature: str) -> Tuple[str, str]:
+    if feature.startswith(FACET_PREFIX):
+        return "scores", feature[len(FACET_PREFIX):]
+    if feature not in FEATURE_SOURCES:
+        raise ValueError(f"Unknown guidance feature: {feature!r}")
+    return FEATURE_SOURCES[feature]
+
+def _encode(value: Any) -> float:
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        return LABEL_CODES.get(value.strip().lower(), np.nan)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def compile_condition(text: str, columns: Dict[str, int]) -> Predicate:
+    """
+    يحوّل شرطًا نصيًا إلى دالة متجهة على مصفوفة الميزات (مستخدمين × ميزات).
+    الميزة الغائبة (NaN) لا تحقق أي مقارنة، بما فيها !=.
+    """
+    m = _PRESENCE.match(text)
+    if m:
+        _source(m.group(1))
+        j = columns.setdefault(m.group(1), len(columns))
+        if m.group(2) == "present":
+            return lambda X: ~np.isnan(X[:, j])
+        return lambda X: np.isnan(X[:, j])
+    m = _CONDITION.match(text)
+    if not m:
+        raise ValueError(f"Cannot parse guidance condition: {text!r}")
+    feature, op, raw = m.groups()
+    _source(feature)
+    raw = raw.strip("'\"")
+    try:
+        value = float(raw)
+    except ValueError:
+        if raw.lower() not in LABEL_CODES:
+            raise ValueError(f"Unknown label {raw!r} in condition {text!r}")
+        value = LABEL_CODES[raw.lower()]
+    j = columns.setdefault(feature, len(columns))
+    fn = _OPS[op]
+    return lambda X: ~np.isnan(X[:, j]) & fn(X[:, j], value)
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: str
+    group: Optional[str]
+    message: str
+    mood: Optional[str]
+    predicates: Tuple[Predicate, ...]
+
+    def mask(self, X: np.ndarray) -> np.ndarray:
+        out = np.ones(X.shape[0], dtype=bool)
+        for p in self.predicates:
+            out &= p(X)
+        return out
+
+class RuleEngine:
+    """
+    محرك قواعد إرشاد تصريحي مُجمّع من الإعداد:
+    - features: أعمدة مصفوفة الميزات (الميزات المذكورة في القواعد فقط).
+    - evaluate(X) يرجع قناع إصابات (مستخدمين × قواعد) مع تطبيق تنافي المجموعات.
+    - عدّادات الإصابات وأزمنة التقييم لكل قاعدة متاحة عبر stats() (آمنة بين الخيوط).
+    - message معرّف في كتالوج الرسائل (أو نص حرفي)؛ نصوص كل لغة تُحلّ مرة واحدة.
+    """
+
+    def __init__(self, rules: Sequence[Dict[str, Any]]):
+        columns: Dict[str, int] = {}
+        compiled = []
+        for i, item in enumerate(rules):
+            when = item.get("when") or []
+            compiled.append(CompiledRule(
+                id=str(item.get("id") or f"rule_{i}"),
+                group=item.get("group"),
+                message=str(item.get("message", "")),
+                mood=item.get("mood"),
+                predicates=tuple(compile_condition(c, columns) for c in when),
+            ))
+        self.rules: Tuple[CompiledRule, ...] = tuple(compiled)
+        self.features: Tuple[str, ...] = tuple(sorted(columns, key=columns.get))
+        self._lock = threading.Lock()
+        self._texts: Dict[str, Tuple[Any, Tuple[str, ...]]] = {}
+        self.reset_stats()
+
+    @classmethod
+    def from_config(cls, cfg: Mapping[str, Any]) -> "RuleEngine":
+        return cls(cfg.get("rules", []) or [])
+
+    @property
+    def rule_ids(self) -> Tuple[str, ...]:
+        return tuple(r.id for r in self.rules)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits = np.zeros(len(self.rules), dtype=np.int64)
+            self._seconds = np.zeros(len(self.rules))
+            self._rows = 0
+            self._calls = 0
+
+    def feature_matrix(self, records: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """
+        سجلات المستخدمين → مصفوفة (مستخدمين × features) مع NaN للقيم الغائبة.
+        السجل: {"text_analysis", "audio_analysis", "wearable_analysis", "scores"} (كلها اختيارية).
+        """
+        sources = [_source(f) for f in self.features]
+        return np.array(
+            [[_encode((rec.get(section) or {}).get(key)) for section, key in sources] for rec in records],
+            dtype=float,
+        ).reshape(len(records), len(self.features))
+
+    def evaluate(self, X: np.ndarray) -> np.ndarray:
+        """قناع الإصابات (مستخدمين × قواعد)؛ في كل مجموعة تفوز أول قاعدة متحققة."""
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.features))
+        mask = np.zeros((X.shape[0], len(self.rules)), dtype=bool)
+        taken: Dict[str, np.ndarray] = {}
+        seconds = np.zeros(len(self.rules))
+        for i, rule in enumerate(self.rules):
+            start = time.perf_counter()
+            hit = rule.mask(X)
+            if rule.group is not None:
+                prev = taken.get(rule.group)
+                if prev is not None:
+                    hit &= ~prev
+                    prev |= hit
+                else:
+                    taken[rule.group] = hit.copy()
+            mask[:, i] = hit
+            seconds[i] = time.perf_counter() - start
+        with self._lock:
+            self._hits += mask.sum(axis=0)
+            self._seconds += seconds
+            self._rows += X.shape[0]
+            self._calls += 1
+        return mask
+
+    def texts(self, lang: str = "en") -> Tuple[str, ...]:
+        """نص رسالة كل قاعدة باللغة lang (الإنجليزية لغير المدعومة)، محلول مرة لكل نسخة من الكتالوج."""
+        catalog = get_catalog()
+        lang = catalog.resolve_locale(lang)
+        cached = self._texts.get(lang)
+        if cached is None or cached[0] is not catalog:
+            texts = tuple(catalog.get(r.message, lang) if r.message in catalog else r.message for r in self.rules)
+            self._texts[lang] = cached = (catalog, texts)
+        return cached[1]
+
+    def messages(self, mask: np.ndarray, lang: str = "en") -> List[List[str]]:
+        """الرسائل المتحققة لكل مستخدم بترتيب القواعد."""
+        texts = self.texts(lang)
+        return [[texts[i] for i in np.flatnonzero(row)] for row in mask]
+
+    def moods(self, mask: np.ndarray) -> List[Optional[str]]:
+        """المزاج من أول قاعدة متحققة تحمل mood (أو None)."""
+        has = np.array([r.mood is not None for r in self.rules], dtype=bool)
+        moods = [r.mood for r in self.rules]
+        out = []
+        for row in mask & has:
+            idx = np.flatnonzero(row)
+            out.append(moods[idx[0]] if idx.size else None)
+        return out
+
+    def run(self, records: Sequence[Mapping[str, Any]], lang: str = "en") -> Dict[str, Any]:
+        mask = self.evaluate(self.feature_matrix(records))
+        return {"mask": mask, "messages": self.messages(mask, lang), "mood": self.moods(mask)}
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """لكل قاعدة: عدد الإصابات ونسبتها والزمن الكلي للتقييم (ms)."""
+        with self._lock:
+            rows = max(1, self._rows)
+            return [
+                {
+                    "rule": r.id,
+                    "hits": int(self._hits[i]),
+                    "hit_rate": round(float(self._hits[i]) / rows, 4),
+                    "total_ms": round(float(self._seconds[i]) * 1000, 3),
+                    "evaluations": self._calls,
+                }
+                for i, r in enumerate(self.rules)
+            ]
+
+def _load_engine(snap: FileSnapshot) -> RuleEngine:
+    cfg = yaml.safe_load(snap.data.decode("utf-8")) if snap.data else None
+    return RuleEngine.from_config(cfg or {})
+
+_ENGINES: FileCache[RuleEngine] = FileCache(_load_engine)
+
+def get_engine(path: Optional[Path] = None) -> RuleEngine:
+    """
+    المحرك المُجمّع المشترك لملف القواعد؛ يُعاد تجميعه فقط عند تغيّر محتواه
+    (فتُصفَّر عدّاداته مع النسخة الجديدة).
+    """
+    return _ENGINES.get(Path(path or DEFAULT_ENGINE_PATH))
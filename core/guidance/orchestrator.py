@@ -0,0 +1,177 @@
+# core/guidance/orchestrator.py
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Union
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from core.features.audio_features import analyze_audio_emotions
+from core.features.signal_features import analyze_wearable_signals
+from core.features.text_features import analyze_text_sentiment
+from .rules import recommendations_from_analysis
+
+# المهلة القصوى (ثوانٍ) لكل وسيط؛ الصوت (librosa) هو الأبطأ عادةً
+DEFAULT_TIMEOUTS: Dict[str, float] = {"text": 2.0, "audio": 8.0, "wearable": 1.0}
+
+# حالة كل وسيط في النتيجة (busy = رُفض لأن مجمّع الصوت ممتلئ)
+OK, TIMED_OUT, FAILED, BUSY = "ok", "timed_out", "error", "busy"
+
+# مجمّع خيوط مشترك للوسائط الخفيفة (النص والأجهزة)
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="modality")
+
+# الصوت في مجمّع مستقل محدود: مهام librosa المتأخرة تُكمل في الخلفية دون أن تحجز
+# خيوط الوسائط الأخرى، ومع امتلاء خاناته تُرفض مهام الصوت الجديدة فورًا (BUSY)
+AUDIO_WORKERS = 2
+AUDIO_MAX_INFLIGHT = 4
+_AUDIO_EXECUTOR = ThreadPoolExecutor(max_workers=AUDIO_WORKERS, thread_name_prefix="audio")
+_AUDIO_SLOTS = threading.BoundedSemaphore(AUDIO_MAX_INFLIGHT)
+
+_SECTIONS = {"text": "text_analysis", "audio": "audio_analysis"}
+
+def resolve_timeouts(timeouts: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    مهل الطلب فوق DEFAULT_TIMEOUTS: المهلة المطلوبة لا تتجاوز الافتراضية (تُقصّ إليها)،
+    و ValueError لمفتاح غير معروف أو قيمة غير موجبة.
+    """
+    limits = dict(DEFAULT_TIMEOUTS)
+    for name, value in (timeouts or {}).items():
+        if name not in DEFAULT_TIMEOUTS:
+            raise ValueError(f"Unknown modality timeout {name!r}; expected one of {', '.join(DEFAULT_TIMEOUTS)}")
+        value = float(value)
+        if not value > 0:
+            raise ValueError(f"Timeout for {name!r} must be positive")
+        limits[name] = min(value, DEFAULT_TIMEOUTS[name])
+    return limits
+
+def _analyze_audio_bytes(data: bytes) -> Dict[str, Any]:
+    """يحلل تسجيلًا مرفوعًا عبر ملف مؤقت يُحذف عند انتهاء المهمة (حتى بعد انتهاء المهلة)."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
+        tmp.write(data)
+        path = tmp.name
+    try:
+        return analyze_audio_emotions(path)
+    finally:
+        os.unlink(path)
+
+def _jobs(
+    text: Optional[str],
+    audio: Union[str, bytes, None],
+    signals: Optional[Dict[str, Any]]
+) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    jobs: Dict[str, Callable[[], Dict[str, Any]]] = {}
+    if text:
+        jobs["text"] = partial(analyze_text_sentiment, text)
+    if isinstance(audio, (bytes, bytearray)):
+        jobs["audio"] = partial(_analyze_audio_bytes, bytes(audio))
+    elif audio:
+        jobs["audio"] = partial(analyze_audio_emotions, audio)
+    jobs["wearable"] = partial(analyze_wearable_signals, signals or {})
+    return jobs
+
+def _submit(name: str, job: Callable[[], Dict[str, Any]], executor: Optional[ThreadPoolExecutor]) -> Optional[Future]:
+    """يرسل المهمة لمجمّعها؛ None إن كانت خانات الصوت كلها مشغولة."""
+    if name != "audio":
+        return (executor or _EXECUTOR).submit(_timed, job)
+    if not _AUDIO_SLOTS.acquire(blocking=False):
+        return None
+    fut = _AUDIO_EXECUTOR.submit(_timed, job)
+    fut.add_done_callback(lambda _: _AUDIO_SLOTS.release())
+    return fut
+
+def _timed(job: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    result = job()
+    return {"result": result, "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+def _status(name: str, outcome: Any, timeout: float) -> Dict[str, Any]:
+    """يحوّل نتيجة وسيط (أو استثناءه/انتهاء مهلته) إلى سجل حالة موحّد."""
+    if outcome is None:
+        return {"status": BUSY, "pending": False}
+    if isinstance(outcome, (FutureTimeout, asyncio.TimeoutError)):
+        return {"status": TIMED_OUT, "pending": True, "timeout_s": timeout}
+    if isinstance(outcome, Exception):
+        return {"status": FAILED, "pending": False, "error": str(outcome)}
+    result = outcome["result"]
+    if isinstance(result, dict) and "error" in result:
+        return {"status": FAILED, "pending": False, "error": result["error"], "elapsed_ms": outcome["elapsed_ms"]}
+    return {"status": OK, "pending": False, "elapsed_ms": outcome["elapsed_ms"], "result": result}
+
+def _assemble(
+    statuses: Dict[str, Dict[str, Any]],
+    lang: str,
+    started: float
+) -> Dict[str, Any]:
+    """يبني التوصيات من الوسائط المكتملة فقط ويُرفق حالة كل وسيط."""
+    emotional_data = {
+        _SECTIONS[name]: st["result"]
+        for name, st in statuses.items()
+        if name in _SECTIONS and st["status"] == OK
+    }
+    wearable = statuses.get("wearable", {})
+    wearable_analysis = wearable.get("result", {}) if wearable.get("status") == OK else {}
+    out = recommendations_from_analysis(emotional_data, wearable_analysis, lang=lang)
+    out["modalities"] = {name: {k: v for k, v in st.items() if k != "result"} for name, st in statuses.items()}
+    out["partial"] = any(st["status"] != OK for st in statuses.values())
+    out["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return out
+
+def build_guidance_concurrent(
+    text: str = None,
+    audio: Union[str, bytes, None] = None,
+    signals: Dict[str, Any] = None,
+    lang: str = "en",
+    timeouts: Optional[Dict[str, float]] = None,
+    executor: Optional[ThreadPoolExecutor] = None
+) -> Dict[str, Any]:
+    """
+    نفس build_guidance_recommendations لكن الوسائط الثلاثة تعمل بالتوازي:
+    - audio مسار محلي (للاستخدام الداخلي) أو بايتات تسجيل مرفوع.
+    - لكل وسيط مهلة محسوبة من بداية الطلب؛ المتأخر يُعلَّم timed_out/pending
+      ويُكمل في الخلفية دون أن يؤخر الرد.
+    - الزمن الكلي ≈ أبطأ وسيط مكتمل (أو أكبر مهلة)، لا مجموع الأزمنة.
+    """
+    limits = resolve_timeouts(timeouts)
+    started = time.perf_counter()
+    futures = {name: _submit(name, job, executor) for name, job in _jobs(text, audio, signals).items()}
+
+    statuses: Dict[str, Dict[str, Any]] = {}
+    for name, fut in futures.items():
+        outcome = None
+        if fut is not None:
+            remaining = max(0.0, started + limits[name] - time.perf_counter())
+            try:
+                outcome = fut.result(timeout=remaining)
+            except Exception as e:  # TimeoutError أو خطأ داخل الوسيط
+                outcome = e
+        statuses[name] = _status(name, outcome, limits[name])
+    return _assemble(statuses, lang, started)
+
+async def build_guidance_async(
+    text: str = None,
+    audio: Union[str, bytes, None] = None,
+    signals: Dict[str, Any] = None,
+    lang: str = "en",
+    timeouts: Optional[Dict[str, float]] = None,
+    executor: Optional[ThreadPoolExecutor] = None
+) -> Dict[str, Any]:
+    """النسخة غير المتزامنة (لخادم FastAPI): نفس المهل والحالات دون حجز حلقة الأحداث."""
+    limits = resolve_timeouts(timeouts)
+    started = time.perf_counter()
+    jobs = _jobs(text, audio, signals)
+
+    async def run(name: str, job: Callable[[], Dict[str, Any]]):
+        fut = _submit(name, job, executor)
+        if fut is None:
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), limits[name])
+        except Exception as e:  # CancelledError (قطع الاتصال/الإيقاف) يمرّ كما هو
+            return e
+
+    outcomes = await asyncio.gather(*(run(name, job) for name, job in jobs.items()))
+    statuses = {name: _status(name, outcome, limits[name]) for name, outcome in zip(jobs, outcomes)}
+    return _assemble(statuses, lang, started)
@@ -1,8 +1,10 @@
 # core/guidance/planner.py
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence, Union
 from dataclasses import dataclass
+import numpy as np
 from .rules import Recommendation
+from .scheduling import WEEKDAYS, allocate_minutes, schedule_week, weekly_minutes
 
 @dataclass
 class PlanItem:
@@ -12,39 +14,44 @@ class PlanItem:
 
 def build_daily_plan(recs: List[Recommendation], minutes_per_day: int = 30) -> List[PlanItem]:
     """
-    يبني خطة يومية موزعة على التوصيات حسب الأولوية، بحد زمني إجمالي.
+    يبني خطة يومية موزعة على التوصيات حسب الأولوية، مجموع دقائقها = minutes_per_day بالضبط
+    (دقيقة على الأقل لكل توصية ثم طريقة أكبر باقٍ). إن كانت الدقائق أقل من عدد التوصيات
+    تُحذف التوصيات التي لم تنل دقيقة فلا تظهر عناصر بصفر دقيقة.
     """
     if not recs:
         return []
-    # توزيع بسيط: أكثر أولوية يأخذ دقائق أكثر
-    total_priority = sum(r.priority for r in recs) or 1.0
-    items: List[PlanItem] = []
-    for r in recs:
-        share = max(1, int((r.priority / total_priority) * minutes_per_day))
-        tip = r.tips[0] if r.tips else "Practice 10 minutes mindfully."
-        items.append(PlanItem(facet=r.facet, action=tip, minutes=share))
-    # ضبط المجموع إلى السقف
-    total = sum(i.minutes for i in items)
-    if total > minutes_per_day:
-        # قلّص آخر عنصر
-        items[-1].minutes = max(1, items[-1].minutes - (total - minutes_per_day))
-    return items
+    minutes = allocate_minutes(np.array([r.priority for r in recs], dtype=float), minutes_per_day)
+    return [
+        PlanItem(facet=r.facet, action=r.tips[0] if r.tips else "Practice 10 minutes mindfully.", minutes=int(m))
+        for r, m in zip(recs, minutes)
+        if m > 0
+    ]
 
-def build_weekly_plan(recs: List[Recommendation]) -> Dict[str, List[PlanItem]]:
+def build_weekly_plan(
+    recs: List[Recommendation],
+    *,
+    minutes_per_week: Optional[int] = None,
+    sessions_per_item: int = 2,
+    day_capacity: Union[int, Sequence[int]] = 60,
+    day_load: Optional[Sequence[int]] = None,
+    min_gap: int = 2
+) -> Dict[str, List[PlanItem]]:
     """
-    يبني خطة أسبوعية بسيطة: يوزّع كل توصية على يومين مختلفين لمرونة التنفيذ.
+    يبني خطة أسبوعية: دقائق كل توصية حسب أولويتها (افتراضيًا 40 دقيقة لكل توصية في المتوسط)
+    موزعة على sessions_per_item جلسات في أيام متباعدة، مع احترام سعة كل يوم وحمله الحالي.
     """
     if not recs:
         return {}
-    weekdays = ["Sat","Sun","Mon","Tue","Wed","Thu","Fri"]
-    week: Dict[str, List[PlanItem]] = {d: [] for d in weekdays}
-    # ثبّت 20 دقيقة لكل توصية يومين بالأسبوع
-    minutes = 20
-    day_idx = 0
-    for r in recs:
-        for _ in range(2):
-            day = weekdays[day_idx % len(weekdays)]
-            tip = r.tips[_ % len(r.tips)] if r.tips else "Practice 15 minutes mindfully."
-            week[day].append(PlanItem(facet=r.facet, action=tip, minutes=minutes))
-            day_idx += 1
+    budget = minutes_per_week if minutes_per_week is not None else 40 * len(recs)
+    sessions = weekly_minutes([r.priority for r in recs], budget, sessions_per_item)
+    days = schedule_week(sessions, day_capacity=day_capacity, day_load=day_load, min_gap=min_gap)
+
+    week: Dict[str, List[PlanItem]] = {d: [] for d in WEEKDAYS}
+    placed = sorted(
+        (d, i, j) for i, item_days in enumerate(days) for j, d in enumerate(item_days)
+    )
+    for d, i, j in placed:
+        r = recs[i]
+        tip = r.tips[j % len(r.tips)] if r.tips else "Practice 15 minutes mindfully."
+        week[WEEKDAYS[d]].append(PlanItem(facet=r.facet, action=tip, minutes=sessions[i][j]))
     return week
@@ -0,0 +1,75 @@
+# core/guidance/registry.py
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+import yaml
+
+from core.utils.io import FileCache, FileSnapshot
+from .defaults import DEFAULT_RULES, ROOT, parse_guidance_config
+
+DEFAULT_GUIDANCE_PATH = ROOT / "configs" / "guidance.yaml"
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """
+    قواعد الإرشاد المدموجة (الافتراضية + الملف) بصيغة غير قابلة للتعديل:
+    rules: {facet: (tips...)} بترتيب الإضافة ودون تكرار.
+    """
+    path: Path
+    version: str
+    mtime_ns: int
+    size: int
+    rules: Mapping[str, Tuple[str, ...]]
+
+    def get(self, facet: str) -> Tuple[str, ...]:
+        return self.rules.get(facet, ())
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        """نسخة قابلة للتعديل (قوائم جديدة) بصيغة merge_rules القديمة."""
+        return {facet: list(tips) for facet, tips in self.rules.items()}
+
+def compile_rules(snap: FileSnapshot) -> CompiledRules:
+    """
+    يدمج القواعد مرة واحدة: قاموس مرتب لكل بُعد يعمل كمجموعة (عضوية O(1))
+    ثم يُجمّد إلى tuples داخل MappingProxyType.
+    """
+    cfg = yaml.safe_load(snap.data.decode("utf-8")) if snap.data else {}
+    merged: Dict[str, Dict[str, None]] = {
+        facet: dict.fromkeys(tips) for facet, tips in DEFAULT_RULES.items()
+    }
+    for facet, tips in parse_guidance_config(cfg or {}).items():
+        seen = merged.setdefault(facet, {})
+        for tip in tips:
+            seen.setdefault(tip)
+    return CompiledRules(
+        path=snap.path,
+        version=snap.version,
+        mtime_ns=snap.mtime_ns,
+        size=snap.size,
+        rules=MappingProxyType({facet: tuple(tips) for facet, tips in merged.items()}),
+    )
+
+class RuleRegistry:
+    """
+    ذاكرة مؤقتة لقواعد الإرشاد المُجمّعة حسب مسار الملف (نفس نهج GraphRegistry):
+    - إن لم يتغير (mtime, size) تُعاد النسخة المخزنة دون قراءة الملف.
+    - إن تغيّر الوقت فقط وبقيت البصمة نفسها لا يُعاد الدمج.
+    - آمنة للاستخدام من عدة خيوط/جلسات Streamlit.
+    """
+
+    def __init__(self):
+        self._cache: FileCache[CompiledRules] = FileCache(compile_rules)
+
+    def get(self, path: Optional[Path] = None) -> CompiledRules:
+        return self._cache.get(Path(path or DEFAULT_GUIDANCE_PATH))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+_REGISTRY = RuleRegistry()
+
+def get_rules(path: Optional[Path] = None) -> CompiledRules:
+    """قواعد الإرشاد المُجمّعة المشتركة (الافتراضي configs/guidance.yaml)."""
+    return _REGISTRY.get(path)
@@ -10,47 +10,18 @@
 
 from __future__ import annotations
 from typing import Dict, List, Tuple, Optional, Any
-from pathlib import Path
 from dataclasses import dataclass, field
 
 # 🛠️ استدعاء أدوات التحليل
 from core.utils.io import read_yaml
+from core.utils.messages import get_catalog
+from core.graph.centrality import centrality
 from core.features.text_features import analyze_text_sentiment
 from core.features.audio_features import analyze_audio_emotions
 from core.features.signal_features import analyze_wearable_signals
-
-ROOT = Path(__file__).resolve().parents[2]
-
-# ============================================================
-# 🔹 القواعد الافتراضية الأساسية
-# ============================================================
-
-DEFAULT_RULES: Dict[str, List[str]] = {
-    "Mind": [
-        "تنفّس واعٍ 5 دقائق + كتابة 3 أسطر عن فكرة تقلقك.",
-        "إيقاف مُشتتات 20 دقيقة (هاتف/إشعارات) ثم تركيز عميق."
-    ],
-    "Heart": [
-        "تواصل رحيم: أرسل رسالة تقدير لشخص قريب.",
-        "تمرين امتنان: اكتب شيئين ممتنًا لهما اليوم."
-    ],
-    "Body": [
-        "مشي خفيف 10–15 دقيقة أو تمدّد بسيط.",
-        "شرب ماء كافٍ وتقليل السكر اليوم."
-    ],
-    "Spirit": [
-        "ذكر/تأمل قصير 7 دقائق مع نية واضحة.",
-        "قراءة فقرة مُلهِمة وتطبيق معنى واحد عمليًا."
-    ],
-    "Relations": [
-        "مكالمة قصيرة لشخص لك عنده واجب عاطفي.",
-        "استماع نشط دون مقاطعة لمدة 5 دقائق."
-    ],
-    "Work": [
-        "اختَر مهمة واحدة فقط وأنهِها تمامًا (Pomodoro 25).",
-        "لائحة 3 أولويات واقعية لهذا اليوم."
-    ],
-}
+from .defaults import DEFAULT_RULES, ROOT, parse_guidance_config
+from .engine import get_engine
+from .registry import get_rules
 
 @dataclass
 class Recommendation:
@@ -66,29 +37,16 @@ def load_guidance_config() -> Dict[str, List[str]]:
     """
     يقرأ configs/guidance.yaml ويعيد قاموسًا مرتبًا: {facet: [tips]}
     """
-    cfg = read_yaml(ROOT / "configs" / "guidance.yaml")
-    rules = cfg.get("rules", []) or []
-    by_facet: Dict[str, List[str]] = {}
-    for item in rules:
-        f = str(item.get("facet", "")).strip()
-        tip = str(item.get("tip", "")).strip()
-        if f and tip:
-            by_facet.setdefault(f, []).append(tip)
-    return by_facet
+    return parse_guidance_config(read_yaml(ROOT / "configs" / "guidance.yaml"))
 
 
 def merge_rules() -> Dict[str, List[str]]:
     """
-    يدمج القواعد الافتراضية مع القواعد المضافة من configs/guidance.yaml
+    يدمج القواعد الافتراضية مع القواعد المضافة من configs/guidance.yaml.
+    يُرجع نسخة جديدة من السجل المشترك (لا يُقرأ الملف إلا إذا تغيّر)،
+    فتعديلها لا يمس DEFAULT_RULES ولا السجل.
     """
-    file_rules = load_guidance_config()
-    merged = DEFAULT_RULES.copy()
-    for facet, tips in file_rules.items():
-        merged.setdefault(facet, [])
-        for t in tips:
-            if t not in merged[facet]:
-                merged[facet].append(t)
-    return merged
+    return get_rules().as_dict()
 
 # ============================================================
 # 🔹 تحديد الأبعاد الأضعف حسب الدرجات
@@ -128,6 +86,13 @@ def weakest_facets(
     return priorities[:k]
 
 
+def graph_centrality(measure: str = "degree") -> Dict[str, float]:
+    """
+    مركزية الأبعاد من الشبكة المشتركة، محسوبة مرة واحدة لكل نسخة من ملف الشبكة.
+    """
+    return centrality(measure)
+
+
 def recommend_for_scores(
     scores: Dict[str, float],
     *,
@@ -137,14 +102,16 @@ def recommend_for_scores(
 ) -> List[Recommendation]:
     """
     يولّد توصيات لأضعف k أبعاد بناءً على الدرجات الحالية.
+    بدون rules تُستخدم القواعد المُجمّعة من سجل الإرشاد المشترك.
     """
-    rules = rules or merge_rules()
+    if not rules:
+        rules = get_rules().rules
     weak = weakest_facets(scores, k=k, centrality=centrality)
 
     recs: List[Recommendation] = []
     for facet, pr in weak:
-        tips = rules.get(facet, []) or ["Tip: Apply a short focused practice in this facet."]
-        recs.append(Recommendation(facet=facet, priority=round(pr, 2), tips=tips[:3]))
+        tips = rules.get(facet) or ["Tip: Apply a short focused practice in this facet."]
+        recs.append(Recommendation(facet=facet, priority=round(pr, 2), tips=list(tips[:3])))
     return recs
 
 # ============================================================
@@ -174,49 +141,27 @@ def build_guidance_recommendations(
     - تحليل النصوص
     - تحليل الصوت
     - تحليل بيانات الأجهزة القابلة للارتداء
+    القواعد نفسها في configs/guidance_rules.yaml (انظر core/guidance/engine.py).
     """
     emotional_data = evaluate_emotional_state(text=text, audio_path=audio_path)
     wearable_analysis = analyze_wearable_signals(signals or {})
+    return recommendations_from_analysis(emotional_data, wearable_analysis, lang=lang)
 
-    recommendations: List[str] = []
-    mood = None
-
-    # 🧠 تحليل مشاعر النصوص
-    if emotional_data.get("text_analysis"):
-        text_sentiment = emotional_data["text_analysis"].get("sentiment", "neutral")
-        if text_sentiment == "positive":
-            recommendations.append("🌟 Great! Keep maintaining your positive energy.")
-            mood = "positive"
-        elif text_sentiment == "neutral":
-            recommendations.append("🙂 Stay balanced and mindful throughout the day.")
-            mood = "neutral"
-        else:
-            recommendations.append("💡 Seems you're stressed. Try practicing deep breathing.")
-            mood = "negative"
-
-    # ❤️ تقييم الصحة العامة
-    overall_health = wearable_analysis.get("overall_health_index")
-    if overall_health is not None:
-        if overall_health >= 80:
-            recommendations.append("✅ Your physical condition looks great! Keep up the healthy habits.")
-        elif overall_health >= 60:
-            recommendations.append("⚠️ You may need moderate improvements in activity or sleep.")
-        else:
-            recommendations.append("🚨 Your health indicators need attention. Prioritize rest and balanced nutrition.")
-
-    # 🛌 جودة النوم
-    sleep_score = wearable_analysis.get("sleep_score")
-    if sleep_score is not None and sleep_score < 60:
-        recommendations.append("🛌 Try to improve your sleep hygiene for better mood stability.")
-
-    # 🏃‍♂️ النشاط البدني
-    activity_score = wearable_analysis.get("activity_score")
-    if activity_score is not None and activity_score < 50:
-        recommendations.append("🏃‍♂️ Consider adding 20 minutes of walking to your daily routine.")
-
-    # 🌐 دعم الترجمة
-    if lang == "ar":
-        recommendations = [translate_to_ar(rec) for rec in recommendations]
+
+def recommendations_from_analysis(
+    emotional_data: Dict[str, Any],
+    wearable_analysis: Dict[str, Any],
+    lang: str = "en"
+) -> Dict[str, Any]:
+    """
+    يبني التوصيات من نتائج التحليل الجاهزة (كاملة أو جزئية):
+    الأقسام الغائبة من emotional_data تُعامل كميزات مفقودة.
+    """
+    # 🧩 تقييم القواعد التصريحية (configs/guidance_rules.yaml) على سجل هذا المستخدم
+    # 🌐 نصوص اللغة المطلوبة تأتي مباشرة من كتالوج الرسائل (configs/messages.yaml)
+    result = get_engine().run([{**emotional_data, "wearable_analysis": wearable_analysis}], lang=lang)
+    recommendations: List[str] = result["messages"][0]
+    mood = result["mood"][0]
 
     return {
         "emotional_data": emotional_data,
@@ -230,14 +175,10 @@ def build_guidance_recommendations(
 # ============================================================
 
 def translate_to_ar(text: str) -> str:
-    translations = {
-        "🌟 Great! Keep maintaining your positive energy.": "🌟 أحسنت! استمر في الحفاظ على طاقتك الإيجابية.",
-        "🙂 Stay balanced and mindful throughout the day.": "🙂 ابقَ متوازنًا ومتيقظًا طوال اليوم.",
-        "💡 Seems you're stressed. Try practicing deep breathing.": "💡 يبدو أنك متوتر. جرب تمارين التنفس العميق.",
-        "✅ Your physical condition looks great! Keep up the healthy habits.": "✅ صحتك الجسدية ممتازة! استمر على العادات الصحية.",
-        "⚠️ You may need moderate improvements in activity or sleep.": "⚠️ قد تحتاج لتحسينات بسيطة في النشاط أو النوم.",
-        "🚨 Your health indicators need attention. Prioritize rest and balanced nutrition.": "🚨 تحتاج مؤشرات صحتك للاهتمام. احرص على الراحة والتغذية السليمة.",
-        "🛌 Try to improve your sleep hygiene for better mood stability.": "🛌 حاول تحسين جودة نومك لاستقرار حالتك المزاجية.",
-        "🏃‍♂️ Consider adding 20 minutes of walking to your daily routine.": "🏃‍♂️ أضف 20 دقيقة من المشي إلى روتينك اليومي."
-    }
-    return translations.get(text, text)
+    """
+    يترجم نص رسالة إنجليزية معروفة في كتالوج الرسائل إلى العربية (وإلا يرجعه كما هو).
+    للتوليد الجديد استخدم المعرّفات مباشرة: message(msg_id, "ar").
+    """
+    catalog = get_catalog()
+    msg_id = catalog.find(text, "en")
+    return catalog.get(msg_id, "ar") if msg_id else text
@@ -0,0 +1,154 @@
+# core/guidance/scheduling.py
+from __future__ import annotations
+from typing import List, Optional, Sequence, Union
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+WEEKDAYS = ("Sat", "Sun", "Mon", "Tue", "Wed", "Thu", "Fri")
+
+# تكلفة كل دقيقة تتجاوز سعة اليوم: ملاذ أخير فقط عندما لا يتسع الأسبوع
+OVERFLOW_COST = 1e6
+# تكلفة كسر التباعد بين جلستي نفس التوصية
+SPACING_COST = 1e9
+
+# ============================================================
+# 🔹 توزيع الدقائق بالضبط على الميزانية (طريقة أكبر باقٍ)
+# ============================================================
+
+def allocate_minutes(
+    weights: np.ndarray,
+    budget: Union[int, np.ndarray],
+    *,
+    minimum: int = 1
+) -> np.ndarray:
+    """
+    يوزّع budget دقيقة على العناصر بنسبة أوزانها بحيث يساوي المجموع الميزانية تمامًا:
+    - كل عنصر يأخذ minimum أولًا (إن اتسعت الميزانية)، ثم يُقسم الباقي بالتناسب
+      مع تقريب للأسفل وتُعطى الدقائق المتبقية لأكبر الكسور (التعادل بالترتيب).
+    - يعمل على متجه (مستخدم واحد) أو مصفوفة (مستخدمين × عناصر)؛ NaN = خانة فارغة.
+    """
+    W = np.asarray(weights, dtype=float)
+    single = W.ndim == 1
+    W = np.atleast_2d(W)
+    valid = ~np.isnan(W)
+    count = valid.sum(axis=1, keepdims=True)
+    budget = np.broadcast_to(np.asarray(budget, dtype=np.int64).reshape(-1, 1), count.shape)
+
+    floor_min = np.where(count > 0, np.minimum(minimum, budget // np.maximum(count, 1)), 0)
+    spare = budget - floor_min * count
+    W = np.where(valid, np.maximum(W, 0.0), 0.0)
+    total = W.sum(axis=1, keepdims=True)
+    W = np.where(total > 0, W, valid.astype(float))  # كل الأوزان صفر → بالتساوي
+    total = np.maximum(W.sum(axis=1, keepdims=True), 1e-300)
+
+    quota = W / total * spare
+    base = np.floor(quota)
+    left = np.maximum(spare - base.sum(axis=1, keepdims=True), 0)
+    frac = np.where(valid, quota - base, -1.0)
+    order = np.argsort(-frac, axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(W.shape[1])[None, :].repeat(W.shape[0], axis=0), axis=1)
+    out = np.where(valid, base + (rank < left) + floor_min, 0).astype(np.int64)
+    return out[0] if single else out
+
+# ============================================================
+# 🔹 جدولة أسبوعية بالتخصيص الأمثل (سعة يومية + تباعد)
+# ============================================================
+
+def _cyclic_gap(a: int, b: np.ndarray, n_days: int) -> np.ndarray:
+    d = np.abs(b - a)
+    return np.minimum(d, n_days - d)
+
+def _assign_round(
+    minutes: np.ndarray,
+    load: np.ndarray,
+    cap: np.ndarray,
+    near: np.ndarray
+) -> np.ndarray:
+    """
+    يوزّع جلسات جولة واحدة على الأيام ببرنامج صحيح صغير (scipy.milp):
+    x[i, d] = 1 إن وُضعت الجلسة i في اليوم d، مع قيد السعة بالدقائق الفعلية
+    Σ m_i·x[i, d] ≤ cap_d − load_d + o_d حيث o_d تجاوز مسموح بتكلفة OVERFLOW_COST لكل دقيقة.
+    الهدف: تجاوز ← تباعد ← توازن (تكلفة حدّية m·(2L + m) وتكلفة تكديس لكل جلسة إضافية في اليوم).
+    يرجع فهرس اليوم لكل جلسة.
+    """
+    n, n_days = len(minutes), len(load)
+    n_x = n * n_days
+    balance = minutes[:, None] * (2 * load[None, :] + minutes[:, None])
+    stack = 2 * float(minutes.mean()) ** 2
+    # المتغيرات: x (n × أيام) ثم o (أيام) ثم z (أيام) = جلسات اليوم فوق الأولى
+    c = np.concatenate([
+        (balance + SPACING_COST * near).ravel(),
+        np.full(n_days, OVERFLOW_COST),
+        np.full(n_days, stack),
+    ])
+    one_each = np.zeros((n, n_x + 2 * n_days))
+    for i in range(n):
+        one_each[i, i * n_days:(i + 1) * n_days] = 1
+    capacity = np.zeros((n_days, n_x + 2 * n_days))
+    stacked = np.zeros((n_days, n_x + 2 * n_days))
+    for d in range(n_days):
+        capacity[d, d:n_x:n_days] = minutes
+        capacity[d, n_x + d] = -1
+        stacked[d, d:n_x:n_days] = 1
+        stacked[d, n_x + n_days + d] = -1
+    res = milp(
+        c=c,
+        constraints=[
+            LinearConstraint(one_each, lb=1, ub=1),
+            LinearConstraint(capacity, lb=-np.inf, ub=np.maximum(cap - load, 0.0)),
+            LinearConstraint(stacked, lb=-np.inf, ub=1),
+        ],
+        integrality=np.concatenate([np.ones(n_x), np.zeros(2 * n_days)]),
+        bounds=Bounds(0, np.concatenate([np.ones(n_x), np.full(2 * n_days, np.inf)])),
+        options={"mip_rel_gap": 0},
+    )
+    return np.round(res.x[:n_x]).reshape(n, n_days).argmax(axis=1)
+
+def schedule_week(
+    session_minutes: Sequence[Sequence[int]],
+    *,
+    day_capacity: Union[int, Sequence[int]] = 60,
+    day_load: Optional[Sequence[int]] = None,
+    min_gap: int = 2
+) -> List[List[int]]:
+    """
+    يختار يومًا لكل جلسة: session_minutes[i] = دقائق جلسات التوصية i.
+    الجولة j تخصص الجلسة j لكل التوصيات دفعة واحدة (_assign_round) مقابل الحمل الفعلي
+    لكل يوم، مع:
+    - سعة يومية بالدقائق محسوبة من أطوال الجلسات الفعلية (تجاوزها فقط عند الضرورة)،
+    - تباعد دوري ≥ min_gap يوم بين جلسات نفس التوصية (يُخفَّض إن استحال).
+    يرجع فهارس الأيام لكل جلسة.
+    """
+    n_days = len(WEEKDAYS)
+    cap = np.broadcast_to(np.asarray(day_capacity, dtype=float), (n_days,))
+    load = np.zeros(n_days) if day_load is None else np.asarray(day_load, dtype=float).copy()
+    days: List[List[int]] = [[] for _ in session_minutes]
+    rounds = max((len(s) for s in session_minutes), default=0)
+
+    for j in range(rounds):
+        items = [i for i, s in enumerate(session_minutes) if len(s) > j]
+        minutes = np.array([session_minutes[i][j] for i in items], dtype=float)
+        near = np.zeros((len(items), n_days), dtype=bool)
+        for r, i in enumerate(items):
+            if days[i]:
+                gap = min(min_gap, n_days // len(session_minutes[i]))
+                for d in days[i]:
+                    near[r] |= _cyclic_gap(d, np.arange(n_days), n_days) < max(gap, 1)
+        for r, d in enumerate(_assign_round(minutes, load, cap, near)):
+            days[items[r]].append(int(d))
+            load[d] += minutes[r]
+    return days
+
+def weekly_minutes(
+    priorities: Sequence[float],
+    minutes_per_week: int,
+    sessions_per_item: int = 2
+) -> List[List[int]]:
+    """دقائق الأسبوع لكل توصية حسب أولويتها، مقسومة بالتساوي تقريبًا على جلساتها."""
+    per_item = allocate_minutes(np.asarray(priorities, dtype=float), minutes_per_week,
+                                minimum=sessions_per_item)
+    return [
+        [int(m) for m in allocate_minutes(np.ones(sessions_per_item), int(total)) if m > 0]
+        for total in per_item
+    ]
@@ -0,0 +1,122 @@
+# core/scoring/targets.py
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from .whatif import weight_vector
+
+Vector = Union[Dict[str, float], Sequence[float], np.ndarray, None]
+
+def _facet_vector(facets: Sequence[str], values: Vector, default: float) -> np.ndarray:
+    """يحوّل قاموسًا أو متجهًا (أو مصفوفة لكل مستخدم) إلى مصفوفة بترتيب الأبعاد."""
+    if values is None:
+        return np.full(len(facets), float(default))
+    if isinstance(values, dict):
+        return np.array([float(values.get(f, default)) for f in facets])
+    return np.asarray(values, dtype=float)
+
+def plan_targets_batch(
+    scores: np.ndarray,
+    targets: Union[float, np.ndarray],
+    facets: Sequence[str],
+    *,
+    weights: Optional[Dict[str, float]] = None,
+    costs: Vector = None,
+    caps: Vector = None,
+    integer: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    أقل جهد لرفع مؤشر التوازن لكل مستخدم إلى الهدف:
+        min  Σ cost_i · x_i
+        s.t. Σ w_i (s_i + x_i) / Σ w ≥ target,   0 ≤ x_i ≤ min(cap_i, 100 - s_i)
+    - scores: مصفوفة (مستخدمون × أبعاد).
+    - costs/caps: لكل بُعد أو لكل (مستخدم × بُعد). الافتراضي: تكلفة 1 وسقف 100.
+    - weights: غير سالبة ومجموعها موجب، و costs موجبة (وإلا ValueError).
+    - integer=False يحلّ البرنامج الخطي بصيغة مغلقة (حقيبة كسرية) لكل الدفعة معًا،
+      و integer=True يحلّ برنامجًا صحيحًا صغيرًا لكل مستخدم عبر scipy.milp.
+    """
+    S = np.clip(np.atleast_2d(np.asarray(scores, dtype=float)), 0.0, 100.0)
+    n_users, n_facets = S.shape
+    w = weight_vector(facets, weights)
+    if not np.all(np.isfinite(w)) or (w < 0).any() or w.sum() <= 0:
+        raise ValueError("Facet weights must be finite, non-negative and not all zero.")
+    gain = w / w.sum()                                   # نقاط المؤشر لكل نقطة تحسين
+    cost = np.broadcast_to(_facet_vector(facets, costs, 1.0), S.shape)
+    if not np.all(np.isfinite(cost)) or (cost <= 0).any():
+        raise ValueError("Facet costs must be finite and positive.")
+    cap = np.broadcast_to(_facet_vector(facets, caps, 100.0), S.shape)
+    room = np.clip(np.minimum(cap, 100.0 - S), 0.0, None)
+    if integer:
+        room = np.floor(room)
+
+    current = S @ gain
+    need = np.clip(np.broadcast_to(np.asarray(targets, dtype=float), (n_users,)) - current, 0.0, None)
+    reachable = (room * gain).sum(axis=1)
+    feasible = reachable >= need - 1e-9
+
+    if integer:
+        X = np.zeros_like(S)
+        for u in np.flatnonzero(need > 0):
+            X[u] = _solve_integer(gain, cost[u], room[u], min(need[u], reachable[u]))
+    else:
+        # الحقيبة الكسرية: املأ الأبعاد بترتيب التكلفة لكل نقطة مؤشر
+        with np.errstate(divide="ignore"):
+            ratio = np.where(gain > 0, cost / gain, np.inf)
+        order = np.argsort(ratio, axis=1, kind="stable")
+        g = gain[order]
+        r = np.take_along_axis(room, order, axis=1)
+        cum = np.cumsum(g * r, axis=1)
+        prev = cum - g * r
+        with np.errstate(divide="ignore", invalid="ignore"):
+            take = np.where(g > 0, np.clip((need[:, None] - prev) / g, 0.0, r), 0.0)
+        X = np.zeros_like(S)
+        np.put_along_axis(X, order, take, axis=1)
+
+    new_scores = S + X
+    return {
+        "facets": list(facets),
+        "increments": X,
+        "targets": new_scores,
+        "cost": (X * cost).sum(axis=1),
+        "index": np.round(new_scores @ gain, 2),
+        "feasible": feasible,
+    }
+
+def _solve_integer(gain: np.ndarray, cost: np.ndarray, room: np.ndarray, need: float) -> np.ndarray:
+    """برنامج صحيح لمستخدم واحد؛ يرجع أفضل حل ممكن أو الحد الأقصى عند التعذّر."""
+    res = milp(
+        c=cost,
+        constraints=LinearConstraint(gain[None, :], lb=need - 1e-9, ub=np.inf),
+        integrality=np.ones_like(gain),
+        bounds=Bounds(np.zeros_like(room), room),
+    )
+    if res.x is None:
+        return room.copy()
+    return np.round(res.x)
+
+def plan_targets(
+    scores: Dict[str, float],
+    target: float,
+    *,
+    weights: Optional[Dict[str, float]] = None,
+    costs: Optional[Dict[str, float]] = None,
+    caps: Optional[Dict[str, float]] = None,
+    integer: bool = False
+) -> Dict[str, object]:
+    """
+    نسخة مستخدم واحد من plan_targets_batch تعيد قواميس جاهزة للعرض.
+    """
+    facets: List[str] = list(scores.keys())
+    S = np.array([[float(scores[f]) for f in facets]])
+    res = plan_targets_batch(
+        S, target, facets, weights=weights, costs=costs, caps=caps, integer=integer
+    )
+    inc = res["increments"][0]
+    return {
+        "feasible": bool(res["feasible"][0]),
+        "index": float(res["index"][0]),
+        "cost": round(float(res["cost"][0]), 2),
+        "increments": {f: round(float(v), 2) for f, v in zip(facets, inc) if v > 0},
+        "targets": {f: round(float(v), 2) for f, v in zip(facets, res["targets"][0])},
+    }
@@ -0,0 +1,174 @@
+# core/scoring/whatif.py
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from core.explain.attribution import BASELINE_DEFAULT
+from core.features.scoring import BAND_EDGES, _interpret_band
+
+# أسماء المستويات بنفس ترتيب الحدود في BAND_EDGES
+BAND_LEVELS = tuple(_interpret_band(edge)[0] for edge in (0.0,) + BAND_EDGES)
+# أقصى عدد سيناريوهات في الشبكة الكاملة (الحجم يتضاعف أسيًا مع عدد الأبعاد)
+MAX_GRID_POINTS = 100_000
+
+def weight_vector(
+    facets: Sequence[str],
+    weights: Optional[Dict[str, float]] = None,
+    default: float = 1.0
+) -> np.ndarray:
+    """
+    يحوّل قاموس الأوزان إلى متجه بترتيب الأبعاد.
+    يقبل المفاتيح بحالة الأحرف الأصلية أو الصغيرة (مثل أوزان PSI).
+    """
+    if not weights:
+        return np.ones(len(facets), dtype=float)
+    return np.array(
+        [float(weights.get(f, weights.get(f.lower(), default))) for f in facets],
+        dtype=float,
+    )
+
+def index_values(scores: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """
+    المتوسط المرجح لكل صف بعد التطبيع (0-100)، مقرّبًا لرقمين كما في balance_index.
+    """
+    den = float(w.sum())
+    if not den:
+        return np.zeros(scores.shape[0])
+    return np.round(np.clip(scores, 0.0, 100.0) @ w / den, 2)
+
+def band_codes(values: np.ndarray) -> np.ndarray:
+    """رمز المستوى (فهرس في BAND_LEVELS) لكل قيمة."""
+    return np.searchsorted(np.asarray(BAND_EDGES), values, side="right").astype(np.int8)
+
+def delta_grid(
+    facets: Sequence[str],
+    values: Sequence[float],
+    *,
+    vary: Optional[Sequence[str]] = None,
+    max_points: int = MAX_GRID_POINTS
+) -> np.ndarray:
+    """
+    شبكة سيناريوهات كاملة (حاصل ديكارتي) لقيم التغيير على الأبعاد المختارة.
+    الناتج مصفوفة (عدد السيناريوهات × عدد الأبعاد).
+    ValueError إن تجاوز عدد السيناريوهات max_points (يُفحص قبل أي حجز للذاكرة).
+    """
+    vary = list(vary or facets)
+    cols = [list(facets).index(f) for f in vary]
+    n_points = len(values) ** len(cols)
+    if n_points > max_points:
+        raise ValueError(
+            f"What-if grid has {n_points:,} scenarios (limit {max_points:,}); "
+            "vary fewer facets or use fewer delta values."
+        )
+    mesh = np.meshgrid(*([np.asarray(values, dtype=float)] * len(cols)), indexing="ij")
+    grid = np.zeros((mesh[0].size if mesh else 1, len(facets)))
+    for c, m in zip(cols, mesh):
+        grid[:, c] = m.ravel()
+    return grid
+
+def one_at_a_time_grid(facets: Sequence[str], values: Sequence[float]) -> np.ndarray:
+    """
+    سيناريوهات تغيّر بُعدًا واحدًا في كل مرة (جدول الحساسية).
+    """
+    vals = np.asarray(values, dtype=float)
+    grid = np.zeros((len(facets) * len(vals), len(facets)))
+    rows = np.arange(grid.shape[0])
+    grid[rows, np.repeat(np.arange(len(facets)), len(vals))] = np.tile(vals, len(facets))
+    return grid
+
+def _top_codes(contrib: np.ndarray, k: int, *, positive: bool) -> np.ndarray:
+    """
+    فهارس أعلى k عوامل داعمة (أو حدّية) لكل صف، و -1 حيث لا يوجد عامل.
+    الترتيب مستقر ليطابق top_factors عند التساوي.
+    """
+    key = -contrib if positive else contrib
+    order = np.argsort(key, axis=1, kind="stable")[:, :k]
+    picked = np.take_along_axis(contrib, order, axis=1)
+    valid = picked > 0 if positive else picked < 0
+    return np.where(valid, order, -1)
+
+def simulate_whatif(
+    scores: Dict[str, float],
+    deltas: np.ndarray,
+    *,
+    facets: Optional[Sequence[str]] = None,
+    weights: Optional[Dict[str, float]] = None,
+    indices: Optional[Dict[str, Dict[str, float]]] = None,
+    baseline: float = BASELINE_DEFAULT,
+    top_k: int = 3
+) -> Dict[str, object]:
+    """
+    يقيّم كل سيناريوهات "ماذا لو" دفعة واحدة:
+    - deltas: مصفوفة (سيناريوهات × أبعاد) تُضاف إلى الدرجات الحالية.
+    - indices: مؤشرات إضافية {الاسم: الأوزان} مثل {"PSI": PSI_WEIGHTS}.
+    يرجع تغيّر المؤشر، انتقالات المستوى، وتغيّر أعلى العوامل مقارنة بالوضع الحالي.
+    """
+    facets = list(facets or scores.keys())
+    base = np.clip(np.array([float(scores.get(f, 0.0)) for f in facets]), 0.0, 100.0)
+    D = np.atleast_2d(np.asarray(deltas, dtype=float))
+    if D.shape[1] != len(facets):
+        raise ValueError(f"deltas must have {len(facets)} columns, got {D.shape[1]}.")
+
+    S = np.clip(base[None, :] + D, 0.0, 100.0)
+    w = weight_vector(facets, weights)
+
+    base_idx = float(index_values(base[None, :], w)[0])
+    idx = index_values(S, w)
+    base_band = int(band_codes(np.array([base_idx]))[0])
+    bands = band_codes(idx)
+
+    contrib = (S - baseline) * w
+    base_contrib = ((base - baseline) * w)[None, :]
+    top_sup = _top_codes(contrib, top_k, positive=True)
+    top_lim = _top_codes(contrib, top_k, positive=False)
+    base_sup = _top_codes(base_contrib, top_k, positive=True)
+    base_lim = _top_codes(base_contrib, top_k, positive=False)
+    top_changed = np.any(top_sup != base_sup, axis=1) | np.any(top_lim != base_lim, axis=1)
+
+    extra: Dict[str, Dict[str, object]] = {}
+    for name, wts in (indices or {}).items():
+        wv = weight_vector(facets, wts, default=0.0)
+        b = float(index_values(base[None, :], wv)[0])
+        v = index_values(S, wv)
+        extra[name] = {"baseline": b, "value": v, "delta": np.round(v - b, 2)}
+
+    return {
+        "facets": facets,
+        "deltas": D,
+        "scores": S,
+        "baseline_index": base_idx,
+        "index": idx,
+        "index_delta": np.round(idx - base_idx, 2),
+        "baseline_band": base_band,
+        "band": bands,
+        "band_changed": bands != base_band,
+        "baseline_top_supporting": base_sup[0],
+        "baseline_top_limiting": base_lim[0],
+        "top_supporting": top_sup,
+        "top_limiting": top_lim,
+        "top_changed": top_changed,
+        "indices": extra,
+    }
+
+def sensitivity_table(result: Dict[str, object]) -> pd.DataFrame:
+    """
+    جدول حساسية جاهز للعرض: تغييرات الأبعاد، المؤشر، المستوى، وتغيّر العوامل.
+    """
+    facets: List[str] = result["facets"]
+    D: np.ndarray = result["deltas"]
+    df = pd.DataFrame(D, columns=[f"Δ {f}" for f in facets])
+    df["index"] = result["index"]
+    df["Δ index"] = result["index_delta"]
+    df["band"] = np.asarray(BAND_LEVELS, dtype=object)[result["band"]]
+    df["band_changed"] = result["band_changed"]
+    for name, vals in result["indices"].items():
+        df[name] = vals["value"]
+        df[f"Δ {name}"] = vals["delta"]
+    names = np.asarray(facets + [""], dtype=object)
+    top = result["top_supporting"][:, 0]
+    low = result["top_limiting"][:, 0]
+    df["top_supporting"] = names[top]
+    df["top_limiting"] = names[low]
+    df["top_changed"] = result["top_changed"]
+    return df
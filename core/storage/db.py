@@ -15,6 +15,8 @@ CREATE TABLE IF NOT EXISTS sessions (
     scores_json TEXT
 );
 
+CREATE INDEX IF NOT EXISTS idx_sessions_user_time ON sessions (user_id, created_at, id);
+
 CREATE TABLE IF NOT EXISTS recommendations (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     session_id INTEGER,
@@ -31,6 +33,14 @@ CREATE TABLE IF NOT EXISTS plans (
     plan_json TEXT,
     FOREIGN KEY(session_id) REFERENCES sessions(id) ON DELETE CASCADE
 );
+
+CREATE TABLE IF NOT EXISTS forecasts (
+    user_id TEXT PRIMARY KEY,
+    fitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_session_id INTEGER,
+    state_json TEXT, -- حالة التنعيم لإعادة الملاءمة التراكمية
+    forecast_json TEXT
+);
 """
 
 def get_connection() -> sqlite3.Connection:
@@ -1,7 +1,8 @@
 # core/storage/repository.py
 from __future__ import annotations
 import json
-from typing import Dict, List, Any, Optional
+import threading
+from typing import Dict, Iterator, List, Any, Optional
 from .db import get_connection
 
 def save_session(user_id: str, balance_index: float, scores: Dict[str, float]) -> int:
@@ -35,6 +36,25 @@ def save_plan(session_id: int, plan_type: str, plan: Dict[str, Any]) -> None:
             (session_id, plan_type, json.dumps(plan, ensure_ascii=False)),
         )
 
+def save_cohort_plans(recs: List[Dict[str, Any]], plans: List[Dict[str, Any]]) -> None:
+    """يحفظ توصيات وخطط دفعة مستخدمين كاملة في معاملة واحدة (executemany)."""
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO recommendations (session_id, facet, priority, tips_json) VALUES (?, ?, ?, ?)",
+            [
+                (r["session_id"], r["facet"], r["priority"], json.dumps(r["tips"], ensure_ascii=False))
+                for r in recs
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO plans (session_id, type, plan_json) VALUES (?, ?, ?)",
+            [
+                (p["session_id"], p["type"], json.dumps(p["plan"], ensure_ascii=False))
+                for p in plans
+            ],
+        )
+
 def list_sessions(limit: int = 10) -> List[Dict[str, Any]]:
     conn = get_connection()
     cur = conn.execute(
@@ -53,6 +73,92 @@ def list_sessions(limit: int = 10) -> List[Dict[str, Any]]:
         for r in rows
     ]
 
+def list_user_sessions(user_id: str, after_id: int = 0) -> List[Dict[str, Any]]:
+    """
+    كل جلسات المستخدم (أو الأحدث من after_id فقط) مرتبة زمنيًا في استعلام واحد.
+    """
+    conn = get_connection()
+    cur = conn.execute(
+        "SELECT id, created_at, user_id, balance_index, scores_json FROM sessions "
+        "WHERE user_id=? AND id>? ORDER BY created_at, id",
+        (user_id, after_id),
+    )
+    return [
+        {
+            "id": r[0],
+            "created_at": r[1],
+            "user_id": r[2],
+            "balance_index": r[3],
+            "scores": json.loads(r[4] or "{}"),
+        }
+        for r in cur.fetchall()
+    ]
+
+def iter_sessions(
+    chunk_size: int = 5000,
+    *,
+    after_id: int = 0,
+    by_user: bool = False
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    يمرّ على كل الجلسات على دفعات (fetchmany) دون تحميلها كلها في الذاكرة.
+    by_user=True يرتبها حسب المستخدم ثم الزمن، وإلا حسب المعرّف.
+    """
+    order = "user_id, created_at, id" if by_user else "id"
+    conn = get_connection()
+    try:  # يُغلق الاتصال أيضًا عند توقف المستهلك مبكرًا أو حدوث خطأ
+        cur = conn.execute(
+            "SELECT id, created_at, user_id, balance_index, scores_json FROM sessions "
+            f"WHERE id>? ORDER BY {order}",
+            (after_id,),
+        )
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [
+                {
+                    "id": r[0],
+                    "created_at": r[1],
+                    "user_id": r[2],
+                    "balance_index": r[3],
+                    "scores": json.loads(r[4] or "{}"),
+                }
+                for r in rows
+            ]
+    finally:
+        conn.close()
+
+def iter_latest_sessions(chunk_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+    """
+    آخر جلسة لكل مستخدم فقط (حسب الزمن ثم المعرّف)، مختارة في SQL ومرتبة حسب المستخدم،
+    على دفعات — دون قراءة أو فك JSON الجلسات الأقدم.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.execute(
+            "SELECT id, created_at, user_id, balance_index, scores_json FROM ("
+            "  SELECT *, ROW_NUMBER() OVER ("
+            "    PARTITION BY user_id ORDER BY created_at DESC, id DESC) AS rn FROM sessions"
+            ") WHERE rn = 1 ORDER BY user_id"
+        )
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [
+                {
+                    "id": r[0],
+                    "created_at": r[1],
+                    "user_id": r[2],
+                    "balance_index": r[3],
+                    "scores": json.loads(r[4] or "{}"),
+                }
+                for r in rows
+            ]
+    finally:
+        conn.close()
+
 def get_session(session_id: int) -> Optional[Dict[str, Any]]:
     conn = get_connection()
     cur = conn.execute(
@@ -90,7 +196,55 @@ def get_plan(session_id: int, plan_type: str = "daily") -> Optional[Dict[str, An
     row = cur.fetchone()
     return json.loads(row[0]) if row else None
 
+def save_forecasts(rows: List[Dict[str, Any]]) -> None:
+    """يحفظ (أو يستبدل) توقعات عدة مستخدمين دفعة واحدة."""
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO forecasts (user_id, last_session_id, state_json, forecast_json) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (
+                    r["user_id"],
+                    r["last_session_id"],
+                    json.dumps(r["state"], ensure_ascii=False),
+                    json.dumps(r["forecast"], ensure_ascii=False),
+                )
+                for r in rows
+            ],
+        )
+
+def get_forecast(user_id: str) -> Optional[Dict[str, Any]]:
+    conn = get_connection()
+    cur = conn.execute(
+        "SELECT user_id, fitted_at, last_session_id, state_json, forecast_json FROM forecasts WHERE user_id=?",
+        (user_id,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    return {
+        "user_id": row[0],
+        "fitted_at": row[1],
+        "last_session_id": row[2],
+        "state": json.loads(row[3] or "{}"),
+        "forecast": json.loads(row[4] or "[]"),
+    }
+
+# عدد الجلسات المحذوفة لكل مستخدم في هذه العملية: تقارنه الذواكر المؤقتة التزايدية
+# (مثل LongitudinalExplainer) لتعرف أن جلسة سبق تخزينها لم تعد موجودة
+_DELETIONS: Dict[str, int] = {}
+_DELETIONS_LOCK = threading.Lock()
+
+def deletion_count(user_id: str) -> int:
+    with _DELETIONS_LOCK:
+        return _DELETIONS.get(user_id, 0)
+
 def delete_session(session_id: int):
     conn = get_connection()
     with conn:
+        row = conn.execute("SELECT user_id FROM sessions WHERE id=?", (session_id,)).fetchone()
         conn.execute("DELETE FROM sessions WHERE id=?", (session_id,))
+    if row is not None:
+        with _DELETIONS_LOCK:
+            _DELETIONS[row[0]] = _DELETIONS.get(row[0], 0) + 1
@@ -1,8 +1,11 @@
 # core/utils/io.py
 from __future__ import annotations
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict
-import json, yaml
+from typing import Any, Callable, Dict, Generic, Tuple, TypeVar
+import hashlib, json, os, threading, yaml
+
+T = TypeVar("T")
 
 def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
@@ -14,12 +17,76 @@ def read_yaml(path: Path) -> Dict[str, Any]:
         return yaml.safe_load(f) or {}
 
 def write_json(path: Path, data: Dict[str, Any]) -> None:
+    """كتابة ذرّية (ملف مؤقت ثم os.replace) فلا يرى القارئ ملفًا مكتوبًا جزئيًا."""
     ensure_dir(path.parent)
-    with path.open("w", encoding="utf-8") as f:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
 
 def read_json(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
     with path.open("r", encoding="utf-8") as f:
         return json.load(f)
+
+def file_stamp(path: Path) -> Tuple[int, int]:
+    """(mtime_ns, size) للملف، أو (-1, 0) إن لم يكن موجودًا."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return -1, 0
+    return st.st_mtime_ns, st.st_size
+
+@dataclass(frozen=True)
+class FileSnapshot:
+    """محتوى ملف كما قرأته FileCache: البايتات وبصمتها و(mtime_ns, size) لحظة القراءة."""
+    path: Path
+    data: bytes
+    version: str
+    mtime_ns: int
+    size: int
+
+class FileCache(Generic[T]):
+    """
+    ذاكرة مؤقتة لكائنات مبنية من ملفات، حسب المسار المطلق والوسائط الإضافية:
+    - إن لم يتغير (mtime, size) تُعاد النسخة المخزنة دون قراءة الملف.
+    - إن تغيّر الوقت فقط وبقيت بصمة المحتوى نفسها لا يُعاد البناء.
+    - build(snapshot, *args) يُستدعى تحت القفل (الملف الغائب = data فارغة)،
+      ولكل مجموعة args مدخل مستقل (يجب أن تكون قابلة للتجزئة).
+    - آمنة للاستخدام من عدة خيوط/جلسات Streamlit.
+    """
+
+    def __init__(self, build: Callable[..., T]):
+        self._build = build
+        self._entries: Dict[Tuple[Path, Tuple[Any, ...]], Tuple[Tuple[int, int], str, T]] = {}
+        self._lock = threading.Lock()
+
+    def entry(self, path: Path, *args: Any) -> Tuple[str, T]:
+        """(بصمة المحتوى، الكائن) للملف، مع إعادة البناء عند تغيّر المحتوى فقط."""
+        path = Path(path).resolve()
+        key = (path, args)
+        stamp = file_stamp(path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == stamp:
+                return cached[1], cached[2]
+            data = path.read_bytes() if stamp[0] >= 0 else b""
+            version = hashlib.sha1(data).hexdigest()[:12]
+            if cached is not None and cached[1] == version:
+                value = cached[2]
+            else:
+                snapshot = FileSnapshot(path, data, version, stamp[0], len(data))
+                value = self._build(snapshot, *args)
+            self._entries[key] = (stamp, version, value)
+            return version, value
+
+    def get(self, path: Path, *args: Any) -> T:
+        return self.entry(path, *args)[1]
+
+    def version(self, path: Path, *args: Any) -> str:
+        return self.entry(path, *args)[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
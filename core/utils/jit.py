@@ -0,0 +1,57 @@
+# core/utils/jit.py
+from __future__ import annotations
+from importlib import import_module
+from typing import Callable, Dict, Iterable, Optional
+import os
+import time
+
+# numba اختياري: بدونه (أو مع INSIGHT_DISABLE_JIT=1) تُستخدم البدائل المكتوبة بـ NumPy
+try:
+    if os.environ.get("INSIGHT_DISABLE_JIT", "").strip() in ("1", "true", "yes"):
+        raise ImportError("JIT disabled by INSIGHT_DISABLE_JIT")
+    import numba
+    HAVE_NUMBA = True
+except ImportError:
+    numba = None
+    HAVE_NUMBA = False
+
+# الوحدات التي تعرّف نوى مُجمّعة (تُستورد عند التسخين لتسجيل نواها)
+KERNEL_MODULES = (
+    "core.dynamics.simulators",
+    "core.dynamics.ode_models",
+    "core.graph.laplacian",
+)
+
+_WARMUPS: Dict[str, Callable[[], None]] = {}
+
+def kernel(
+    fallback: Optional[Callable] = None,
+    *,
+    warmup: Optional[Callable[[Callable], None]] = None
+) -> Callable[[Callable], Callable]:
+    """
+    مُزخرف نواة حسابية:
+    - مع numba: numba.njit(cache=True, nogil=True) فيُحفظ الترجمة على القرص بين التشغيلات.
+    - بدونه: يُرجع fallback (تنفيذ NumPy مكافئ) أو الدالة نفسها كبايثون عادي.
+    warmup(impl) يستدعي النواة على مدخلات صغيرة بالأنواع الحقيقية لتُجمّع مسبقًا.
+    """
+    def decorate(fn: Callable) -> Callable:
+        impl = numba.njit(cache=True, nogil=True)(fn) if HAVE_NUMBA else (fallback or fn)
+        if warmup is not None:
+            _WARMUPS[f"{fn.__module__}.{fn.__name__}"] = lambda: warmup(impl)
+        return impl
+    return decorate
+
+def warmup(modules: Iterable[str] = KERNEL_MODULES) -> Dict[str, float]:
+    """
+    يُجمّع كل النوى المسجّلة مسبقًا (يُستدعى عند بدء الخدمة) ويرجع زمن كل منها بالثواني.
+    بدون numba تُستدعى البدائل فقط فيكون الزمن ضئيلًا.
+    """
+    for name in modules:
+        import_module(name)
+    timings: Dict[str, float] = {}
+    for name, run in _WARMUPS.items():
+        start = time.perf_counter()
+        run()
+        timings[name] = time.perf_counter() - start
+    return timings
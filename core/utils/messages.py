@@ -0,0 +1,193 @@
+# core/utils/messages.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import mmap
+import os
+import struct
+import numpy as np
+import yaml
+
+from core.utils.io import FileCache, FileSnapshot
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CATALOG_PATH = ROOT / "configs" / "messages.yaml"
+CATALOG_CACHE_DIR = ROOT / "data" / "cache"
+# اللغة الاحتياطية لأي لغة غير مدعومة في الكتالوج
+DEFAULT_LOCALE = "en"
+
+# ============================================================
+# 🔹 الصيغة الثنائية للكتالوج المُجمّع
+#    MAGIC | طول الترويسة (u32) | ترويسة JSON {"ids", "locales"}
+#    | إزاحات u32 بشكل (لغات × (رسائل + 1)) | نصوص UTF-8 متتالية
+#    نص الرسالة i باللغة l = blob[offsets[l, i] : offsets[l, i + 1]]
+# ============================================================
+
+MAGIC = b"INSMSG01"
+_HEAD = struct.Struct("<8sI")
+
+def load_catalog_source(
+    path: Optional[Path] = None, data: Optional[bytes] = None
+) -> Tuple[Tuple[str, ...], Dict[str, Dict[str, str]]]:
+    """يحلل YAML (data إن أُعطيت، وإلا يقرأ الملف) ويتحقق أن لكل رسالة نصًا في كل لغة معلنة."""
+    path = Path(path or DEFAULT_CATALOG_PATH)
+    if data is None:
+        data = path.read_bytes()
+    cfg = yaml.safe_load(data.decode("utf-8")) or {}
+    locales = tuple(cfg.get("locales") or ())
+    messages = cfg.get("messages") or {}
+    if not locales:
+        raise ValueError(f"Message catalog {path} declares no locales")
+    for msg_id, texts in messages.items():
+        missing = [loc for loc in locales if not isinstance(texts, dict) or not texts.get(loc)]
+        if missing:
+            raise ValueError(f"Message {msg_id!r} is missing locales: {', '.join(missing)}")
+    return locales, {str(k): v for k, v in messages.items()}
+
+def compile_catalog(
+    src: Optional[Path] = None, dest: Optional[Path] = None, data: Optional[bytes] = None
+) -> Path:
+    """
+    يجمّع كتالوج YAML إلى الملف الثنائي (كتابة ذرّية عبر ملف مؤقت ثم os.replace).
+    data: محتوى المصدر المقروء مسبقًا، فلا يُعاد فتح الملف (قد يكون تغيّر منذ ذلك).
+    """
+    locales, messages = load_catalog_source(src, data)
+    ids = sorted(messages)
+    if dest is None:
+        dest = catalog_binary_path(src, version=None if data is None else _content_version(data))
+    dest = Path(dest)
+    blob = bytearray()
+    offsets = np.zeros((len(locales), len(ids) + 1), dtype="<u4")
+    for l, loc in enumerate(locales):
+        for i, msg_id in enumerate(ids):
+            offsets[l, i] = len(blob)
+            blob += str(messages[msg_id][loc]).encode("utf-8")
+        offsets[l, -1] = len(blob)
+    header = json.dumps({"ids": ids, "locales": list(locales)}, ensure_ascii=False).encode("utf-8")
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(_HEAD.pack(MAGIC, len(header)))
+        fh.write(header)
+        fh.write(offsets.tobytes())
+        fh.write(bytes(blob))
+    os.replace(tmp, dest)
+    return dest
+
+def _content_version(data: bytes) -> str:
+    # نفس بصمة FileCache، فيتطابق اسم الملف الثنائي مع مدخل الذاكرة
+    return hashlib.sha1(data).hexdigest()[:12]
+
+def _source_key(src: Path) -> str:
+    return hashlib.sha1(str(src).encode("utf-8")).hexdigest()[:12]
+
+def catalog_binary_path(
+    src: Optional[Path] = None, cache_dir: Optional[Path] = None, version: Optional[str] = None
+) -> Path:
+    """
+    اسم الملف الثنائي: messages-<بصمة المسار>-<بصمة المحتوى>.bin، فلا يُعاد التجميع
+    إن تغيّر وقت التعديل فقط، ويُعاد عند أي تغيير في المحتوى.
+    """
+    src = Path(src or DEFAULT_CATALOG_PATH).resolve()
+    if version is None:
+        version = _content_version(src.read_bytes())
+    return Path(cache_dir or CATALOG_CACHE_DIR) / f"messages-{_source_key(src)}-{version}.bin"
+
+def _prune_binaries(current: Path) -> None:
+    """يحذف النسخ الثنائية الأقدم لنفس المصدر (الخرائط المفتوحة تبقى صالحة حتى إغلاقها)."""
+    prefix = current.name.rsplit("-", 1)[0]
+    for old in current.parent.glob(f"{prefix}-*.bin"):
+        if old != current:
+            try:
+                old.unlink()
+            except OSError:
+                pass  # مفتوح في عملية أخرى (Windows) أو حُذف للتو
+
+class MessageCatalog:
+    """
+    كتالوج مُجمّع مقروء بـ mmap: الترويسة والإزاحات تُقرأ مرة، والنص يُفك ترميزه
+    عند أول طلب فقط ثم يُحفظ. get(id, locale) = بحث قاموس + شريحة من الملف → O(1).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _HEAD.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a compiled message catalog: {self.path}")
+        header = json.loads(self._mm[_HEAD.size:_HEAD.size + header_len].decode("utf-8"))
+        self.ids: Tuple[str, ...] = tuple(header["ids"])
+        self.locales: Tuple[str, ...] = tuple(header["locales"])
+        self._index = {msg_id: i for i, msg_id in enumerate(self.ids)}
+        self._locale_index = {loc: l for l, loc in enumerate(self.locales)}
+        start = _HEAD.size + header_len
+        shape = (len(self.locales), len(self.ids) + 1)
+        self._offsets = np.frombuffer(self._mm, dtype="<u4", count=shape[0] * shape[1], offset=start).reshape(shape)
+        self._blob = start + self._offsets.nbytes
+        self._decoded: List[List[Optional[str]]] = [[None] * len(self.ids) for _ in self.locales]
+        self._reverse: Dict[str, Dict[str, str]] = {}
+
+    def __contains__(self, msg_id: str) -> bool:
+        return msg_id in self._index
+
+    def _text(self, l: int, i: int) -> str:
+        text = self._decoded[l][i]
+        if text is None:
+            a, b = int(self._offsets[l, i]), int(self._offsets[l, i + 1])
+            text = self._decoded[l][i] = self._mm[self._blob + a:self._blob + b].decode("utf-8")
+        return text
+
+    def resolve_locale(self, locale: Optional[str]) -> str:
+        """اللغة نفسها إن كانت في الكتالوج، وإلا DEFAULT_LOCALE (كالسلوك السابق: غير "ar" → إنجليزي)."""
+        return locale if locale in self._locale_index else DEFAULT_LOCALE
+
+    def locale_index(self, locale: str) -> int:
+        if locale not in self._locale_index:
+            raise KeyError(f"Unknown locale {locale!r}; available: {', '.join(self.locales)}")
+        return self._locale_index[locale]
+
+    def get(self, msg_id: str, locale: str = "en") -> str:
+        if msg_id not in self._index:
+            raise KeyError(f"Unknown message id {msg_id!r}")
+        return self._text(self.locale_index(locale), self._index[msg_id])
+
+    def find(self, text: str, locale: str = "en") -> Optional[str]:
+        """معرّف الرسالة ذات النص المطابق في locale (يُبنى الفهرس العكسي مرة لكل لغة)."""
+        reverse = self._reverse.get(locale)
+        if reverse is None:
+            l = self.locale_index(locale)
+            reverse = self._reverse[locale] = {self._text(l, i): msg_id for i, msg_id in enumerate(self.ids)}
+        return reverse.get(text)
+
+    def close(self) -> None:
+        self._offsets = None
+        self._mm.close()
+
+def _open_catalog(snap: FileSnapshot, cache_dir: Optional[Path] = None) -> MessageCatalog:
+    binary = catalog_binary_path(snap.path, cache_dir, snap.version)
+    if not binary.exists():
+        compile_catalog(snap.path, binary, snap.data)
+        _prune_binaries(binary)
+    return MessageCatalog(binary)
+
+_CATALOGS: FileCache[MessageCatalog] = FileCache(_open_catalog)
+
+def get_catalog(path: Optional[Path] = None, cache_dir: Optional[Path] = None) -> MessageCatalog:
+    """
+    الكتالوج المشترك لملف الرسائل: يُجمَّع إلى الملف الثنائي مرة واحدة لكل نسخة محتوى
+    ويُفتح بـ mmap عند أول استخدام في العملية.
+    """
+    return _CATALOGS.get(Path(path or DEFAULT_CATALOG_PATH), cache_dir)
+
+def message(msg_id: str, lang: str = "en", **fields: Any) -> str:
+    """نص الرسالة باللغة المطلوبة (أو DEFAULT_LOCALE إن لم تكن مدعومة)، مع ملء حقول {name}."""
+    catalog = get_catalog()
+    text = catalog.get(msg_id, catalog.resolve_locale(lang))
+    return text.format(**fields) if fields else text
+
+if __name__ == "__main__":
+    print(f"✅ Message catalog compiled to {compile_catalog()}")
@@ -0,0 +1,34 @@
+# scripts/benchmark_integrators.py
+# مقارنة الدقة مقابل الزمن لمحللات النموذج العاطفي (دفعة من نقاط البداية).
+from __future__ import annotations
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.dynamics.ode_models import simple_emotion_model
+from core.dynamics.solvers import euler_integrate, ivp_integrate, rk4_integrate
+
+def main(batch: int = 1000, t_span=(0.0, 20.0)) -> None:
+    f = simple_emotion_model()
+    x0 = np.random.default_rng(0).uniform(-2, 2, size=(batch, 2))
+    ref = ivp_integrate(f, x0, t_span, steps=10, method="DOP853", rtol=1e-11, atol=1e-12)[-1]
+
+    # الخطأ الأقصى يتأثر بنقاط قريبة من فاصل السرج، لذا نعرض الوسيط أيضًا
+    print(f"{'method':<12}{'steps':>8}{'time [ms]':>12}{'median err':>14}{'max err':>12}")
+    runs = [(name, fn, steps) for name, fn in (("euler", euler_integrate), ("rk4", rk4_integrate))
+            for steps in (100, 300, 1000, 3000)]
+    runs += [("ivp RK45", ivp_integrate, 10), ("ivp LSODA", ivp_integrate, 10)]
+    for name, fn, steps in runs:
+        kwargs = {"method": name.split()[1]} if name.startswith("ivp") else {}
+        start = time.perf_counter()
+        out = fn(f, x0, t_span, steps=steps, **kwargs)[-1]
+        elapsed = (time.perf_counter() - start) * 1000
+        err = np.abs(out - ref).max(axis=1)
+        print(f"{name:<12}{steps:>8}{elapsed:>12.1f}{np.median(err):>14.2e}{err.max():>12.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# scripts/benchmark_kernels.py
+# مقارنة النوى المُجمّعة (numba) مع بدائل NumPy/بايثون للحلقات الساخنة.
+# للتشغيل بدون numba: INSIGHT_DISABLE_JIT=1 python scripts/benchmark_kernels.py
+from __future__ import annotations
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.dynamics.ode_models import simple_emotion_model
+from core.dynamics.simulators import _state_codes_numpy, state_codes
+from core.dynamics.solvers import euler_integrate, rk4_integrate
+from core.graph.builder import graph_from_config
+from core.graph.laplacian import _p_laplacian_step_numpy, operator_for
+from core.utils.jit import HAVE_NUMBA, warmup
+
+def timed(fn, repeat: int = 20) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main() -> None:
+    start = time.perf_counter()
+    warmup()
+    print(f"numba: {HAVE_NUMBA}  warm-up: {time.perf_counter() - start:.2f}s")
+    rng = np.random.default_rng(0)
+    rows = []
+
+    psi, iepi = rng.uniform(0, 100, (2, 1_000_000))
+    rows.append(("state codes 1e6", timed(lambda: _state_codes_numpy(psi, iepi)),
+                 timed(lambda: state_codes(psi, iepi))))
+
+    op = operator_for(graph_from_config())
+    for users in (1, 64):
+        X = rng.uniform(0, 100, (op.n_nodes, users))
+        rows.append((f"p-laplacian step ×{users}",
+                     timed(lambda: _p_laplacian_step_numpy(
+                         X, op.rows, op.cols, op.weights, op.incidence, 1.5, 0.5), 200),
+                     timed(lambda: op.step(X, p=1.5), 200)))
+
+    f = simple_emotion_model()
+    generic = lambda t, s: f(t, s)  # نفس النموذج دون نوى مرفقة
+    x0 = rng.uniform(-2, 2, (1000, 2))
+    for name, fn in (("euler", euler_integrate), ("rk4", rk4_integrate)):
+        rows.append((f"{name} 1000×2000",
+                     timed(lambda: fn(generic, x0, (0.0, 20.0), 2000), 3),
+                     timed(lambda: fn(f, x0, (0.0, 20.0), 2000), 3)))
+
+    print(f"{'kernel':<24}{'numpy [ms]':>12}{'jit [ms]':>12}{'speedup':>10}")
+    for name, before, after in rows:
+        print(f"{name:<24}{before:>12.3f}{after:>12.3f}{before / after:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,226 @@
+import json
+import networkx as nx
+import numpy as np
+import pytest
+
+
 def test_ok(): assert True
+
+
+def test_balance_map_reuses_layout_and_patches_values(tmp_path, monkeypatch):
+    from core.dynamics import dynamic_balance_map as bm
+
+    monkeypatch.setattr(bm, "LAYOUT_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(bm, "_LAYOUTS", {})
+    monkeypatch.setattr(bm, "_SKELETONS", {})
+    calls = []
+    real_layout = nx.spring_layout
+    monkeypatch.setattr(bm.nx, "spring_layout", lambda G, **kw: calls.append(1) or real_layout(G, **kw))
+
+    names = ["الإيمان", "النية", "الأخلاق", "الذكر", "العبادة", "العلم", "المجتمع", "التوازن"]
+    first = bm.generate_smart_balance_map({n: 5.0 for n in names})
+    second = bm.generate_smart_balance_map({n: float(i) for i, n in enumerate(names)})
+    assert len(calls) == 1
+    assert first.data[1].x == second.data[1].x
+    assert list(second.data[1].marker.color) == list(range(8))
+    assert second.layout.annotations[0].text.startswith("الإيمان: 🚨")
+    assert first.data[1].marker.color[0] == 5.0
+
+    monkeypatch.setattr(bm, "_LAYOUTS", {})
+    monkeypatch.setattr(bm, "_SKELETONS", {})
+    third = bm.generate_smart_balance_map({n: 5.0 for n in names})
+    assert len(calls) == 1 and third.data[1].x == first.data[1].x
+
+    # ملف مواقع مكتوب جزئيًا: يُعاد حسابه بدل رفع JSONDecodeError
+    (cache_file,) = tmp_path.glob("*.json")
+    cache_file.write_text(cache_file.read_text(encoding="utf-8")[:20], encoding="utf-8")
+    monkeypatch.setattr(bm, "_LAYOUTS", {})
+    monkeypatch.setattr(bm, "_SKELETONS", {})
+    fourth = bm.generate_smart_balance_map({n: 5.0 for n in names})
+    assert len(calls) == 2 and fourth.data[1].x == first.data[1].x
+    assert json.loads(cache_file.read_text(encoding="utf-8"))
+
+
+def test_large_balance_map_uses_webgl_and_binary_arrays(tmp_path, monkeypatch):
+    from core.dynamics import dynamic_balance_map as bm
+
+    monkeypatch.setattr(bm, "LAYOUT_CACHE_DIR", tmp_path)
+    G = nx.random_geometric_graph(2000, 0.04, seed=1)
+    G = nx.relabel_nodes(G, {i: f"q{i}" for i in G.nodes()})
+    rng = np.random.default_rng(1)
+    for a, b in G.edges():
+        G[a][b]["weight"] = float(rng.uniform(0, 1))
+    values = {n: float(rng.uniform(0, 10)) for n in G.nodes()}
+
+    fig = bm.generate_large_balance_map(G, values, max_labels=20)
+    assert {t.type for t in fig.data} == {"scattergl"}
+    labels = [t for t in fig.data if t.name == "labels"][0]
+    assert len(labels.text) == 20
+    payload = fig.to_json()
+    assert '"bdata"' in payload and "null" not in payload.split('"layout"')[0]
+
+
+def test_network_dynamics_batch_matches_single_and_jacobian():
+    from core.dynamics.network_models import NetworkFacetModel, simulate_network_dynamics
+
+    G = nx.cycle_graph(12)
+    G.add_edge(0, 6, weight=2.0)
+    model = NetworkFacetModel.from_graph(G, growth=np.linspace(0.02, 0.2, 12), coupling=0.3, drive=1.0)
+    rng = np.random.default_rng(0)
+    X0 = rng.uniform(5, 95, size=(12, 4))
+
+    X = rng.uniform(0, 100, size=12 * 4)
+    J = model.jacobian(X).toarray()
+    eps = 1e-6
+    shape = (12, 4)
+    f = lambda y: model.rhs(0.0, y.reshape(shape, order="F")).ravel(order="F")
+    fd = np.column_stack([(f(X + eps * e) - f(X - eps * e)) / (2 * eps) for e in np.eye(X.size)])
+    np.testing.assert_allclose(J, fd, atol=1e-5)
+
+    t_eval = np.linspace(0, 20, 11)
+    batch = simulate_network_dynamics(model, X0, (0, 20), t_eval=t_eval, rtol=1e-8, atol=1e-8)
+    assert batch["success"] and batch["states"].shape == (11, 12, 4)
+    for u in range(4):
+        one = simulate_network_dynamics(model, X0[:, [u]], (0, 20), t_eval=t_eval,
+                                        method="RK45", rtol=1e-8, atol=1e-8)
+        np.testing.assert_allclose(batch["states"][:, :, u], one["states"][:, :, 0], rtol=1e-4, atol=1e-4)
+
+
+def test_vectorized_solvers_batch_and_accuracy():
+    from core.dynamics.ode_models import simple_emotion_model
+    from core.dynamics.simulators import euler_integrate, vector_field
+    from core.dynamics.solvers import ivp_integrate, rk4_integrate
+
+    f = simple_emotion_model()
+    X, Y, dX, dY = vector_field(f, x_range=(-2, 2), y_range=(-2, 2), density=7)
+    assert X.shape == dX.shape == (7, 7)
+    i, j = 3, 5
+    np.testing.assert_allclose([dX[i, j], dY[i, j]], f(0, (X[i, j], Y[i, j])))
+
+    traj = euler_integrate(f, x0=(1.2, 0.2), t_span=(0, 20), steps=300)
+    assert traj.shape == (301, 2)
+    x0 = np.array([[1.2, 0.2], [-0.5, 0.4], [0.1, -1.0]])
+    batch = rk4_integrate(f, x0, (0, 5), steps=400)
+    assert batch.shape == (401, 3, 2)
+    np.testing.assert_allclose(batch[:, 1], rk4_integrate(f, x0[1], (0, 5), steps=400))
+    ref = ivp_integrate(f, x0, (0, 5), steps=10, method="DOP853", rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(batch[-1], ref[-1], atol=1e-6)
+
+
+def test_enlightenment_ensemble_summary_and_state_codes():
+    from core.dynamics.simulators import EnlightenmentSimulator, STATES, state_codes
+
+    sim = EnlightenmentSimulator(55, 62, intervention="التأمل")
+    assert len(sim.simulate(5)) == 5
+    assert len(sim.simulate(5)) == 5
+
+    grid = np.linspace(0, 100, 41)
+    P, I = np.meshgrid(grid, grid)
+    codes = state_codes(P, I)
+    expected = [[STATES.index(sim._get_state(p, i)) for p, i in zip(pr, ir)] for pr, ir in zip(P, I)]
+    assert codes.dtype == np.int8 and (codes == np.array(expected)).all()
+
+    a = sim.simulate_ensemble(n_paths=2000, steps=8, seed=3)
+    b, states = sim.simulate_ensemble(n_paths=2000, steps=8, seed=3, return_states=True)
+    assert a.equals(b) and states.shape == (8, 2000) and states.dtype == np.int8
+    occ = a[[f"P({s})" for s in STATES]].to_numpy()
+    np.testing.assert_allclose(occ.sum(axis=1), 1.0)
+    assert (a["مؤشر السلام النفسي q0.05"] <= a["مؤشر السلام النفسي q0.95"]).all()
+
+
+def test_sweep_caches_points_and_interventions_table(tmp_path):
+    from core.dynamics.simulators import EnlightenmentSimulator
+    from core.dynamics.sweeps import emotion_model_task, enlightenment_task, run_sweep
+
+    sim = EnlightenmentSimulator(50, 50, "تجربة", interventions={"تجربة": (5.0, 0.0)})
+    assert sim._intervention_shift() == (5.0, 0.0)
+
+    grid = {"a": [0.5, 0.8], "e": [1.0]}
+    first = run_sweep(emotion_model_task, grid, cache_dir=tmp_path, n_jobs=1)
+    assert first.attrs["computed"] == 2 and len(first) == 2
+    second = run_sweep(emotion_model_task, {"a": [0.5, 0.8, 1.1], "e": [1.0]},
+                       cache_dir=tmp_path, n_jobs=1)
+    assert second.attrs["computed"] == 1
+    assert np.allclose(second[["x_final", "y_final"]].values[:2], first[["x_final", "y_final"]].values)
+
+    df = run_sweep(enlightenment_task,
+                   {"intervention": [None, "التأمل"], "n_paths": [300], "steps": [6]},
+                   cache_dir=tmp_path, n_jobs=2, chunk_size=1)
+    assert df.loc[1, "psi_median"] > df.loc[0, "psi_median"]
+
+
+def test_interventions_reload_and_invalidate_sweep_keys(tmp_path, monkeypatch):
+    from core.dynamics import simulators
+    from core.dynamics.sweeps import emotion_model_task, enlightenment_task, param_key
+
+    path = tmp_path / "interventions.yaml"
+    path.write_text('interventions:\n  - {name: "تجربة", psi: 1.0, iepi: 0.0}\n', encoding="utf-8")
+    monkeypatch.setattr(simulators, "INTERVENTIONS_PATH", path)
+    params = {"intervention": "تجربة", "n_paths": 10}
+    before = param_key(enlightenment_task, params)
+    assert simulators.load_interventions() == {**simulators.DEFAULT_INTERVENTIONS, "تجربة": (1.0, 0.0)}
+    ode_key = param_key(emotion_model_task, {"a": 1.0})
+
+    path.write_text('interventions:\n  - {name: "تجربة", psi: 12.5, iepi: 0.0}\n', encoding="utf-8")
+    assert simulators.load_interventions()["تجربة"] == (12.5, 0.0)
+    assert param_key(enlightenment_task, params) != before
+    assert param_key(emotion_model_task, {"a": 1.0}) == ode_key  # مهمة لا تقرأ التدخلات
+
+    path.unlink()  # الملف الغائب: الجدول الأساسي لا إزاحات صفرية
+    assert simulators.load_interventions() == simulators.DEFAULT_INTERVENTIONS
+
+
+def test_jit_kernels_match_numpy_fallbacks():
+    from core.dynamics.ode_models import simple_emotion_model
+    from core.dynamics.simulators import _state_codes_numpy, state_codes
+    from core.dynamics.solvers import rk4_integrate
+    from core.utils.jit import warmup
+
+    timings = warmup()
+    assert all(t >= 0 for t in timings.values())
+
+    rng = np.random.default_rng(0)
+    psi, iepi = rng.uniform(0, 100, (2, 500))
+    assert np.array_equal(state_codes(psi, iepi), _state_codes_numpy(psi, iepi))
+    assert state_codes(30.0, 70.0) == 3
+
+    f = simple_emotion_model()
+    x0 = rng.uniform(-2, 2, (20, 2))
+    generic = rk4_integrate(lambda t, s: f(t, s), x0, (0.0, 5.0), steps=200)
+    assert np.allclose(rk4_integrate(f, x0, (0.0, 5.0), steps=200), generic, atol=1e-12)
+
+
+def test_equilibrium_atlas_matches_model_and_caches(tmp_path, monkeypatch):
+    from core.dynamics.equilibria import (
+        EquilibriumAtlas, jacobian, load_atlas, pitchfork_margin, stability,
+    )
+    from core.dynamics.ode_models import simple_emotion_model
+
+    params = (0.8, 0.9, 0.2, 0.6, 1.0)
+    res = stability(*params)
+    f = simple_emotion_model(*params)
+    assert res["exists"].all()
+    for s in range(3):
+        x, y = res["x"][s], res["y"][s]
+        assert np.abs(f(0.0, (x, y))).max() < 1e-9
+        eig = np.sort_complex(np.linalg.eigvals(jacobian(x, *params)))
+        ours = np.sort_complex(res["eig_re"][s] + 1j * res["eig_im"][s])
+        assert np.allclose(eig, ours)
+    assert not stability(0.3, *params[1:])["exists"][1:].any()  # μ < 0: الأصل فقط
+    assert pitchfork_margin(0.54, 0.9, 0.2, 0.6, 1.0) == pytest.approx(0.0)
+
+    axes = {"a": np.linspace(0.0, 1.0, 11), "b": [0.9], "c": [0.2], "d": [0.6], "e": [1.0]}
+    atlas = load_atlas(axes, cache_dir=tmp_path)
+    assert list(tmp_path.glob("emotion_atlas.*.npz"))
+    q = atlas.query(a=0.8, b=0.9, c=0.2, d=0.6, e=1.0)
+    assert [p["kind"] for p in q["equilibria"]] == ["saddle", "stable spiral", "stable spiral"]
+    diagram = atlas.slice("a", b=0.9, c=0.2, d=0.6, e=1.0)
+    assert set(diagram.loc[diagram["boundary"], "a"].round(2)) == {0.5, 0.6}
+
+    reloaded = EquilibriumAtlas.load(next(tmp_path.glob("*.npz")))
+    assert np.array_equal(reloaded.kind, atlas.kind)
+
+    from core.dynamics import equilibria
+    key = equilibria.atlas_key(axes)
+    monkeypatch.setattr(equilibria, "ATLAS_CACHE_VERSION", equilibria.ATLAS_CACHE_VERSION + 1)
+    assert equilibria.atlas_key(axes) != key  # منطق جديد: لا يُقرأ ملف الأطلس القديم
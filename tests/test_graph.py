@@ -1 +1,183 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from core.graph.laplacian import (
+    _laplacian_smoothing_python,
+    compile_operator,
+    laplacian_smoothing,
+    laplacian_smoothing_batch,
+)
+
+
 def test_ok(): assert True
+
+
+def _random_graph(n=40, seed=1):
+    G = nx.gnp_random_graph(n, 0.15, seed=seed)
+    G = nx.relabel_nodes(G, {i: f"f{i}" for i in G.nodes()})
+    rng = np.random.default_rng(seed)
+    for u, v in G.edges():
+        G[u][v]["weight"] = float(rng.uniform(0.1, 1.0))
+    G.add_node("isolated")
+    G.add_edge("f0", "f0", weight=0.7)
+    return G
+
+
+@pytest.mark.parametrize("p", [2.0, 3.0, 1.5])
+def test_batch_smoothing_matches_reference(p):
+    G = _random_graph()
+    rng = np.random.default_rng(2)
+    users = [{n: float(v) for n, v in zip(G.nodes(), rng.uniform(0, 100, G.number_of_nodes()))}
+             for _ in range(5)]
+    users[0]["extra"] = 1.0
+    batch = laplacian_smoothing_batch(G, users, p=p, alpha=0.05, iterations=6)
+    for s, got in zip(users, batch):
+        ref = _laplacian_smoothing_python(G, s, p=p, alpha=0.05, iterations=6)
+        assert laplacian_smoothing(G, s, p=p, alpha=0.05, iterations=6) == pytest.approx(ref)
+        assert got.keys() == ref.keys()
+        for k in ref:
+            assert got[k] == pytest.approx(ref[k], rel=1e-9, abs=1e-9)
+
+
+def test_operator_vector_input():
+    G = _random_graph(10)
+    op = compile_operator(G)
+    x = np.linspace(0, 100, op.n_nodes)
+    assert op.smooth(x, iterations=3).shape == (op.n_nodes,)
+
+
+def test_adaptive_smoothing_converges_to_closed_form():
+    from core.graph.laplacian import laplacian_smoothing_adaptive
+
+    G = _random_graph(30, seed=3)
+    rng = np.random.default_rng(4)
+    scores = {n: float(v) for n, v in zip(G.nodes(), rng.uniform(0, 100, G.number_of_nodes()))}
+    exact = laplacian_smoothing_adaptive(G, scores, method="direct")
+    plain = laplacian_smoothing_adaptive(G, scores, alpha=0.3, tol=1e-8, max_iter=20000)
+    fast = laplacian_smoothing_adaptive(G, scores, alpha=0.3, tol=1e-8, max_iter=20000, momentum=0.5)
+    assert plain["converged"] and fast["converged"]
+    assert fast["iterations"] < plain["iterations"]
+    for n in G.nodes():
+        assert plain["scores"][n] == pytest.approx(exact["scores"][n], abs=1e-5)
+        assert fast["scores"][n] == pytest.approx(exact["scores"][n], abs=1e-5)
+
+    early = laplacian_smoothing_adaptive(G, {n: 50.0 for n in G.nodes()}, tol=1e-6)
+    assert early["iterations"] == 1
+
+    direct = laplacian_smoothing_adaptive(G, scores, method="direct", diffusion_time=2.0)
+    iterative = laplacian_smoothing_adaptive(G, scores, method="cg", diffusion_time=2.0, tol=1e-10)
+    assert iterative["converged"] and iterative["iterations"] > 0
+    for n in G.nodes():
+        assert iterative["scores"][n] == pytest.approx(direct["scores"][n], abs=1e-6)
+
+
+def test_registry_memoizes_and_invalidates(tmp_path):
+    import os
+    from core.graph.builder import graph_from_config
+    from core.graph.metrics import degree_centrality, weighted_degree
+    from core.graph.registry import get_compiled_graph
+
+    cfg = tmp_path / "graph.yaml"
+    cfg.write_text('nodes: ["A","B","C"]\nedges:\n  - ["A","B", 0.5]\n  - ["B","C"]\n', encoding="utf-8")
+    first = get_compiled_graph(cfg)
+    assert get_compiled_graph(cfg) is first
+    assert graph_from_config(cfg) is first.graph and nx.is_frozen(first.graph)
+    assert first.adjacency[first.index["A"], first.index["B"]] == 0.5
+
+    G = nx.Graph(first.graph)
+    G.add_edge("C", "C", weight=2.0)
+    assert degree_centrality(G) == pytest.approx(nx.degree_centrality(G))
+    assert weighted_degree(G) == pytest.approx({"A": 0.5, "B": 1.5, "C": 3.0})
+
+    os.utime(cfg, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    touched = get_compiled_graph(cfg)
+    assert touched.graph is first.graph
+
+    cfg.write_text('nodes: ["A","B"]\nedges:\n  - ["A","B", 0.9]\n', encoding="utf-8")
+    changed = get_compiled_graph(cfg)
+    assert changed.version != first.version and changed.nodes == ("A", "B")
+
+
+def test_centrality_suite_matches_networkx(tmp_path):
+    from core.graph.centrality import centrality, centrality_vector
+    from core.graph.registry import get_compiled_graph
+
+    G = nx.connected_watts_strogatz_graph(60, 4, 0.2, seed=5)
+    rng = np.random.default_rng(5)
+    lines = [f'nodes: [{", ".join(f"{chr(34)}n{i}{chr(34)}" for i in G.nodes())}]', "edges:"]
+    for u, v in G.edges():
+        lines.append(f'  - ["n{u}", "n{v}", {rng.uniform(0.2, 1.0):.3f}]')
+    cfg = tmp_path / "graph.yaml"
+    cfg.write_text("\n".join(lines), encoding="utf-8")
+    compiled = get_compiled_graph(cfg)
+    H = compiled.graph
+
+    assert centrality("degree", compiled) == pytest.approx(nx.degree_centrality(H))
+    assert centrality("eigenvector", compiled) == pytest.approx(
+        nx.eigenvector_centrality_numpy(H, weight="weight"), abs=1e-6)
+    assert centrality("pagerank", compiled) == pytest.approx(nx.pagerank(H), abs=1e-5)
+    pers = {"n0": 1.0, "n7": 3.0}
+    assert centrality("pagerank", compiled, personalization=pers) == pytest.approx(
+        nx.pagerank(H, personalization=pers), abs=1e-5)
+    assert centrality("betweenness", compiled) == pytest.approx(
+        nx.betweenness_centrality(H), abs=1e-9)
+    assert centrality_vector("pagerank", compiled) is centrality_vector("pagerank", compiled)
+
+    from core.graph.centrality import betweenness_vector
+    D = nx.disjoint_union(nx.path_graph(5), nx.cycle_graph(6))  # مكوّنان + حلقة ذاتية
+    D.add_edge(2, 2)
+    A = nx.to_scipy_sparse_array(D, format="csr")
+    ref = nx.betweenness_centrality(D)
+    assert betweenness_vector(A) == pytest.approx([ref[v] for v in D], abs=1e-12)
+    est = betweenness_vector(A, samples=6, seed=1)  # تقدير من عيّنة مصادر
+    assert est.shape == (11,) and (est >= 0).all()
+
+    from core.graph import centrality as module
+    base = centrality_vector("degree", compiled)
+    for i in range(module.CENTRALITY_CACHE_SIZE + 20):  # PageRank مخصص لكل مستخدم
+        centrality_vector("pagerank", compiled, personalization={f"n{i % 60}": 1.0 + i})
+        centrality_vector("degree", compiled)  # المستخدم حديثًا لا يُطرد
+    assert len(module._CACHE) <= module.CENTRALITY_CACHE_SIZE
+    assert centrality_vector("degree", compiled) is base
+
+
+def test_learn_graph_from_streamed_sessions(tmp_path):
+    from core.graph.builder import graph_from_config
+    from core.graph.learning import CovarianceAccumulator, learn_graph, write_graph_config
+
+    rng = np.random.default_rng(6)
+    n = 4000
+    mind = rng.normal(60, 10, n)
+    spirit = 0.8 * mind + rng.normal(0, 6, n)
+    heart = rng.normal(55, 10, n)
+    relations = 0.7 * heart + rng.normal(0, 6, n)
+    body = rng.normal(70, 10, n)
+    X = np.column_stack([mind, heart, body, spirit, relations])
+    facets = ["Mind", "Heart", "Body", "Spirit", "Relations"]
+
+    acc = CovarianceAccumulator(len(facets))
+    for chunk in np.array_split(X, 7):
+        acc.update(chunk)
+    np.testing.assert_allclose(acc.covariance(), np.cov(X, rowvar=False), rtol=1e-9)
+
+    def chunks():
+        for part in np.array_split(X, 9):
+            yield [{"scores": dict(zip(facets, row))} for row in part]
+
+    cfg = learn_graph(facets, chunks=chunks(), alpha=0.05, threshold=0.1)
+    pairs = {frozenset(e[:2]) for e in cfg["edges"]}
+    assert pairs == {frozenset({"Mind", "Spirit"}), frozenset({"Heart", "Relations"})}
+    G = graph_from_config(write_graph_config(cfg, tmp_path))
+    assert G.has_edge("Mind", "Spirit") and G.number_of_nodes() == 5
+
+
+def test_p_laplacian_kernel_matches_numpy_step():
+    from core.graph.laplacian import _p_laplacian_step_numpy
+
+    G = nx.gnm_random_graph(40, 120, seed=2)
+    op = compile_operator(G)
+    X = np.random.default_rng(1).uniform(0, 100, (40, 5))
+    X[3, 1] = np.nan
+    ref = _p_laplacian_step_numpy(X, op.rows, op.cols, op.weights, op.incidence, 1.5, 0.5)
+    assert np.allclose(op.step(X, p=1.5), ref, equal_nan=True)
@@ -1 +1,272 @@
 def test_ok(): assert True
+
+
+def test_rule_registry_merges_once_and_reloads_on_change(tmp_path):
+    import os
+    from core.guidance.registry import RuleRegistry
+    from core.guidance.rules import DEFAULT_RULES, merge_rules, recommend_for_scores
+
+    path = tmp_path / "guidance.yaml"
+    path.write_text(
+        'rules:\n  - facet: "Mind"\n    tip: "new tip"\n  - facet: "Mind"\n    tip: "new tip"\n',
+        encoding="utf-8",
+    )
+    defaults_before = {f: list(t) for f, t in DEFAULT_RULES.items()}
+    registry = RuleRegistry()
+    first = registry.get(path)
+    assert first.get("Mind")[-1] == "new tip"
+    assert first.get("Mind").count("new tip") == 1
+    assert registry.get(path) is first
+
+    os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    assert registry.get(path).rules is first.rules  # نفس المحتوى: لا إعادة دمج
+
+    path.write_text('rules:\n  - facet: "Calm"\n    tip: "breathe"\n', encoding="utf-8")
+    second = registry.get(path)
+    assert second.get("Calm") == ("breathe",) and "new tip" not in second.get("Mind")
+
+    merged = merge_rules()
+    merged["Mind"].append("local edit")
+    assert "local edit" not in merge_rules()["Mind"]
+    assert {f: list(t) for f, t in DEFAULT_RULES.items()} == defaults_before
+
+    recs = recommend_for_scores({"Mind": 10, "Body": 90}, k=1)
+    assert recs[0].facet == "Mind" and isinstance(recs[0].tips, list)
+
+
+def test_rule_engine_matches_ladder_for_cohort():
+    import numpy as np
+    import pytest
+    import yaml
+    from core.guidance.engine import DEFAULT_ENGINE_PATH, RuleEngine
+
+    def ladder(rec):
+        out = []
+        label = (rec.get("text_analysis") or {}).get("sentiment_label")
+        if label is not None:
+            out.append({"positive": "text_positive", "neutral": "text_neutral"}.get(label, "text_negative"))
+        w = rec["wearable_analysis"]
+        h = w.get("overall_health_index")
+        if h is not None:
+            out.append("health_good" if h >= 80 else "health_moderate" if h >= 60 else "health_low")
+        if w.get("sleep_score") is not None and w["sleep_score"] < 60:
+            out.append("sleep_low")
+        if w.get("activity_score") is not None and w["activity_score"] < 50:
+            out.append("activity_low")
+        return out
+
+    rng = np.random.default_rng(0)
+    labels = [None, "positive", "neutral", "negative"]
+    records = [
+        {
+            "text_analysis": {"sentiment_label": labels[i % 4]} if labels[i % 4] else {},
+            "wearable_analysis": {
+                "overall_health_index": None if i % 7 == 0 else float(rng.uniform(30, 100)),
+                "sleep_score": float(rng.uniform(30, 100)),
+                "activity_score": None if i % 5 == 0 else float(rng.uniform(20, 90)),
+            },
+        }
+        for i in range(2000)
+    ]
+    config = yaml.safe_load(DEFAULT_ENGINE_PATH.read_text(encoding="utf-8"))
+    engine = RuleEngine([r for r in config["rules"] if r["id"] != "audio_stress_high"])
+    result = engine.run(records)
+    ids = engine.rule_ids
+    got = [[ids[j] for j in np.flatnonzero(row)] for row in result["mask"]]
+    assert got == [ladder(r) for r in records]
+    assert result["mood"][1] == "positive" and result["mood"][0] is None
+
+    stats = {s["rule"]: s for s in engine.stats()}
+    assert stats["sleep_low"]["hits"] == int(result["mask"][:, ids.index("sleep_low")].sum())
+    assert all(s["evaluations"] == 1 for s in stats.values())
+
+    with pytest.raises(ValueError):
+        RuleEngine([{"when": ["unknown_feature > 1"]}])
+
+
+def test_concurrent_guidance_returns_partial_result_on_timeout(monkeypatch):
+    import asyncio
+    import os
+    import pytest
+    import threading
+    from core.guidance import orchestrator
+
+    release = threading.Event()
+    started = []
+
+    def blocked_audio(path):
+        started.append(path)
+        release.wait(10)
+        return {"stress_index": 90.0, "sentiment": "negative"}
+
+    monkeypatch.setattr(orchestrator, "analyze_audio_emotions", blocked_audio)
+    monkeypatch.setattr(orchestrator, "analyze_text_sentiment",
+                        lambda t: {"sentiment_label": "positive", "sentiment_score": 0.9})
+    monkeypatch.setattr(orchestrator, "analyze_wearable_signals",
+                        lambda s: {"overall_health_index": 85.0, "sleep_score": 50.0})
+    try:
+        out = orchestrator.build_guidance_concurrent(
+            "hi", b"RIFF", {}, timeouts={"audio": 0.05, "text": 30, "wearable": 30}
+        )
+        assert out["partial"] and out["modalities"]["audio"]["status"] == orchestrator.TIMED_OUT
+        assert out["modalities"]["text"]["status"] == orchestrator.OK
+        assert out["mood_estimation"] == "positive" and len(out["overall_recommendations"]) == 3
+        assert "audio_analysis" not in out["emotional_data"]
+
+        # خانات الصوت الممتلئة ترفض العمل الجديد فورًا بدل حجز الخيوط
+        for _ in range(orchestrator.AUDIO_MAX_INFLIGHT):
+            orchestrator.build_guidance_concurrent(audio=b"x", timeouts={"audio": 0.001})
+        busy = orchestrator.build_guidance_concurrent("hi", b"x", {})
+        assert busy["modalities"]["audio"]["status"] == orchestrator.BUSY
+        assert busy["modalities"]["text"]["status"] == orchestrator.OK
+    finally:
+        release.set()
+
+    monkeypatch.setattr(orchestrator, "analyze_audio_emotions", lambda p: {"stress_index": 90.0})
+    full = None
+    for _ in range(100):  # انتظار تحرر خانات الصوت بعد فك الحجز
+        full = asyncio.run(orchestrator.build_guidance_async("hi", b"x", {}, timeouts={"audio": 30}))
+        if full["modalities"]["audio"]["status"] != orchestrator.BUSY:
+            break
+        threading.Event().wait(0.05)
+    assert not full["partial"] and full["modalities"]["audio"]["status"] == orchestrator.OK
+    assert started and not any(os.path.exists(p) for p in started)  # الملفات المؤقتة حُذفت
+
+    # مهل العميل لا تتجاوز الافتراضية، والمفاتيح المجهولة أو القيم غير الموجبة مرفوضة
+    assert orchestrator.resolve_timeouts({"audio": 1e9})["audio"] == orchestrator.DEFAULT_TIMEOUTS["audio"]
+    assert orchestrator.resolve_timeouts({"text": 0.5})["text"] == 0.5
+    for bad in ({"video": 1.0}, {"audio": 0.0}, {"audio": float("nan")}):
+        with pytest.raises(ValueError):
+            orchestrator.resolve_timeouts(bad)
+
+
+def test_cohort_plans_match_per_user_pipeline():
+    import numpy as np
+    from core.guidance.cohort import build_cohort_plans
+    from core.guidance.planner import build_daily_plan
+    from core.guidance.rules import recommend_for_scores
+
+    rng = np.random.default_rng(1)
+    facets = [f"F{j}" for j in range(9)]
+    S = rng.integers(0, 101, size=(500, len(facets))).astype(float)
+    S[::7, 2] = np.nan
+    S[1, :] = 100.0  # كل الأولويات صفر: تعادل كامل
+    centrality = {f: float(c) for f, c in zip(facets, rng.random(len(facets)))}
+    rules = {f: [f"do {f}"] for f in facets}
+
+    plan = build_cohort_plans(S, facets, centrality=centrality, k=3, minutes_per_day=30)
+    tight = build_cohort_plans(S, facets, centrality=centrality, k=3, minutes_per_day=2)
+    for i in range(len(S)):
+        scores = {f: v for f, v in zip(facets, S[i]) if not np.isnan(v)}
+        recs = recommend_for_scores(scores, k=3, rules=rules, centrality=centrality)
+        expected = [(it.facet, it.minutes) for it in build_daily_plan(recs, minutes_per_day=30)]
+        assert [(it.facet, it.minutes) for it in plan.user_plan(i, rules)] == expected
+        expected = [(it.facet, it.minutes) for it in build_daily_plan(recs, minutes_per_day=2)]
+        assert [(it.facet, it.minutes) for it in tight.user_plan(i, rules)] == expected
+        assert plan.priority[i][:len(recs)].tolist() == [r.priority for r in recs]
+
+    # حالة تقريب حدّية: np.round على float32 كانت تعطي 92.08000183105469 بدل 92.09
+    facets = ["Mind", "Heart", "Body", "Spirit"]
+    scores = dict(zip(facets, [12.3, 45.67, 80.1, 33.33]))
+    centrality = {"Mind": 0.9, "Heart": 0.4, "Body": 0.1, "Spirit": 0.6}
+    recs = recommend_for_scores(scores, k=4, rules=rules, centrality=centrality)
+    plan = build_cohort_plans(np.array([list(scores.values())]), facets, centrality=centrality, k=4)
+    assert plan.priority[0].tolist() == [r.priority for r in recs]
+
+
+def test_scheduler_allocates_exactly_and_respects_week_constraints():
+    import numpy as np
+    from core.guidance.planner import build_daily_plan, build_weekly_plan
+    from core.guidance.rules import Recommendation
+    from core.guidance.scheduling import WEEKDAYS, allocate_minutes
+
+    W = np.array([[3.0, 2.0, 1.0], [1.0, 1.0, 1.0], [0.0, 0.0, np.nan], [5.0, np.nan, np.nan]])
+    out = allocate_minutes(W, 10)
+    assert out.sum(axis=1).tolist() == [10, 10, 10, 10]
+    assert out[1].tolist() == [4, 3, 3] and out[2].tolist() == [5, 5, 0]
+    assert allocate_minutes([90.0, 1.0, 1.0], 30).min() == 1
+
+    recs = [Recommendation("Mind", 80.5, ["a", "b"]), Recommendation("Body", 60, ["c"]),
+            Recommendation("Calm", 20, []), Recommendation("Sleep", 40, ["d"])]
+    assert sum(it.minutes for it in build_daily_plan(recs, minutes_per_day=30)) == 30
+    tight = build_daily_plan(recs, minutes_per_day=2)  # دقائق أقل من عدد التوصيات
+    assert len(tight) == 2 and all(it.minutes == 1 for it in tight)
+
+    week = build_weekly_plan(recs, minutes_per_week=160, day_capacity=40, day_load=[40, 0, 0, 0, 0, 0, 0])
+    assert sum(it.minutes for items in week.values() for it in items) == 160
+    assert week["Sat"] == []
+    assert all(sum(it.minutes for it in items) <= 40 for items in week.values())
+    for facet in ("Mind", "Body", "Calm", "Sleep"):
+        days = [WEEKDAYS.index(d) for d, items in week.items() for it in items if it.facet == facet]
+        gap = abs(days[0] - days[1])
+        assert len(days) == 2 and min(gap, 7 - gap) >= 2
+
+
+def test_schedule_week_respects_capacity_on_preloaded_week():
+    import itertools
+    import numpy as np
+    from core.guidance.scheduling import schedule_week
+
+    def loads(sessions, days, day_load):
+        out = np.array(day_load, dtype=float)
+        for m, d in zip(sessions, days):
+            out[d[0]] += m[0]
+        return out
+
+    sessions = [[27], [22], [14], [15], [6], [7], [5]]
+    day_load = [5, 24, 19, 27, 15, 18, 29]  # أسبوع محمّل بشكل غير متساوٍ
+    assert loads(sessions, schedule_week(sessions, day_capacity=40, day_load=day_load), day_load).max() <= 40
+
+    rng = np.random.default_rng(7)
+    combos = np.array(list(itertools.product(range(7), repeat=4)))
+    for _ in range(40):
+        m = rng.integers(5, 30, 4)
+        day_load = rng.integers(0, 30, 7)
+        totals = np.zeros((len(combos), 7)) + day_load
+        for i in range(4):
+            np.add.at(totals, (np.arange(len(combos)), combos[:, i]), m[i])
+        if (totals <= 40).all(axis=1).any():  # يوجد توزيع ممكن بالقوة الغاشمة
+            sessions = [[int(x)] for x in m]
+            days = schedule_week(sessions, day_capacity=40, day_load=day_load.tolist())
+            assert loads(sessions, days, day_load).max() <= 40
+
+
+def test_message_catalog_compiles_once_and_serves_both_locales(tmp_path):
+    import pytest
+    from core.guidance.engine import get_engine
+    from core.guidance.rules import translate_to_ar
+    from core.utils.messages import MessageCatalog, compile_catalog, get_catalog
+
+    src = tmp_path / "messages.yaml"
+    src.write_text('locales: [en, ar]\nmessages:\n  a.hi: {en: "Hi {name}", ar: "مرحبا {name}"}\n', encoding="utf-8")
+    catalog = MessageCatalog(compile_catalog(src, tmp_path / "m.bin"))
+    assert catalog.get("a.hi", "ar") == "مرحبا {name}" and catalog.find("Hi {name}") == "a.hi"
+    with pytest.raises(KeyError):
+        catalog.get("a.missing")
+    first = get_catalog(src, cache_dir=tmp_path)
+    assert get_catalog(src, cache_dir=tmp_path) is first
+    other = get_catalog(src, cache_dir=tmp_path / "other")  # cache_dir جزء من مفتاح الذاكرة
+    assert other is not first and list((tmp_path / "other").glob("messages-*.bin"))
+
+    src.write_text('locales: [en, ar]\nmessages:\n  a.hi: {en: "Hi"}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        get_catalog(src, cache_dir=tmp_path)
+    src.write_text('locales: [en]\nmessages:\n  a.hi: {en: "Hello"}\n', encoding="utf-8")
+    assert get_catalog(src, cache_dir=tmp_path).get("a.hi") == "Hello"
+    assert len(list(tmp_path.glob("messages-*.bin"))) == 1  # النسخة الأقدم حُذفت
+
+    engine = get_engine()
+    record = [{"text_analysis": {"sentiment_label": "positive"}, "wearable_analysis": {"sleep_score": 40}}]
+    en, ar = engine.run(record)["messages"][0], engine.run(record, lang="ar")["messages"][0]
+    assert [translate_to_ar(m) for m in en] == ar and ar[0].startswith("🌟 أحسنت")
+    assert engine.texts("ar") is engine.texts("ar")
+
+
+def test_unknown_lang_falls_back_to_english():
+    from core.guidance.rules import build_guidance_recommendations
+    from core.utils.messages import message
+
+    fr = build_guidance_recommendations(text="happy", lang="fr")
+    en = build_guidance_recommendations(text="happy", lang="en")
+    assert fr["overall_recommendations"] == en["overall_recommendations"]
+    assert message("balance_map.title", "fr") == message("balance_map.title", "en")
@@ -1 +1,139 @@
+import numpy as np
+import pytest
+
+from core.scoring.indices import balance_index
+from core.explain.attribution import explain_summary
+from core.features.scoring import PSI_WEIGHTS, calculate_psi
+from core.scoring.whatif import BAND_LEVELS, delta_grid, one_at_a_time_grid, simulate_whatif
+
+FACETS = ["Mind", "Heart", "Body", "Spirit", "Relations", "Work"]
+
+
 def test_ok(): assert True
+
+
+def test_whatif_matches_scalar_recompute():
+    scores = {"Mind": 62, "Heart": 55, "Body": 80, "Spirit": 71, "Relations": 40, "Work": 90}
+    weights = {"Mind": 2.0, "Heart": 1.5}
+    grid = delta_grid(FACETS, [-10, 0, 10], vary=["Heart", "Relations", "Work"])
+    res = simulate_whatif(scores, grid, weights=weights, indices={"PSI": PSI_WEIGHTS})
+    assert res["index"].shape == (27,)
+    for i in range(grid.shape[0]):
+        s = {f: scores[f] + grid[i, j] for j, f in enumerate(FACETS)}
+        idx, s_norm = balance_index(s, weights)
+        assert res["index"][i] == idx
+        psi = calculate_psi(*[s_norm[f] for f in FACETS])
+        assert abs(res["indices"]["PSI"]["value"][i] - psi) < 1e-9
+        ex = explain_summary(s_norm, weights=weights)
+        sup = [FACETS[j] for j in res["top_supporting"][i] if j >= 0]
+        lim = [FACETS[j] for j in res["top_limiting"][i] if j >= 0]
+        assert sup == [name for name, _ in ex["top_supporting"]]
+        assert lim == [name for name, _ in ex["top_limiting"]]
+
+
+def test_whatif_grid_refuses_oversized_products():
+    assert delta_grid(FACETS, range(-10, 11), vary=FACETS[:3]).shape == (21 ** 3, len(FACETS))
+    with pytest.raises(ValueError):
+        delta_grid(FACETS, range(-10, 11), vary=FACETS[:6])
+
+
+def test_whatif_band_transitions():
+    scores = {f: 68.0 for f in FACETS}
+    res = simulate_whatif(scores, one_at_a_time_grid(FACETS, [0, 12, 30]))
+    assert BAND_LEVELS[res["baseline_band"]] == "متوسط"
+    assert not res["band_changed"][0]
+    assert res["band_changed"].any()
+
+
+def test_target_planner_matches_linprog():
+    from scipy.optimize import linprog
+    from core.scoring.targets import plan_targets, plan_targets_batch
+
+    rng = np.random.default_rng(0)
+    S = rng.uniform(30, 90, size=(20, len(FACETS)))
+    costs = {"Mind": 1.0, "Heart": 2.0, "Body": 0.5, "Spirit": 1.5, "Relations": 3.0, "Work": 1.0}
+    caps = {f: 15.0 for f in FACETS}
+    res = plan_targets_batch(S, 75.0, FACETS, costs=costs, caps=caps)
+    c = np.array([costs[f] for f in FACETS])
+    for u in range(S.shape[0]):
+        ub = np.minimum(15.0, 100.0 - S[u])
+        need = 75.0 - S[u].mean()
+        if need <= 0:
+            assert res["cost"][u] == 0
+            continue
+        lp = linprog(c, A_ub=-np.ones((1, len(FACETS))) / len(FACETS), b_ub=[-need],
+                     bounds=list(zip(np.zeros(len(FACETS)), ub)))
+        assert res["feasible"][u] == lp.success
+        if lp.success:
+            assert abs(res["cost"][u] - lp.fun) < 1e-6
+            assert res["index"][u] >= 75.0 - 1e-6
+
+    one = plan_targets(dict(zip(FACETS, S[0])), 75.0, costs=costs, caps=caps, integer=True)
+    assert all(float(v).is_integer() for v in one["increments"].values())
+    assert one["index"] >= 75.0 or not one["feasible"]
+
+    with pytest.raises(ValueError):
+        plan_targets_batch(S, 75.0, FACETS, weights={f: 0.0 for f in FACETS})
+    for bad in (0.0, -1.0):
+        with pytest.raises(ValueError):
+            plan_targets_batch(S, 75.0, FACETS, costs={**dict.fromkeys(FACETS, 1.0), "Mind": bad})
+
+
+def test_wearable_timeseries_matches_snapshot_and_pandas():
+    import pandas as pd
+    from core.features.signal_features import compute_health_indices
+    from core.features.signal_timeseries import (
+        SIGNAL_COLUMNS, health_indices_frame, resample_signals, rolling_health_indices, snapshot_records,
+    )
+
+    rng = np.random.default_rng(3)
+    n = 3 * 24 * 60
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range("2026-03-01", periods=n, freq="1min"),
+        "hr": rng.normal(75, 15, n),
+        "hrv": rng.normal(45, 20, n),
+        "sleep_score": np.where(rng.random(n) < 0.98, np.nan, rng.uniform(40, 100, n)),
+        "activity_score": rng.uniform(0, 100, n),
+    })
+    frame.loc[rng.random(n) < 0.2, "hr"] = np.nan
+    frame.loc[:50, "hrv"] = -1.0
+
+    rows = frame.iloc[:200]
+    expected = [
+        compute_health_indices(*(None if c not in rows or pd.isna(r[c]) else r[c] for c in SIGNAL_COLUMNS))
+        for _, r in rows.iterrows()
+    ]
+    for got, exp in zip(snapshot_records(health_indices_frame(rows)), expected):
+        assert got == pytest.approx(exp)
+
+    valid = frame.set_index("timestamp").assign(
+        hr=lambda d: d.hr.where(d.hr > 0), hrv=lambda d: d.hrv.where(d.hrv > 0)
+    )
+    hourly = valid.resample("1h")
+    ref = hourly.sum().rolling(6, min_periods=1).sum() / hourly.count().rolling(6, min_periods=1).sum()
+    got = resample_signals(frame, "1h", window="6h")
+    assert np.allclose(got[list(ref.columns)].to_numpy(), ref.to_numpy(), equal_nan=True)
+
+    daily = rolling_health_indices(frame, "1D")
+    assert len(daily) == 3 and daily["samples"].tolist() == [1440] * 3
+    assert daily["device_stress_score"].isna().all() and daily["overall_health_index"].notna().all()
+    with pytest.raises(ValueError):
+        resample_signals(frame, "1h", window="90min")
+
+
+def test_wearable_timeseries_bins_across_dst_transitions():
+    import pandas as pd
+    from core.features.signal_timeseries import resample_signals
+
+    for day in ("2026-03-08", "2026-11-01"):  # America/New_York: تقديم الساعة ثم تأخيرها
+        ts = pd.date_range(pd.Timestamp(f"{day} 00:00", tz="America/New_York"), periods=12, freq="30min")
+        frame = pd.DataFrame({"timestamp": ts, "hr": np.arange(12, dtype=float) + 60})
+
+        hourly = resample_signals(frame, "1h")
+        assert hourly.index.is_unique and hourly.index.is_monotonic_increasing
+        assert hourly["samples"].tolist() == [2] * 6  # 6 ساعات فعلية، لا دمج ولا تكرار
+        assert hourly["hr"].tolist() == [60.5, 62.5, 64.5, 66.5, 68.5, 70.5]
+
+        daily = resample_signals(frame, "1D")
+        assert daily.index.tolist() == [pd.Timestamp(day, tz="America/New_York")]
+        assert daily["samples"].tolist() == [12]
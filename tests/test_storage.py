@@ -1 +1,169 @@
+import numpy as np
+import pytest
+
+from core.storage import db
+
+
 def test_ok(): assert True
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_DIR", tmp_path)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "test.sqlite3")
+    db.init_db()
+    return tmp_path
+
+
+def test_longitudinal_explainer_is_incremental(temp_db):
+    from core.scoring.indices import balance_index
+    from core.storage.repository import delete_session, save_session
+    from core.explain.longitudinal import LongitudinalExplainer
+
+    history = [
+        {"Mind": 60, "Heart": 50, "Body": 70},
+        {"Mind": 65, "Heart": 50, "Body": 60},
+        {"Mind": 65, "Heart": 80, "Body": 60},
+    ]
+    for s in history[:2]:
+        save_session("u1", balance_index(s)[0], s)
+    save_session("u2", 10.0, {"Mind": 10})
+
+    calls = []
+
+    def fetch(user_id, after_id=0):
+        from core.storage.repository import list_user_sessions
+        rows = list_user_sessions(user_id, after_id=after_id)
+        calls.append(len(rows))
+        return rows
+
+    ex = LongitudinalExplainer(fetch=fetch)
+    first = ex.explain("u1")
+    assert first["scores"].shape == (2, 3)
+    save_session("u1", balance_index(history[2])[0], history[2])
+    res = ex.explain("u1")
+    assert calls == [2, 1]
+    assert res["scores"].shape == (3, 3)
+    np.testing.assert_allclose(res["contributions"].sum(axis=1), np.diff(res["index"]))
+    np.testing.assert_allclose(res["index"], res["stored_index"], atol=0.01)
+    assert res["drivers"] == ["Body", "Heart"]
+
+    res["session_ids"].append(-1)  # نسخة المستدعي لا تمس الذاكرة
+    with pytest.raises(ValueError):
+        res["scores"][0, 0] = 0.0
+    delete_session(res["session_ids"][1])
+    after_delete = ex.explain("u1")
+    assert after_delete["scores"].shape == (2, 3) and calls == [2, 1, 2]
+    assert after_delete["drivers"] == ["Heart"]
+
+
+def test_markov_transition_model_is_incremental(temp_db):
+    from core.dynamics.markov import MarkovChain, TransitionModel, fit_transition_model
+    from core.dynamics.simulators import EnlightenmentSimulator
+    from core.storage.repository import save_session
+
+    low, high = {"Mind": 20, "Heart": 20}, {"Mind": 80, "Heart": 80}
+    save_session("u1", 20.0, low)
+    save_session("u2", 80.0, high)
+    save_session("u1", 80.0, high)
+
+    path = temp_db / "markov.json"
+    model = fit_transition_model(path, chunk_size=1)
+    assert model.n_transitions == 1
+    assert model.counts[0, 2] == 1  # جمود → تدفق
+
+    save_session("u2", 20.0, low)
+    model = fit_transition_model(path)
+    assert model.n_transitions == 2
+    assert model.counts[2, 0] == 1 and model.last_state == {"u1": 2, "u2": 0}
+    assert TransitionModel.from_dict(model.to_dict()).counts.toarray().tolist() == model.counts.toarray().tolist()
+
+    chain = MarkovChain.from_matrix(np.array([[0.9, 0.1], [0.5, 0.5]]), ["a", "b"])
+    assert np.allclose(chain.stationary_distribution(), [5 / 6, 1 / 6])
+    assert np.allclose(chain.forecast("a", 3), np.array([1.0, 0.0]) @ np.linalg.matrix_power(chain.P, 3))
+    assert np.allclose(chain.forecast(0, 200), chain.stationary_distribution())
+
+    fitted = model.chain(smoothing=1.0)
+    summary = EnlightenmentSimulator(20, 20).simulate_markov(fitted, n_paths=4000, steps=5, seed=1)
+    assert np.allclose(summary.filter(like="P(").sum(axis=1), 1.0)
+    assert abs(summary.loc[0, "P(تدفق)"] - fitted.forecast(0, 1)[2]) < 0.03
+
+
+def test_forecast_job_and_incremental_refit_agree(temp_db):
+    from datetime import date
+    from core.dynamics.forecasting import fit_users, refit_user, run_forecast_job, _user_series
+    from core.storage.repository import get_forecast, list_user_sessions, save_session
+
+    def save_at(user, value, day):
+        sid = save_session(user, value, {"Mind": value})
+        conn = db.get_connection()
+        with conn:
+            conn.execute("UPDATE sessions SET created_at=? WHERE id=?", (f"{day} 10:00:00", sid))
+        conn.close()
+
+    for day, value in [("2026-01-05", 50), ("2026-01-07", 54), ("2026-01-14", 58), ("2026-01-28", 66)]:
+        save_at("u1", value, day)
+    save_at("old", 40, "2024-01-01")
+
+    assert run_forecast_job(as_of=date(2026, 2, 2), n_jobs=1) == 1  # "old" غير نشط
+    first = get_forecast("u1")
+    assert [f["week"] for f in first["forecast"]] == ["2026-02-09", "2026-02-16", "2026-02-23", "2026-03-02"]
+    values = [f["balance_index"] for f in first["forecast"]]
+    assert values == sorted(values) and values[0] > 60
+    assert get_forecast("old") is None
+    assert refit_user("old", as_of=date(2026, 2, 2)) is None and get_forecast("old") is None
+    assert run_forecast_job(as_of=date(2026, 2, 2), n_jobs=2, users_per_chunk=1) == 1
+    assert get_forecast("u1")["forecast"] == first["forecast"]
+
+    save_at("u1", 70, "2026-02-11")
+    save_at("u1", 74, "2026-02-12")
+    incremental = refit_user("u1", as_of=date(2026, 2, 16))
+    full = fit_users([_user_series("u1", list_user_sessions("u1"))], incremental["state"]["pending_week"])[0]
+    assert incremental["forecast"] == full["forecast"]
+    assert incremental["state"]["level"] == pytest.approx(full["state"]["level"])
+    assert get_forecast("u1")["last_session_id"] == full["last_session_id"]
+
+    # معاملات تنعيم مختلفة عن الحالة المحفوظة: ملاءمة كاملة بها لا طي تراكمي
+    retuned = refit_user("u1", as_of=date(2026, 2, 16), alpha=0.8)
+    series = [_user_series("u1", list_user_sessions("u1"))]
+    full = fit_users(series, retuned["state"]["pending_week"], alpha=0.8)[0]
+    assert retuned["state"]["alpha"] == 0.8 and retuned["forecast"] == full["forecast"]
+
+
+def test_cohort_job_bulk_inserts_latest_session_plans(temp_db):
+    from core.guidance.cohort import run_cohort_job
+    from core.storage.repository import get_plan, get_recommendations, save_session
+
+    save_session("u1", 50, {"Mind": 90, "Body": 20})
+    latest = save_session("u1", 55, {"Mind": 30, "Body": 80, "Calm": 60})
+    other = save_session("u2", 70, {"Mind": 70})
+
+    assert run_cohort_job(k=2, minutes_per_day=20, centrality={}) == 2
+    assert [r["facet"] for r in get_recommendations(latest)] == ["Mind", "Calm"]
+    assert sum(it["minutes"] for it in get_plan(latest, "daily")) == 20
+    assert [it["facet"] for it in get_plan(other, "daily")] == ["Mind"]
+
+
+def test_iter_sessions_closes_connection_when_abandoned(temp_db, monkeypatch):
+    from core.storage import repository
+
+    closed = []
+
+    class Tracked:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def execute(self, *args):
+            return self.conn.execute(*args)
+
+        def close(self):
+            closed.append(True)
+            self.conn.close()
+
+    for i in range(3):
+        repository.save_session(f"u{i}", 50, {"Mind": 50})
+    monkeypatch.setattr(repository, "get_connection", lambda: Tracked(db.get_connection()))
+    chunks = repository.iter_sessions(chunk_size=1)
+    assert len(next(chunks)) == 1
+    chunks.close()  # المستهلك توقف قبل النهاية
+    assert closed == [True]